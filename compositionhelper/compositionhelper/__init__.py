@@ -9,9 +9,17 @@
 # A Krita plugin designed to add composition helper in documents
 # -----------------------------------------------------------------------------
 
-from .compositionhelper import CompositionHelper
+try:
+    from krita import Krita
+except ImportError:
+    # not executed from Krita (headless tools like benchmark): there's no
+    # extension to register
+    Krita = None
 
-# And add the extension to Krita's list of extensions:
-app = Krita.instance()
-extension = CompositionHelper(parent=app)
-app.addExtension(extension)
+if Krita is not None:
+    from .compositionhelper import CompositionHelper
+
+    # And add the extension to Krita's list of extensions:
+    app = Krita.instance()
+    extension = CompositionHelper(parent=app)
+    app.addExtension(extension)
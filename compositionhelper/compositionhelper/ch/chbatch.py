@@ -0,0 +1,321 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The chbatch module provides a command line batch renderer for helpers
+#
+# Renderer doesn't need Krita and is executed with an offscreen Qt platform;
+# from directory containing plugin directory:
+#
+#   python -m compositionhelper.ch.chbatch <directory or glob> [options]
+#
+# Helper to render is defined from a setup (name or uuid) of a .chsetups file,
+# or from command line options
+#
+# For each image, according to output mode:
+# - overlay: helper is drawn over image
+# - png: helper is rendered in a transparent PNG, at image size
+# - svg: helper is rendered in a SVG document, at image size
+#
+# Images are processed in parallel in a process pool; progress is streamed on
+# stderr
+# -----------------------------------------------------------------------------
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+if sys.platform != 'win32' and 'QT_QPA_PLATFORM' not in os.environ:
+    # no display is needed
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+
+from PyQt5.Qt import *
+
+from .chhelpers import (
+        CHHelpers,
+        CHHelpersDef
+    )
+from .chsettings import CHSettingsKey
+from .chrenderer import CHRenderer
+from .chsvg import CHSvgWriter
+
+from compositionhelper.pktk import *
+
+
+class CHBatch(object):
+    """Render helpers over images"""
+    MODE_OVERLAY = 'overlay'
+    MODE_PNG = 'png'
+    MODE_SVG = 'svg'
+
+    MODES = (MODE_OVERLAY, MODE_PNG, MODE_SVG)
+
+    # image file extensions processed when a directory is provided
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff', '.gif')
+
+    # stored data format identifier for setups files
+    SETUPS_FORMAT_IDENTIFIER = 'ch--setup'
+
+    # setups file keys (see WSetupManager file format); setup manager widget is
+    # not imported, as it needs Krita
+    __FILE_KEY_PKTKSM = 'pktk-sm'
+    __FILE_KEY_PKTKSM_DATA = 'data'
+    __FILE_KEY_STOREDD_FMT = 'storedDataFormat'
+    __FILE_KEY_STOREDD_FMT_ID = 'identifier'
+    __KEY_SETUPS = 'setups'
+    __KEY_SETUP_UUID = 'uuid'
+    __KEY_SETUP_NAME = 'name'
+    __KEY_SETUP_DATA = 'data'
+
+    __application = None
+
+    @staticmethod
+    def loadSetup(fileName, setup=None):
+        """Return setup data (dictionary) from given .chsetups `fileName`
+
+        The `setup` can be a setup name or uuid; if None, the first setup from
+        file is returned
+        """
+        with open(fileName, 'r') as fHandle:
+            data = json.loads(fHandle.read())
+
+        try:
+            isValid = (data[CHBatch.__FILE_KEY_STOREDD_FMT][CHBatch.__FILE_KEY_STOREDD_FMT_ID] == CHBatch.SETUPS_FORMAT_IDENTIFIER)
+            setups = data[CHBatch.__FILE_KEY_PKTKSM][CHBatch.__FILE_KEY_PKTKSM_DATA][CHBatch.__KEY_SETUPS]
+        except (KeyError, TypeError):
+            isValid = False
+
+        if not isValid or not isinstance(setups, list):
+            raise EInvalidValue(f"Given file is not a valid setups file: {fileName}")
+
+        for setupData in setups:
+            if isinstance(setupData, dict) and (setup is None or setup in (setupData.get(CHBatch.__KEY_SETUP_UUID), setupData.get(CHBatch.__KEY_SETUP_NAME))):
+                return setupData[CHBatch.__KEY_SETUP_DATA]
+
+        raise EInvalidValue(f"Setup not found: {setup}")
+
+    @staticmethod
+    def setupData(helperId, color='#ff000000', width=1.0, style=Qt.SolidLine, options=None):
+        """Return setup data (dictionary) from given values"""
+        if helperId not in CHHelpersDef.HELPERS:
+            raise EInvalidValue(f"Given `helperId` is not valid: {helperId}")
+
+        if options is None:
+            options = []
+
+        return {CHSettingsKey.HELPER_LAST_USED.id(): helperId,
+                CHSettingsKey.HELPER_LINE_COLOR.id(helperId='global'): color,
+                CHSettingsKey.HELPER_LINE_STYLE.id(helperId='global'): int(style),
+                CHSettingsKey.HELPER_LINE_WIDTH.id(helperId='global'): width,
+                CHSettingsKey.HELPER_OPTIONS.id(helperId='global'): options + CHHelpersDef.HELPERS[helperId]['options']['forced']
+                }
+
+    @staticmethod
+    def files(paths):
+        """Return list of image files from given `paths`
+
+        Each path can be a directory (all images are processed), a file or a
+        glob pattern
+        """
+        returned = []
+        for path in paths:
+            if os.path.isdir(path):
+                for fileName in sorted(os.listdir(path)):
+                    if os.path.splitext(fileName)[1].lower() in CHBatch.IMAGE_EXTENSIONS:
+                        returned.append(os.path.join(path, fileName))
+            elif os.path.isfile(path):
+                returned.append(path)
+            else:
+                returned += sorted(glob.glob(path, recursive=True))
+        return returned
+
+    @staticmethod
+    def outputFileName(fileName, outputDirectory, mode, suffix):
+        """Return output file name for given image `fileName`"""
+        baseName, extension = os.path.splitext(os.path.basename(fileName))
+        if mode == CHBatch.MODE_PNG:
+            extension = '.png'
+        elif mode == CHBatch.MODE_SVG:
+            extension = '.svg'
+
+        if outputDirectory is None:
+            outputDirectory = os.path.dirname(fileName)
+
+        return os.path.join(outputDirectory, f'{baseName}{suffix}{extension}')
+
+    @staticmethod
+    def initialiseProcess():
+        """Initialise Qt in current process"""
+        if QGuiApplication.instance() is None:
+            CHBatch.__application = QGuiApplication(sys.argv[:1])
+
+    @staticmethod
+    def render(fileName, outputFileName, mode, setupData):
+        """Render helper defined by `setupData` for given image `fileName`
+
+        Return a tuple (fileName, outputFileName, duration in milliseconds)
+        """
+        startTime = time.perf_counter()
+        CHBatch.initialiseProcess()
+
+        helperId = setupData[CHSettingsKey.HELPER_LAST_USED.id()]
+        options = setupData[CHSettingsKey.HELPER_OPTIONS.id(helperId='global')]
+
+        pen = QPen(QColor(setupData[CHSettingsKey.HELPER_LINE_COLOR.id(helperId='global')]))
+        pen.setStyle(setupData[CHSettingsKey.HELPER_LINE_STYLE.id(helperId='global')])
+        pen.setWidthF(max(0.75, setupData[CHSettingsKey.HELPER_LINE_WIDTH.id(helperId='global')]))
+
+        if mode == CHBatch.MODE_OVERLAY:
+            image = QImage(fileName)
+            if image.isNull():
+                raise EInvalidValue(f"Unable to read image: {fileName}")
+            elif image.format() in (QImage.Format_Indexed8, QImage.Format_Mono, QImage.Format_MonoLSB):
+                # can't paint on indexed images
+                image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+            size = image.size()
+        else:
+            # only image size is needed, don't decode image
+            size = QImageReader(fileName).size()
+            if not size.isValid():
+                raise EInvalidValue(f"Unable to read image: {fileName}")
+
+        if mode == CHBatch.MODE_SVG:
+            svgWriter = CHSvgWriter(size.width(), size.height())
+            svgWriter.addHelper(helperId, (0, 0, size.width(), size.height()), options, pen.color().name(QColor.HexArgb), pen.widthF(), pen.style())
+            with open(outputFileName, 'w') as fHandle:
+                fHandle.write(svgWriter.toString())
+        else:
+            if mode == CHBatch.MODE_PNG:
+                image = QImage(size, QImage.Format_ARGB32_Premultiplied)
+                image.fill(Qt.transparent)
+
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(pen)
+            CHRenderer.paintHelper(helperId, painter, QRectF(0, 0, size.width(), size.height()), options)
+            painter.end()
+
+            if not image.save(outputFileName):
+                raise EInvalidValue(f"Unable to save image: {outputFileName}")
+
+        return (fileName, outputFileName, 1000 * (time.perf_counter() - startTime))
+
+    def __init__(self, setupData, mode=MODE_OVERLAY, outputDirectory=None, suffix='-ch', maxWorkers=None):
+        if mode not in CHBatch.MODES:
+            raise EInvalidValue(f"Given `mode` is not valid: {mode}")
+
+        self.__setupData = setupData
+        self.__mode = mode
+        self.__outputDirectory = outputDirectory
+        self.__suffix = suffix
+        self.__maxWorkers = maxWorkers
+
+    def run(self, files, progress=None):
+        """Render helper for all given `files`
+
+        If provided, `progress` is a callable called each time a file is processed
+        with arguments (number of processed files, number of files, fileName,
+        outputFileName, duration, error)
+
+        Return number of files in error
+        """
+        if self.__outputDirectory is not None:
+            os.makedirs(self.__outputDirectory, exist_ok=True)
+
+        nbErrors = 0
+        nbProcessed = 0
+        # use 'spawn' to ensure Qt is initialised in a clean process
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.__maxWorkers,
+                                                    mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=CHBatch.initialiseProcess) as executor:
+            futures = {}
+            for fileName in files:
+                outputFileName = CHBatch.outputFileName(fileName, self.__outputDirectory, self.__mode, self.__suffix)
+                futures[executor.submit(CHBatch.render, fileName, outputFileName, self.__mode, self.__setupData)] = (fileName, outputFileName)
+
+            for future in concurrent.futures.as_completed(futures):
+                nbProcessed += 1
+                fileName, outputFileName = futures[future]
+                try:
+                    fileName, outputFileName, duration = future.result()
+                    error = None
+                except Exception as e:
+                    nbErrors += 1
+                    duration = 0
+                    error = str(e)
+
+                if callable(progress):
+                    progress(nbProcessed, len(futures), fileName, outputFileName, duration, error)
+
+        return nbErrors
+
+
+def main(argv=None):
+    """Execute batch renderer from command line"""
+    lineStyles = {'solid': Qt.SolidLine,
+                  'dash': Qt.DashLine,
+                  'dot': Qt.DotLine,
+                  'dashdot': Qt.DashDotLine,
+                  'dashdotdot': Qt.DashDotDotLine
+                  }
+
+    parser = argparse.ArgumentParser(description="Composition Helper - batch renderer")
+    parser.add_argument('paths', nargs='+', help="images directories, files or glob patterns")
+    parser.add_argument('-m', '--mode', choices=CHBatch.MODES, default=CHBatch.MODE_OVERLAY, help="output mode (default: overlay)")
+    parser.add_argument('-o', '--output', default=None, help="output directory (default: images directory)")
+    parser.add_argument('--suffix', default='-ch', help="output file name suffix (default: -ch)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="number of parallel processes (default: number of CPU)")
+    parser.add_argument('--setups', default=None, help="a .chsetups file")
+    parser.add_argument('--setup', default=None, help="setup name or uuid to use from setups file (default: first setup)")
+    parser.add_argument('--helper', choices=list(CHHelpersDef.HELPERS.keys()), default=CHHelpers.RULE_OF_THIRD, help="helper to render, when no setups file is provided")
+    parser.add_argument('--color', default='#ff000000', help="line color, as #AARRGGBB or #RRGGBB (default: #ff000000)")
+    parser.add_argument('--width', type=float, default=1.0, help="line width (default: 1.0)")
+    parser.add_argument('--style', choices=list(lineStyles.keys()), default='solid', help="line style (default: solid)")
+    parser.add_argument('--flipH', action='store_true', help="flip helper horizontally")
+    parser.add_argument('--flipV', action='store_true', help="flip helper vertically")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.setups:
+            setupData = CHBatch.loadSetup(args.setups, args.setup)
+        else:
+            options = []
+            if args.flipH:
+                options.append(CHHelpers.OPTION_FLIPH)
+            if args.flipV:
+                options.append(CHHelpers.OPTION_FLIPV)
+            setupData = CHBatch.setupData(args.helper, args.color, args.width, lineStyles[args.style], options)
+    except Exception as e:
+        parser.error(str(e))
+
+    files = CHBatch.files(args.paths)
+    if len(files) == 0:
+        parser.error("no image found")
+
+    def progress(nbProcessed, nbFiles, fileName, outputFileName, duration, error):
+        if error is None:
+            print(f"[{nbProcessed}/{nbFiles}] {fileName} -> {outputFileName} ({duration:.2f}ms)", file=sys.stderr)
+        else:
+            print(f"[{nbProcessed}/{nbFiles}] {fileName}: ERROR {error}", file=sys.stderr)
+
+    batch = CHBatch(setupData, args.mode, args.output, args.suffix, args.jobs)
+    if batch.run(files, progress) > 0:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
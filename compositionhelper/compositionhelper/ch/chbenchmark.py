@@ -0,0 +1,300 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The chbenchmark module provides a headless benchmark for helpers geometry and
+# rendering
+#
+# Benchmark doesn't need Krita and can be executed with an offscreen Qt
+# platform; from directory containing plugin directory:
+#
+#   python -m compositionhelper.ch.chbenchmark --iterations 10 --output results.json
+#
+# For each helper and each combination of available geometry options, measure:
+# - geometry: geometry computation (without cache)
+# - path: painter path build from geometry
+# - raster: rendering in a QImage (icon, preview and document sizes) with a
+#           cold cache and with a warm cache
+# - svg: rendering in a SVG document with QSvgGenerator
+# - svgWriter: SVG document built with CHSvgWriter
+#
+# User interface rendering is also measured (if a QApplication is available):
+# - lineIcon: CHMainWindow.buildLineIcon(), for each line style
+# - helperIcon: CHMainWindow.buildHelperIcon(), for each helper
+# - viewerPreview: setup preview in WCHViewer (preview size), for each helper
+#                  and each combination of available geometry options
+#
+# Results are returned as JSON
+# -----------------------------------------------------------------------------
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+
+if sys.platform != 'win32' and 'QT_QPA_PLATFORM' not in os.environ:
+    # no display is needed
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+
+from PyQt5.Qt import *
+
+try:
+    from PyQt5.QtSvg import QSvgGenerator
+    QTSVG_AVAILABLE = True
+except Exception:
+    QTSVG_AVAILABLE = False
+
+from .chhelpers import CHHelpersDef
+from .chgeometry import CHGeometry
+from .chrenderer import CHRenderer
+from .chsvg import CHSvgWriter
+from .chsettings import CHSettingsKey
+from .chmainwindow import (
+        CHMainWindow,
+        WCHViewer
+    )
+
+from compositionhelper.pktk.pktk import PkTk
+
+
+class CHBenchmark(object):
+    """Measure helpers geometry and rendering performances"""
+
+    # default sizes: helper icon, setup manager icon, preview, document
+    SIZES = {
+            'icon': (128, 96),
+            'setupIcon': (192, 192),
+            'preview': (800, 600),
+            'document': (4000, 3000)
+        }
+
+    def __init__(self, iterations=10, helpers=None, sizes=None):
+        self.__iterations = max(1, iterations)
+
+        if helpers is None:
+            self.__helpers = list(CHHelpersDef.HELPERS.keys())
+        else:
+            self.__helpers = [helperId for helperId in helpers if helperId in CHHelpersDef.HELPERS]
+
+        if sizes is None:
+            self.__sizes = CHBenchmark.SIZES
+        else:
+            self.__sizes = sizes
+
+        self.__pen = QPen(QColor(Qt.black))
+        self.__pen.setWidthF(2)
+
+    def __measure(self, callback, *args):
+        """Execute `callback` for defined number of iterations
+
+        Return a dictionary with durations statistics (in milliseconds)
+        """
+        durations = []
+        for iteration in range(self.__iterations):
+            startTime = time.perf_counter()
+            callback(*args)
+            durations.append(1000 * (time.perf_counter() - startTime))
+
+        durations.sort()
+        return {'iterations': self.__iterations,
+                'total': sum(durations),
+                'mean': sum(durations) / self.__iterations,
+                'median': durations[self.__iterations // 2],
+                'min': durations[0],
+                'max': durations[-1]
+                }
+
+    def __optionsCombinations(self, helperId):
+        """Return all combinations of geometry options for `helperId`"""
+        available = [option for option in CHHelpersDef.HELPERS[helperId]['options']['available'] if option in CHGeometry.GEOMETRY_OPTIONS]
+        forced = CHHelpersDef.HELPERS[helperId]['options']['forced']
+
+        returned = []
+        for nbOptions in range(len(available) + 1):
+            for combination in itertools.combinations(available, nbOptions):
+                returned.append(list(combination) + forced)
+        return returned
+
+    def __renderRaster(self, helperId, size, options, clearCache):
+        """Render helper in a QImage"""
+        if clearCache:
+            CHGeometry.clearCache()
+            CHRenderer.clearCache()
+
+        image = QImage(size[0], size[1], QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.__pen)
+        CHRenderer.paintHelper(helperId, painter, QRectF(0, 0, size[0], size[1]), options)
+        painter.end()
+
+    def __renderSvg(self, helperId, size, options):
+        """Render helper in a SVG document"""
+        buffer = QBuffer()
+        svgGenerator = QSvgGenerator()
+        svgGenerator.setOutputDevice(buffer)
+        svgGenerator.setSize(QSize(size[0], size[1]))
+        svgGenerator.setViewBox(QRectF(0, 0, size[0], size[1]))
+        painter = QPainter(svgGenerator)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(self.__pen)
+        CHRenderer.paintHelper(helperId, painter, QRectF(0, 0, size[0], size[1]), options)
+        painter.end()
+
+    def __writeSvg(self, helperId, size, options):
+        """Build a SVG document with CHSvgWriter"""
+        svgWriter = CHSvgWriter(size[0], size[1])
+        svgWriter.addHelper(helperId, (0, 0, size[0], size[1]), options, self.__pen.color().name(QColor.HexArgb), self.__pen.widthF(), self.__pen.style())
+        svgWriter.toBytes()
+
+    def __viewerData(self, helperId, options):
+        """Return setup data for WCHViewer"""
+        return {CHSettingsKey.HELPER_LAST_USED.id(): helperId,
+                CHSettingsKey.HELPER_ADD_AS_VL.id(): True,
+                CHSettingsKey.HELPER_LINE_COLOR.id(helperId='global'): self.__pen.color().name(QColor.HexArgb),
+                CHSettingsKey.HELPER_LINE_STYLE.id(helperId='global'): self.__pen.style(),
+                CHSettingsKey.HELPER_LINE_WIDTH.id(helperId='global'): self.__pen.widthF(),
+                CHSettingsKey.HELPER_OPTIONS.id(helperId='global'): options
+                }
+
+    def __runWidgets(self, progress=None):
+        """Execute user interface rendering benchmark and return results as a dictionary"""
+        lineIcons = {}
+        for lineStyle, lineStyleName in CHMainWindow.LINE_STYLES.items():
+            lineIcons[lineStyleName] = self.__measure(CHMainWindow.buildLineIcon, lineStyle)
+
+        # preview is rendered with size of preview label
+        previewSize = self.__sizes.get('preview', CHBenchmark.SIZES['preview'])
+        viewer = WCHViewer()
+        viewer.lblPreview.setFixedSize(QSize(previewSize[0], previewSize[1]))
+
+        results = []
+        for helperId in self.__helpers:
+            if callable(progress):
+                progress(helperId)
+
+            helperIcon = self.__measure(CHMainWindow.buildHelperIcon, helperId)
+
+            for options in self.__optionsCombinations(helperId):
+                # WCHViewer.setData() render preview
+                results.append({'helperId': helperId,
+                                'options': options,
+                                'measures': {'helperIcon': helperIcon,
+                                             'viewerPreview': self.__measure(viewer.setData, self.__viewerData(helperId, options))
+                                             }
+                                })
+
+        viewer.deleteLater()
+
+        return {'previewSize': previewSize,
+                'lineIcons': lineIcons,
+                'results': results
+                }
+
+    def run(self, progress=None):
+        """Execute benchmark and return results as a dictionary
+
+        If provided, `progress` is a callable called for each helper with helper Id
+        """
+        results = []
+        startTime = time.perf_counter()
+
+        for helperId in self.__helpers:
+            if callable(progress):
+                progress(helperId)
+
+            for options in self.__optionsCombinations(helperId):
+                for sizeName, size in self.__sizes.items():
+                    measures = {
+                            'geometry': self.__measure(CHGeometry, helperId, size[0], size[1], options),
+                            'path': self.__measure(CHRenderer.buildGeometryPath, CHGeometry(helperId, size[0], size[1], options)),
+                            'rasterCold': self.__measure(self.__renderRaster, helperId, size, options, True),
+                            'rasterWarm': self.__measure(self.__renderRaster, helperId, size, options, False)
+                        }
+                    if QTSVG_AVAILABLE:
+                        measures['svg'] = self.__measure(self.__renderSvg, helperId, size, options)
+                    measures['svgWriter'] = self.__measure(self.__writeSvg, helperId, size, options)
+
+                    results.append({'helperId': helperId,
+                                    'options': options,
+                                    'size': sizeName,
+                                    'width': size[0],
+                                    'height': size[1],
+                                    'primitives': len(CHGeometry.get(helperId, size[0], size[1], options).primitives()),
+                                    'measures': measures
+                                    })
+
+        if isinstance(QCoreApplication.instance(), QApplication):
+            widgets = self.__runWidgets(progress)
+        else:
+            # widgets can't be created
+            widgets = None
+
+        return {'environment': {'python': platform.python_version(),
+                                'qt': QT_VERSION_STR,
+                                'pyqt': PYQT_VERSION_STR,
+                                'platform': platform.platform(),
+                                'qpa': QGuiApplication.platformName()
+                                },
+                'parameters': {'iterations': self.__iterations,
+                               'sizes': self.__sizes
+                               },
+                'duration': 1000 * (time.perf_counter() - startTime),
+                'results': results,
+                'widgets': widgets
+                }
+
+
+def main(argv=None):
+    """Execute benchmark from command line"""
+    parser = argparse.ArgumentParser(description="Composition Helper - helpers geometry and rendering benchmark")
+    parser.add_argument('-i', '--iterations', type=int, default=10, help="number of iterations for each measure (default: 10)")
+    parser.add_argument('-H', '--helper', action='append', dest='helpers', choices=list(CHHelpersDef.HELPERS.keys()), help="helper to benchmark (default: all)")
+    parser.add_argument('-s', '--size', action='append', dest='sizes', metavar='NAME=WxH', help="size to benchmark (default: icon, preview and document sizes)")
+    parser.add_argument('-o', '--output', default=None, help="JSON output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    sizes = None
+    if args.sizes:
+        sizes = {}
+        for size in args.sizes:
+            try:
+                name, dimensions = size.split('=')
+                width, height = dimensions.lower().split('x')
+                sizes[name] = (int(width), int(height))
+            except ValueError:
+                parser.error(f"invalid size: {size}")
+
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv[:1])
+
+    # needed to load user interface files, as done by plugin
+    PkTk.setPackageName('compositionhelper')
+
+    benchmark = CHBenchmark(args.iterations, args.helpers, sizes)
+    results = benchmark.run(lambda helperId: print(f"Benchmark: {helperId}", file=sys.stderr))
+
+    if args.output:
+        with open(args.output, 'w') as fHandle:
+            json.dump(results, fHandle, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
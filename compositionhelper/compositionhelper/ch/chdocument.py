@@ -0,0 +1,458 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The chdocument module provides documents abstraction used by Composition
+# Helper
+#
+# Main classes from this module
+#
+# - CHDocument:
+#       Document interface (size, selection, projection, layers)
+#
+# - CHKritaDocument:
+#       Krita document implementation
+#
+# - CHMemoryDocument:
+#       In memory document implementation (QImage based), doesn't need Krita
+#
+# - CHDocumentProvider:
+#       Provides active document interface
+#
+# - CHKritaDocumentProvider, CHMemoryDocumentProvider:
+#       Krita and in memory documents provider implementations
+#
+# Krita modules are imported only when Krita implementations are used
+# -----------------------------------------------------------------------------
+
+from abc import (
+        ABC,
+        abstractmethod
+    )
+
+from PyQt5.Qt import *
+
+try:
+    from PyQt5.QtSvg import QSvgRenderer
+    QTSVG_AVAILABLE = True
+except Exception:
+    QTSVG_AVAILABLE = False
+
+from compositionhelper.pktk import *
+
+
+class CHDocument(ABC):
+    """A document on which composition helpers are added"""
+
+    @abstractmethod
+    def width(self):
+        """Return document width"""
+
+    @abstractmethod
+    def height(self):
+        """Return document height"""
+
+    def size(self):
+        """Return document size (QSize)"""
+        return QSize(self.width(), self.height())
+
+    @abstractmethod
+    def resolution(self):
+        """Return document resolution (pixels per inch)"""
+
+    @abstractmethod
+    def selection(self):
+        """Return document selection bounds (QRect) or None if there's no selection"""
+
+    def refreshProjection(self):
+        """Ensure that projection is up to date"""
+        pass
+
+    @abstractmethod
+    def projection(self, maxSize=None):
+        """Return document projection as a QImage
+
+        If `maxSize` (QSize) is provided and document is greater than given size,
+        returned image is a downscaled projection (aspect ratio is kept)
+        """
+
+    @abstractmethod
+    def groupLayer(self, name):
+        """Return group layer for given `name`
+
+        If group layer doesn't exist, it's created at top of layers stack
+        """
+
+    @abstractmethod
+    def addRasterLayer(self, groupLayer, name, tiles):
+        """Add a raster layer `name` in `groupLayer`
+
+        Layer content is provided by `tiles`, an iterable of tuples (QRect, QImage)
+
+        Return added layer
+        """
+
+    @abstractmethod
+    def addVectorLayer(self, groupLayer, name, svgContent):
+        """Add a vector layer `name` in `groupLayer`
+
+        Layer content is provided by `svgContent` (SVG document as bytes or str)
+
+        Return added layer
+        """
+
+    def waitForLayers(self, layers, timeout=1000):
+        """Wait until given `layers` are available in document, for a maximum of `timeout` milliseconds
+
+        Return True if all layers are available, otherwise False
+        """
+        return True
+
+
+class CHKritaDocument(CHDocument):
+    """A Krita document"""
+
+    def __init__(self, document):
+        # import here to let module being used without Krita
+        from compositionhelper.pktk.modules.ekrita import (EKritaDocument, EKritaNode)
+
+        self.__document = document
+        self.__eKritaDocument = EKritaDocument
+        self.__eKritaNode = EKritaNode
+
+    def document(self):
+        """Return Krita document"""
+        return self.__document
+
+    def width(self):
+        """Return document width"""
+        return self.__document.width()
+
+    def height(self):
+        """Return document height"""
+        return self.__document.height()
+
+    def resolution(self):
+        """Return document resolution (pixels per inch)"""
+        return self.__document.xRes()
+
+    def selection(self):
+        """Return document selection bounds (QRect) or None if there's no selection"""
+        if (selection := self.__document.selection()) is not None:
+            return QRect(selection.x(), selection.y(), selection.width(), selection.height())
+        return None
+
+    def refreshProjection(self):
+        """Ensure that projection is up to date"""
+        self.__document.refreshProjection()
+
+    def projection(self, maxSize=None):
+        """Return document projection as a QImage"""
+        return self.__eKritaDocument.projection(self.__document, maxSize)
+
+    def groupLayer(self, name):
+        """Return group layer for given `name`"""
+        returned = self.__eKritaDocument.findFirstLayerByName(self.__document, name)
+
+        if returned is None:
+            # doesn't exist, create a new one
+            returned = self.__document.createGroupLayer(name)
+            self.__document.rootNode().addChildNode(returned, None)
+
+        return returned
+
+    def addRasterLayer(self, groupLayer, name, tiles):
+        """Add a raster layer `name` in `groupLayer`"""
+        returned = self.__document.createNode(name, "paintLayer")
+        self.__eKritaNode.fromQImageTiles(returned, tiles, True)
+        groupLayer.addChildNode(returned, None)
+        return returned
+
+    def addVectorLayer(self, groupLayer, name, svgContent):
+        """Add a vector layer `name` in `groupLayer`"""
+        returned = self.__document.createVectorLayer(name)
+        self.__eKritaNode.fromSVG(returned, svgContent, self.__document)
+        groupLayer.addChildNode(returned, None)
+        return returned
+
+    def waitForLayers(self, layers, timeout=1000):
+        """Wait until given `layers` are available and rendered in document projection"""
+        return self.__eKritaDocument.waitForNodes(self.__document, layers, timeout)
+
+
+class CHMemoryLayer(object):
+    """A layer from an in memory document"""
+    TYPE_GROUP = 'grouplayer'
+    TYPE_RASTER = 'paintlayer'
+    TYPE_VECTOR = 'vectorlayer'
+
+    def __init__(self, name, type, parent=None):
+        self.__name = name
+        self.__type = type
+        self.__parent = parent
+        self.__children = []
+        self.__tiles = []
+        self.__svgContent = None
+
+        if parent is not None:
+            parent.addChild(self)
+
+    def __repr__(self):
+        return f"<CHMemoryLayer({self.__type}, '{self.__name}', {len(self.__children)} children)>"
+
+    def name(self):
+        """Return layer name"""
+        return self.__name
+
+    def type(self):
+        """Return layer type"""
+        return self.__type
+
+    def parent(self):
+        """Return parent layer"""
+        return self.__parent
+
+    def children(self):
+        """Return children layers"""
+        return list(self.__children)
+
+    def addChild(self, layer):
+        """Add given `layer` at top of children layers"""
+        self.__children.append(layer)
+
+    def tiles(self):
+        """Return raster layer content as a list of tuples (QRect, QImage)"""
+        return list(self.__tiles)
+
+    def setTiles(self, tiles):
+        """Set raster layer content from an iterable of tuples (QRect, QImage)"""
+        self.__tiles = [(QRect(rect), image) for rect, image in tiles]
+
+    def svgContent(self):
+        """Return vector layer content (SVG document as bytes)"""
+        return self.__svgContent
+
+    def setSvgContent(self, svgContent):
+        """Set vector layer content"""
+        if isinstance(svgContent, str):
+            svgContent = svgContent.encode()
+        self.__svgContent = svgContent
+
+    def paint(self, painter, size):
+        """Paint layer content (and children layers) with given `painter`
+
+        Given `size` is document size
+        """
+        if self.__type == CHMemoryLayer.TYPE_RASTER:
+            for rect, image in self.__tiles:
+                painter.drawImage(rect.topLeft(), image)
+        elif self.__type == CHMemoryLayer.TYPE_VECTOR:
+            if QTSVG_AVAILABLE and self.__svgContent:
+                QSvgRenderer(QByteArray(self.__svgContent)).render(painter, QRectF(0, 0, size.width(), size.height()))
+
+        for child in self.__children:
+            child.paint(painter, size)
+
+
+class CHMemoryDocument(CHDocument):
+    """An in memory document
+
+    Document content is defined by a background image, on which layers are added
+    """
+
+    def __init__(self, image=None, size=None, resolution=300.0):
+        if image is None:
+            if not isinstance(size, QSize) or not size.isValid():
+                raise EInvalidValue("When no `image` is provided, given `size` must be a valid <QSize>")
+            image = QImage(size, QImage.Format_ARGB32_Premultiplied)
+            image.fill(Qt.white)
+        elif not isinstance(image, QImage):
+            raise EInvalidType("Given `image` must be a <QImage>")
+
+        self.__image = image
+        self.__resolution = resolution
+        self.__selection = None
+        self.__rootLayer = CHMemoryLayer('root', CHMemoryLayer.TYPE_GROUP)
+        self.__projection = None
+
+    def image(self):
+        """Return document background image"""
+        return self.__image
+
+    def rootLayer(self):
+        """Return root layer"""
+        return self.__rootLayer
+
+    def width(self):
+        """Return document width"""
+        return self.__image.width()
+
+    def height(self):
+        """Return document height"""
+        return self.__image.height()
+
+    def resolution(self):
+        """Return document resolution (pixels per inch)"""
+        return self.__resolution
+
+    def selection(self):
+        """Return document selection bounds (QRect) or None if there's no selection"""
+        return self.__selection
+
+    def setSelection(self, selection):
+        """Set document selection bounds (QRect), or None to remove selection"""
+        if selection is None or isinstance(selection, QRect) and selection.isValid():
+            self.__selection = selection
+        else:
+            raise EInvalidType("Given `selection` must be a valid <QRect> or None")
+
+    def refreshProjection(self):
+        """Ensure that projection is up to date"""
+        self.__projection = QImage(self.__image.size(), QImage.Format_ARGB32_Premultiplied)
+        self.__projection.fill(Qt.transparent)
+        painter = QPainter(self.__projection)
+        painter.drawImage(0, 0, self.__image)
+        self.__rootLayer.paint(painter, self.__image.size())
+        painter.end()
+
+    def projection(self, maxSize=None):
+        """Return document projection as a QImage"""
+        if self.__projection is None:
+            self.refreshProjection()
+
+        if maxSize is None or not maxSize.isValid() or (self.width() <= maxSize.width() and self.height() <= maxSize.height()):
+            return self.__projection
+        return self.__projection.scaled(maxSize, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    def groupLayer(self, name):
+        """Return group layer for given `name`"""
+        for layer in self.__rootLayer.children():
+            if layer.type() == CHMemoryLayer.TYPE_GROUP and layer.name() == name:
+                return layer
+        return CHMemoryLayer(name, CHMemoryLayer.TYPE_GROUP, self.__rootLayer)
+
+    def addRasterLayer(self, groupLayer, name, tiles):
+        """Add a raster layer `name` in `groupLayer`"""
+        returned = CHMemoryLayer(name, CHMemoryLayer.TYPE_RASTER, groupLayer)
+        returned.setTiles(tiles)
+        self.__projection = None
+        return returned
+
+    def addVectorLayer(self, groupLayer, name, svgContent):
+        """Add a vector layer `name` in `groupLayer`"""
+        returned = CHMemoryLayer(name, CHMemoryLayer.TYPE_VECTOR, groupLayer)
+        returned.setSvgContent(svgContent)
+        self.__projection = None
+        return returned
+
+
+class CHDocumentProvider(ABC):
+    """Provides active document"""
+
+    @abstractmethod
+    def activeDocument(self):
+        """Return active document (CHDocument) or None if there's no active document"""
+
+    def parentWindow(self):
+        """Return window to use as parent for plugin dialog, or None"""
+        return None
+
+    def viewsCount(self):
+        """Return number of opened views"""
+        return 0 if self.activeDocument() is None else 1
+
+    def connectActiveViewChanged(self, callback):
+        """Connect `callback` to be called when active view (and then maybe active document) has changed"""
+        pass
+
+    def disconnectActiveViewChanged(self, callback):
+        """Disconnect `callback` previously connected with connectActiveViewChanged()"""
+        pass
+
+
+class CHKritaDocumentProvider(CHDocumentProvider):
+    """Provides active Krita document"""
+
+    def __init__(self):
+        # import here to let module being used without Krita
+        from krita import Krita
+
+        self.__krita = Krita.instance()
+        self.__window = self.__krita.activeWindow()
+
+    def activeDocument(self):
+        """Return active document (CHDocument) or None if there's no active document"""
+        document = self.__krita.activeDocument()
+        if document is None:
+            return None
+        return CHKritaDocument(document)
+
+    def parentWindow(self):
+        """Return window to use as parent for plugin dialog, or None"""
+        if self.__window is None:
+            return None
+        return self.__window.qwindow()
+
+    def viewsCount(self):
+        """Return number of opened views"""
+        if self.__window is None:
+            return 0
+        return len(self.__window.views())
+
+    def connectActiveViewChanged(self, callback):
+        """Connect `callback` to be called when active view has changed"""
+        self.__krita.notifier().viewClosed.connect(callback)
+        if self.__window is not None:
+            self.__window.activeViewChanged.connect(callback)
+
+    def disconnectActiveViewChanged(self, callback):
+        """Disconnect `callback` previously connected with connectActiveViewChanged()"""
+        try:
+            if self.__window is not None:
+                self.__window.activeViewChanged.disconnect(callback)
+        except Exception:
+            pass
+        try:
+            self.__krita.notifier().viewClosed.disconnect(callback)
+        except Exception:
+            pass
+
+
+class CHMemoryDocumentProvider(CHDocumentProvider):
+    """Provides an in memory document"""
+
+    def __init__(self, document=None):
+        self.__document = None
+        self.__callbacks = []
+        self.setActiveDocument(document)
+
+    def activeDocument(self):
+        """Return active document (CHDocument) or None if there's no active document"""
+        return self.__document
+
+    def setActiveDocument(self, document):
+        """Set active document (CHDocument or None)"""
+        if document is not None and not isinstance(document, CHDocument):
+            raise EInvalidType("Given `document` must be a <CHDocument> or None")
+
+        if document != self.__document:
+            self.__document = document
+            for callback in self.__callbacks:
+                callback()
+
+    def connectActiveViewChanged(self, callback):
+        """Connect `callback` to be called when active document has changed"""
+        self.__callbacks.append(callback)
+
+    def disconnectActiveViewChanged(self, callback):
+        """Disconnect `callback` previously connected with connectActiveViewChanged()"""
+        if callback in self.__callbacks:
+            self.__callbacks.remove(callback)
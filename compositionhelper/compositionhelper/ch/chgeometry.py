@@ -0,0 +1,485 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The chgeometry module provides helpers geometry calculation
+#
+# Geometry is calculated as a list of primitives (lines, rectangles, paths)
+# without any dependency to Qt, then renderers (QPainter, ...) only have to
+# draw returned primitives
+#
+# Primitives coordinates are always relative to (0, 0): renderer have to
+# apply rect area offset if needed
+# -----------------------------------------------------------------------------
+
+import math
+
+from .chhelpers import CHHelpers
+
+from compositionhelper.pktk.modules.lrucache import LRUCache
+
+# Define Golden number value
+PHI = 1.61803398875
+
+
+class CHGeometryPrimitive(object):
+    """Base class for geometry primitives
+
+    Primitives are immutable
+    """
+    TYPE_LINE = 'line'
+    TYPE_RECT = 'rect'
+    TYPE_PATH = 'path'
+
+    def __init__(self, type):
+        self.__type = type
+
+    def type(self):
+        """Return primitive type"""
+        return self.__type
+
+
+class CHGeometryLine(CHGeometryPrimitive):
+    """A line, from (x1, y1) to (x2, y2)"""
+
+    def __init__(self, x1, y1, x2, y2):
+        super(CHGeometryLine, self).__init__(CHGeometryPrimitive.TYPE_LINE)
+        self.__points = (x1, y1, x2, y2)
+
+    def __repr__(self):
+        return f"<CHGeometryLine({self.__points[0]}, {self.__points[1]}, {self.__points[2]}, {self.__points[3]})>"
+
+    def points(self):
+        """Return line coordinates as a tuple (x1, y1, x2, y2)"""
+        return self.__points
+
+
+class CHGeometryRect(CHGeometryPrimitive):
+    """A rectangle"""
+
+    def __init__(self, x, y, width, height):
+        super(CHGeometryRect, self).__init__(CHGeometryPrimitive.TYPE_RECT)
+        self.__rect = (x, y, width, height)
+
+    def __repr__(self):
+        return f"<CHGeometryRect({self.__rect[0]}, {self.__rect[1]}, {self.__rect[2]}, {self.__rect[3]})>"
+
+    def rect(self):
+        """Return rectangle as a tuple (x, y, width, height)"""
+        return self.__rect
+
+
+class CHGeometryPath(CHGeometryPrimitive):
+    """A path, defined from a list of segments
+
+    Each segment is a tuple for which first item define segment type:
+        (MOVE_TO, x, y)
+        (LINE_TO, x, y)
+        (ARC_TO, centerX, centerY, radius, startAngle, sweepLength)
+        (CLOSE, )
+
+    Arc angles are in degrees, using Qt conventions (counter-clockwise with
+    Y axis pointing down)
+    """
+    MOVE_TO = 'M'
+    LINE_TO = 'L'
+    ARC_TO = 'A'
+    CLOSE = 'Z'
+
+    def __init__(self, segments):
+        super(CHGeometryPath, self).__init__(CHGeometryPrimitive.TYPE_PATH)
+        self.__segments = tuple(tuple(segment) for segment in segments)
+
+    def __repr__(self):
+        return f"<CHGeometryPath({len(self.__segments)} segments)>"
+
+    def segments(self):
+        """Return path segments as a tuple of tuples"""
+        return self.__segments
+
+
+class CHGeometryTransform(object):
+    """An affine transformation, using Qt conventions (QTransform)
+
+        x' = m11*x + m21*y + dx
+        y' = m12*x + m22*y + dy
+
+    Only isometric transformations (rotation, translation, flip) are used
+    to calculate helpers geometry
+    """
+
+    def __init__(self, m11=1, m12=0, m21=0, m22=1, dx=0, dy=0):
+        self.__matrix = (m11, m12, m21, m22, dx, dy)
+
+    def __combine(self, m11, m12, m21, m22, dx, dy):
+        # return a new transformation, for which given transformation is applied first
+        a11, a12, a21, a22, adx, ady = self.__matrix
+        return CHGeometryTransform(m11*a11 + m12*a21,
+                                   m11*a12 + m12*a22,
+                                   m21*a11 + m22*a21,
+                                   m21*a12 + m22*a22,
+                                   dx*a11 + dy*a21 + adx,
+                                   dx*a12 + dy*a22 + ady)
+
+    def isIdentity(self):
+        """Return True if transformation is identity"""
+        return self.__matrix == (1, 0, 0, 1, 0, 0)
+
+    def isFlipped(self):
+        """Return True if transformation invert orientation (determinant is negative)"""
+        return (self.__matrix[0]*self.__matrix[3] - self.__matrix[1]*self.__matrix[2]) < 0
+
+    def translate(self, dx, dy):
+        """Return a new transformation with translation applied"""
+        return self.__combine(1, 0, 0, 1, dx, dy)
+
+    def scale(self, sx, sy):
+        """Return a new transformation with scale applied"""
+        return self.__combine(sx, 0, 0, sy, 0, 0)
+
+    def rotate90(self):
+        """Return a new transformation with a 90° rotation applied"""
+        return self.__combine(0, 1, -1, 0, 0, 0)
+
+    def map(self, x, y):
+        """Return mapped point (x, y) as a tuple"""
+        m11, m12, m21, m22, dx, dy = self.__matrix
+        return (m11*x + m21*y + dx, m12*x + m22*y + dy)
+
+    def mapVector(self, x, y):
+        """Return mapped vector (x, y) as a tuple (translation is ignored)"""
+        m11, m12, m21, m22, dx, dy = self.__matrix
+        return (m11*x + m21*y, m12*x + m22*y)
+
+    def mapAngle(self, angle):
+        """Return mapped angle (in degrees, Qt conventions)"""
+        if self.isIdentity():
+            return angle
+        vX, vY = self.mapVector(math.cos(math.radians(angle)), -math.sin(math.radians(angle)))
+        return math.degrees(math.atan2(-vY, vX))
+
+    def mapLine(self, x1, y1, x2, y2):
+        """Return a mapped CHGeometryLine"""
+        return CHGeometryLine(*self.map(x1, y1), *self.map(x2, y2))
+
+    def mapRect(self, x, y, width, height):
+        """Return a mapped CHGeometryRect
+
+        As only isometric transformations with 90° rotations are applied, mapped rectangle is still aligned on axis
+        """
+        x1, y1 = self.map(x, y)
+        x2, y2 = self.map(x + width, y + height)
+        return CHGeometryRect(min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1))
+
+    def mapPath(self, segments):
+        """Return a mapped CHGeometryPath"""
+        returned = []
+        sweepSign = -1 if self.isFlipped() else 1
+        for segment in segments:
+            if segment[0] in (CHGeometryPath.MOVE_TO, CHGeometryPath.LINE_TO):
+                returned.append((segment[0], *self.map(segment[1], segment[2])))
+            elif segment[0] == CHGeometryPath.ARC_TO:
+                returned.append((segment[0], *self.map(segment[1], segment[2]), segment[3], self.mapAngle(segment[4]), sweepSign * segment[5]))
+            else:
+                returned.append(segment)
+        return CHGeometryPath(returned)
+
+
+class CHGeometry(object):
+    """Calculate and store geometry for a helper
+
+    Geometry is immutable, and cached: use `CHGeometry.get()` to retrieve it
+    """
+    # options that have an impact on geometry
+    GEOMETRY_OPTIONS = (CHHelpers.OPTION_FLIPH, CHHelpers.OPTION_FLIPV, CHHelpers.OPTION_FORCE_GR)
+
+    __cache = LRUCache(256)
+
+    @staticmethod
+    def key(helperId, width, height, options=None):
+        """Return cache key for given helper, size and options"""
+        if options is None:
+            options = []
+        return (helperId, width, height, tuple(option for option in CHGeometry.GEOMETRY_OPTIONS if option in options))
+
+    @staticmethod
+    def get(helperId, width, height, options=None):
+        """Return geometry (CHGeometry) for `helperId`, for given size and options
+
+        If geometry has already been calculated, it's returned from cache
+        """
+        key = CHGeometry.key(helperId, width, height, options)
+        returned = CHGeometry.__cache.get(key)
+        if returned is None:
+            returned = CHGeometry(helperId, width, height, key[3])
+            CHGeometry.__cache.set(key, returned)
+        return returned
+
+    @staticmethod
+    def clearCache():
+        """Clear geometry cache"""
+        CHGeometry.__cache.clear()
+
+    @staticmethod
+    def cacheStats():
+        """Return geometry cache statistics"""
+        return CHGeometry.__cache.stats()
+
+    @staticmethod
+    def goldenPosition(rect, fromStartSide=True):
+        """Return coordinates to use for golden spiral, from given `rect` (x, y, width, height)
+
+        Returned value is a tuple (point1, point2, rect) in which
+        - point1 and point2 (x, y) define golden section for rect
+        - rect (x, y, width, height) define remaining area
+        """
+        x, y, w, h = rect
+        if w > h:
+            if fromStartSide:
+                return ((x + h, y), (x + h, y + h), (x + h, y, w - h, h))
+            else:
+                pX = x + w - h
+                return ((pX, y + h), (pX, y), (x, y, pX - x, h))
+        else:
+            if fromStartSide:
+                return ((x + w, y + w), (x, y + w), (x, y + w, w, h - w))
+            else:
+                pY = y + h - w
+                return ((x, pY), (x + w, pY), (x, y, w, pY - y))
+
+    def __init__(self, helperId, width, height, options=None):
+        if options is None:
+            options = []
+
+        self.__helperId = helperId
+        self.__width = width
+        self.__height = height
+        self.__options = tuple(option for option in CHGeometry.GEOMETRY_OPTIONS if option in options)
+        self.__primitives = self.__calculate()
+
+    def __repr__(self):
+        return f"<CHGeometry({self.__helperId}, {self.__width}, {self.__height}, {self.__options}, {len(self.__primitives)} primitives)>"
+
+    def __calculate(self):
+        """Calculate primitives for helper"""
+        if self.__width <= 0 or self.__height <= 0:
+            # nothing to draw
+            return tuple()
+
+        # lines/rect/path to draw, in transformed coordinates
+        lines = []
+        rects = []
+        paths = []
+
+        options = self.__options
+        transform = CHGeometryTransform()
+
+        # w, h => easier to read in code
+        w = self.__width
+        h = self.__height
+        nW = w
+        nH = h
+        oX = 0
+        oY = 0
+
+        if h > w:
+            # When height is greater than width, just apply a transformation, don't try to define
+            # new calculation ( -- lazy mode ^_^' -- )
+            h, w = w, h
+            nH, nW = nW, nH
+            transform = transform.rotate90().translate(0, -nH)
+
+            # due to rotation, need to invert flip V/H
+            nOptions = []
+            if CHHelpers.OPTION_FLIPH in options:
+                nOptions.append(CHHelpers.OPTION_FLIPV)
+            if CHHelpers.OPTION_FLIPV in options:
+                nOptions.append(CHHelpers.OPTION_FLIPH)
+            if CHHelpers.OPTION_FORCE_GR in options:
+                nOptions.append(CHHelpers.OPTION_FORCE_GR)
+            options = nOptions
+
+        if CHHelpers.OPTION_FORCE_GR in options:
+            # Force to respect golden ratio
+            # calculate new width/height + offset for constrained golden ratio
+            if (w/h) >= PHI:
+                nW = h * PHI
+                nH = h
+                oX += (w - nW)/2
+            else:
+                nW = w
+                nH = w / PHI
+                oY += (h - nH)/2
+
+        if oX != 0 or oY != 0:
+            transform = transform.translate(oX, oY)
+
+        scaleX = -1 if CHHelpers.OPTION_FLIPH in options else 1
+        scaleY = -1 if CHHelpers.OPTION_FLIPV in options else 1
+
+        if scaleX != 1 or scaleY != 1:
+            transform = transform.scale(scaleX, scaleY).translate(-nW if scaleX != 1 else 0, -nH if scaleY != 1 else 0)
+
+        helper = self.__helperId
+        if helper == CHHelpers.RULE_OF_THIRD:
+            pX = nW/3
+            pY = nH/3
+            lines.append((pX, 0, pX, nH))
+            lines.append((nW - pX, 0, nW - pX, nH))
+
+            lines.append((0, pY, nW, pY))
+            lines.append((0, nH - pY, nW, nH - pY))
+        elif helper == CHHelpers.GOLDEN_RECTANGLE:
+            rects.append((0, 0, nW, nH))
+        elif helper == CHHelpers.GOLDEN_SECTION:
+            pX = nW/(1+PHI)
+            pY = nH/(1+PHI)
+
+            lines.append((pX, 0, pX, nH))
+            lines.append((nW - pX, 0, nW - pX, nH))
+
+            lines.append((0, pY, nW, pY))
+            lines.append((0, nH - pY, nW, nH - pY))
+        elif helper == CHHelpers.GOLDEN_SPIRAL:
+            # start spiral path
+            spiralPath = [(CHGeometryPath.MOVE_TO, 0, 0)]
+
+            # fromStart is used to determinate from which side golden section have to be calculated
+            fromStart = 1
+            startAngle = 180
+            r = CHGeometry.goldenPosition((0, 0, nW, nH), True)
+
+            # arbitrary define 8 sections...
+            for number in range(8):
+                # radius for spiral arc
+                radius = abs(r[0][1] - r[1][1]) + abs(r[0][0] - r[1][0])
+                spiralPath.append((CHGeometryPath.ARC_TO, r[0][0], r[0][1], radius, startAngle, 90))
+
+                # prepare next arc/golden section
+                fromStart += 1
+                startAngle += 90
+                if fromStart >= 4:
+                    fromStart = 0
+                elif fromStart == 1:
+                    startAngle = 180
+                r = CHGeometry.goldenPosition(r[2], (fromStart <= 1))
+            paths.append(spiralPath)
+        elif helper == CHHelpers.GOLDEN_SPIRAL_SECTION:
+            # fromStart is used to determinate from which side golden section have to be calculated
+            fromStart = 1
+            r = CHGeometry.goldenPosition((0, 0, nW, nH), True)
+
+            # arbitrary define 8 sections...
+            for number in range(8):
+                lines.append((*r[0], *r[1]))
+
+                # prepare next arc/golden section
+                fromStart += 1
+                if fromStart >= 4:
+                    fromStart = 0
+                r = CHGeometry.goldenPosition(r[2], (fromStart <= 1))
+        elif helper == CHHelpers.GOLDEN_TRIANGLES:
+            lines.append((0, 0, nW, nH))
+            pX = nW/(1+PHI)
+
+            lines.append((0, nH, pX, 0))
+            lines.append((nW, 0, nW - pX, nH))
+        elif helper == CHHelpers.GOLDEN_DIAGONALS:
+            dX = nW - nH
+            lines.append((0, 0, nH, nH))
+            lines.append((0, nH, nH, 0))
+
+            lines.append((dX, 0, dX + nH, nH))
+            lines.append((dX, nH, dX + nH, 0))
+        elif helper == CHHelpers.BASIC_CROSS:
+            mX = nW/2
+            mY = nH/2
+            lines.append((mX, 0, mX, nH))
+            lines.append((0, mY, nW, mY))
+        elif helper == CHHelpers.BASIC_DIAGONALS:
+            lines.append((0, 0, nW, nH))
+            lines.append((0, nH, nW, 0))
+        elif helper == CHHelpers.BASIC_DIAMOND:
+            pX = nW/2
+            pY = nH/2
+
+            paths.append([(CHGeometryPath.MOVE_TO, 0, pY),
+                          (CHGeometryPath.LINE_TO, pX, 0),
+                          (CHGeometryPath.LINE_TO, nW, pY),
+                          (CHGeometryPath.LINE_TO, pX, nH),
+                          (CHGeometryPath.CLOSE, )])
+        elif helper == CHHelpers.BASIC_QUARTERS:
+            pX = nW/4
+            pY = nH/4
+
+            lines.append((pX, 0, pX, nH))
+            lines.append((nW - pX, 0, nW - pX, nH))
+
+            lines.append((0, pY, nW, pY))
+            lines.append((0, nH - pY, nW, nH - pY))
+        elif helper in (CHHelpers.DYNAMIC_SYMMETRY, CHHelpers.DYNAMIC_SYMMETRY_GS):
+            if helper == CHHelpers.DYNAMIC_SYMMETRY:
+                # rule of third
+                tmpX = nW/3
+                pY = 2*nH/3
+            else:
+                # golden section
+                tmpX = nW/(1+PHI)
+                pY = nH - nH/(1+PHI)
+            coeff = pY/tmpX
+            pX = nH/coeff
+
+            lines.append((0, 0, pX, nH))
+            lines.append((0, nH, pX, 0))
+
+            lines.append((nW, 0, nW - pX, nH))
+            lines.append((nW, nH, nW - pX, 0))
+        elif helper in (CHHelpers.RECIPROCAL_LINES, CHHelpers.RECIPROCAL_LINES_GS):
+            if helper == CHHelpers.RECIPROCAL_LINES:
+                # rule of third
+                pX = nW/3
+            else:
+                # golden section
+                pX = nW/(1+PHI)
+
+            lines.append((0, 0, pX, nH))
+            lines.append((0, nH, pX, 0))
+
+            lines.append((nW, 0, nW - pX, nH))
+            lines.append((nW, nH, nW - pX, 0))
+
+        return tuple([transform.mapRect(*rect) for rect in rects] +
+                     [transform.mapPath(path) for path in paths] +
+                     [transform.mapLine(*line) for line in lines])
+
+    def helperId(self):
+        """Return helper Id"""
+        return self.__helperId
+
+    def width(self):
+        """Return width used to calculate geometry"""
+        return self.__width
+
+    def height(self):
+        """Return height used to calculate geometry"""
+        return self.__height
+
+    def options(self):
+        """Return options used to calculate geometry, as a tuple"""
+        return self.__options
+
+    def primitives(self):
+        """Return primitives (tuple of CHGeometryPrimitive)"""
+        return self.__primitives
+
+    def lines(self):
+        """Return lines primitives only (tuple of CHGeometryLine)"""
+        return tuple(primitive for primitive in self.__primitives if primitive.type() == CHGeometryPrimitive.TYPE_LINE)
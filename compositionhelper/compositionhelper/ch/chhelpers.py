@@ -9,6 +9,9 @@
 # A Krita plugin designed to add composition helper in documents
 # -----------------------------------------------------------------------------
 
+from compositionhelper.pktk.pktk import i18n
+
+
 class CHHelpers:
     GOLDEN_RECTANGLE = 'goldrect'
     GOLDEN_SPIRAL = 'goldspi'
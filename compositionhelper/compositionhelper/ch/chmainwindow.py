@@ -12,7 +12,6 @@
 import locale
 import os
 import sys
-from krita import Krita
 
 import PyQt5.uic
 
@@ -22,14 +21,6 @@ from PyQt5.QtWidgets import (
         QWidget
     )
 
-try:
-    from PyQt5.QtSvg import *
-    QTSVG_AVAILABLE = True
-except Exception:
-    # vector layer won't be an option...
-    QTSVG_AVAILABLE = False
-
-
 from .chhelpers import (
         CHHelpers,
         CHHelpersDef
@@ -40,27 +31,26 @@ from .chsettings import (
         CHSettingsKey
     )
 
+from .chrenderer import CHRenderer
+from .chsvg import CHSvgWriter
+from .chdocument import CHKritaDocumentProvider
+
 from compositionhelper.pktk.modules.uitheme import UITheme
 from compositionhelper.pktk.modules.utils import loadXmlUi
-from compositionhelper.pktk.modules.timeutils import Timer
+from compositionhelper.pktk.modules.workers import WorkerCoalescing
 from compositionhelper.pktk.modules.imgutils import (
         checkerBoardBrush,
-        buildIcon
-        )
-from compositionhelper.pktk.modules.ekrita import (
-        EKritaDocument,
-        EKritaNode
+        buildIcon,
+        QImagePyramid
         )
 from compositionhelper.pktk.widgets.wabout import WAboutWindow
 from compositionhelper.pktk.widgets.wsetupmanager import (
         WSetupManager,
         SetupManagerSetup
         )
+from compositionhelper.pktk.pktk import i18n
 from compositionhelper.pktk import *
 
-# Define Golden number value
-PHI = 1.61803398875
-
 
 # -----------------------------------------------------------------------------
 class WCHViewer(QWidget):
@@ -146,8 +136,9 @@ class CHMainWindow(QDialog):
             Qt.DashDotDotLine: i18n('Dash-Dot-Dot')
         }
 
-    # default group layers name
+    # default group layers name, and max time (in ms) to wait for added layers
     __LAYER_GROUP = 'CH# Composition Helpers'
+    __LAYER_WAIT_TIMEOUT = 1000
 
     ICON_SIZE_LINESTYLE = QSize(48, 12)
     ICON_SIZE_HELPER = QSize(128, 96)
@@ -198,264 +189,18 @@ class CHMainWindow(QDialog):
 
     @staticmethod
     def paintHelper(helper, painter, rectArea, options=None):
-        """Paint `helper` on `painter`, using given `size`
+        """Paint `helper` on `painter`, using given `rectArea`
 
         Consider that paint surface is initialised as well as the painter pen
         """
-        def getGoldenPosition(rect, fromStartSide=True):
-            # return coordinates (as QRectF) to use for golden spiral
-            if rect.width() > rect.height():
-                if fromStartSide:
-                    return (
-                        QPointF(rect.left() + rect.height(), rect.top()),
-                        QPointF(rect.left() + rect.height(), rect.bottom()),
-                        QRectF(QPointF(rect.left() + rect.height(), rect.top()), QPointF(rect.right(), rect.bottom()))
-                    )
-                else:
-                    pX = rect.left() + rect.width() - rect.height()
-                    return (
-                        QPointF(pX, rect.bottom()),
-                        QPointF(pX, rect.top()),
-                        QRectF(QPointF(rect.left(), rect.top()), QPointF(pX, rect.bottom()))
-                    )
-            else:
-                if fromStartSide:
-                    return (
-                        QPointF(rect.right(), rect.top() + rect.width()),
-                        QPointF(rect.left(), rect.top() + rect.width()),
-                        QRectF(QPointF(rect.left(), rect.top() + rect.width()), QPointF(rect.right(), rect.bottom()))
-                    )
-                else:
-                    pY = rect.top() + rect.height() - rect.width()
-                    return (
-                        QPointF(rect.left(), pY),
-                        QPointF(rect.right(), pY),
-                        QRectF(QPointF(rect.left(), rect.top()), QPointF(rect.right(), pY))
-                    )
-
-        if options is None:
-            options = []
-
-        # save current painter transformations state
-        painter.save()
-
-        # lines to draw
-        lines = []
-
-        # w, h => easier to read in code
-        w = rectArea.width()
-        h = rectArea.height()
-        nW = w
-        nH = h
-        oX = rectArea.x()
-        oY = rectArea.y()
-        scaleX = 1
-        scaleY = 1
-
-        if h > w:
-            # When height is greater than width, just apply a transformation, don't try to define
-            # new calculation ( -- lazy mode ^_^' -- )
-            h, w = w, h
-            nH, nW = nW, nH
-            oX, oY = oY, -oX
-            painter.rotate(90)
-            painter.translate(0, -nH)
-
-            # due to rotation, need to invert flip V/H
-            nOptions = []
-            if CHHelpers.OPTION_FLIPH in options:
-                nOptions.append(CHHelpers.OPTION_FLIPV)
-            if CHHelpers.OPTION_FLIPV in options:
-                nOptions.append(CHHelpers.OPTION_FLIPH)
-            if CHHelpers.OPTION_FORCE_GR in options:
-                nOptions.append(CHHelpers.OPTION_FORCE_GR)
-            options = nOptions
-
-        if CHHelpers.OPTION_FORCE_GR in options:
-            # Force to respect golden ratio
-            # calculate new width/height + offset for constrained golden ratio
-            if (w/h) >= PHI:
-                nW = h * PHI
-                nH = h
-                oX += (w - nW)/2
-            else:
-                nW = w
-                nH = w / PHI
-                oY += (h - nH)/2
-
-        if oX != 0 or oY != 0:
-            painter.translate(oX, oY)
-
-        if CHHelpers.OPTION_FLIPH in options:
-            scaleX = -1
-        if CHHelpers.OPTION_FLIPV in options:
-            scaleY = -1
-
-        if scaleX != 1 or scaleY != 1:
-            painter.scale(scaleX, scaleY)
-            tX = 0
-            if scaleX != 1:
-                tX = -nW
-            tY = 0
-            if scaleY != 1:
-                tY = -nH
-            painter.translate(tX, tY)
-
-        if helper == CHHelpers.RULE_OF_THIRD:
-            pX = nW/3
-            pY = nH/3
-            lines.append(QLineF(pX, 0, pX, nH))
-            lines.append(QLineF(nW - pX, 0, nW - pX, nH))
-
-            lines.append(QLineF(0, pY, nW, pY))
-            lines.append(QLineF(0, nH - pY, nW, nH - pY))
-        elif helper == CHHelpers.GOLDEN_RECTANGLE:
-            painter.drawRect(QRectF(0, 0, nW, nH))
-        elif helper == CHHelpers.GOLDEN_SECTION:
-            pX = nW/(1+PHI)
-            pY = nH/(1+PHI)
-
-            lines.append(QLineF(pX, 0, pX, nH))
-            lines.append(QLineF(nW - pX, 0, nW - pX, nH))
-
-            lines.append(QLineF(0, pY, nW, pY))
-            lines.append(QLineF(0, nH - pY, nW, nH - pY))
-        elif helper == CHHelpers.GOLDEN_SPIRAL:
-            # start spiral path
-            spiralPath = QPainterPath()
-            spiralPath.moveTo(0, 0)
-
-            # fromStart is used to determinate from which side golden section have to be calculated
-            fromStart = 1
-            startAngle = 180
-            r = getGoldenPosition(QRectF(0, 0, nW, nH), True)
-
-            # arbitrary define 8 sections...
-            for number in range(8):
-                # hD = Diameter for spiral arc
-                hD = 2 * (abs(r[0].y() - r[1].y()) + abs(r[0].x() - r[1].x()))
-                spiralPath.arcTo(QRectF(QPointF(r[0].x() - hD/2, r[0].y() - hD/2), QSizeF(hD, hD)), startAngle, 90)
-
-                # prepare next arc/golden section
-                fromStart += 1
-                startAngle += 90
-                if fromStart >= 4:
-                    fromStart = 0
-                elif fromStart == 1:
-                    startAngle = 180
-                r = getGoldenPosition(r[2], (fromStart <= 1))
-            # draw spiral
-            painter.drawPath(spiralPath)
-        elif helper == CHHelpers.GOLDEN_SPIRAL_SECTION:
-            # fromStart is used to determinate from which side golden section have to be calculated
-            fromStart = 1
-            r = getGoldenPosition(QRectF(0, 0, nW, nH), True)
-
-            # arbitrary define 8 sections...
-            for number in range(8):
-                lines.append(QLineF(r[0], r[1]))
-
-                # prepare next arc/golden section
-                fromStart += 1
-                if fromStart >= 4:
-                    fromStart = 0
-                r = getGoldenPosition(r[2], (fromStart <= 1))
-        elif helper == CHHelpers.GOLDEN_TRIANGLES:
-            lines.append(QLineF(0, 0, nW, nH))
-            pX = nW/(1+PHI)
-            pY = nH/(1+PHI)
-
-            lines.append(QLineF(0, nH, pX, 0))
-            lines.append(QLineF(nW, 0, nW - pX, nH))
-        elif helper == CHHelpers.GOLDEN_DIAGONALS:
-            dX = nW - nH
-            lines.append(QLineF(0, 0, nH, nH))
-            lines.append(QLineF(0, nH, nH, 0))
-
-            lines.append(QLineF(dX, 0, dX + nH, nH))
-            lines.append(QLineF(dX, nH, dX + nH, 0))
-        elif helper == CHHelpers.BASIC_CROSS:
-            mX = nW/2
-            mY = nH/2
-            lines.append(QLineF(mX, 0, mX, nH))
-            lines.append(QLineF(0, mY, nW, mY))
-        elif helper == CHHelpers.BASIC_DIAGONALS:
-            lines.append(QLineF(0, 0, nW, nH))
-            lines.append(QLineF(0, nH, nW, 0))
-        elif helper == CHHelpers.BASIC_DIAMOND:
-            pX = nW/2
-            pY = nH/2
-
-            diamondPath = QPainterPath()
-            diamondPath.moveTo(0, pY)
-            diamondPath.lineTo(pX, 0)
-            diamondPath.lineTo(nW, pY)
-            diamondPath.lineTo(pX, nH)
-            diamondPath.closeSubpath()
-            # draw diamond
-            painter.drawPath(diamondPath)
-        elif helper == CHHelpers.BASIC_QUARTERS:
-            pX = nW/4
-            pY = nH/4
-
-            lines.append(QLineF(pX, 0, pX, nH))
-            lines.append(QLineF(nW - pX, 0, nW - pX, nH))
-
-            lines.append(QLineF(0, pY, nW, pY))
-            lines.append(QLineF(0, nH - pY, nW, nH - pY))
-        elif helper == CHHelpers.DYNAMIC_SYMMETRY:
-            # rule of third
-            tmpX = nW/3
-            pY = 2*nH/3
-            coeff = pY/tmpX
-            pX = nH/coeff
-
-            lines.append(QLineF(0, 0, pX, nH))
-            lines.append(QLineF(0, nH, pX, 0))
-
-            lines.append(QLineF(nW, 0, nW - pX, nH))
-            lines.append(QLineF(nW, nH, nW - pX, 0))
-        elif helper == CHHelpers.DYNAMIC_SYMMETRY_GS:
-            # golden section
-            tmpX = nW/(1+PHI)
-            pY = nH - nH/(1+PHI)
-            coeff = pY/tmpX
-            pX = nH/coeff
-
-            lines.append(QLineF(0, 0, pX, nH))
-            lines.append(QLineF(0, nH, pX, 0))
-
-            lines.append(QLineF(nW, 0, nW - pX, nH))
-            lines.append(QLineF(nW, nH, nW - pX, 0))
-        elif helper == CHHelpers.RECIPROCAL_LINES:
-            # rule of third
-            pX = nW/3
-            pY = nH/3
-
-            lines.append(QLineF(0, 0, pX, nH))
-            lines.append(QLineF(0, nH, pX, 0))
-
-            lines.append(QLineF(nW, 0, nW - pX, nH))
-            lines.append(QLineF(nW, nH, nW - pX, 0))
-        elif helper == CHHelpers.RECIPROCAL_LINES_GS:
-            # golden section
-            pX = nW/(1+PHI)
-            pY = nH/(1+PHI)
-
-            lines.append(QLineF(0, 0, pX, nH))
-            lines.append(QLineF(0, nH, pX, 0))
-
-            lines.append(QLineF(nW, 0, nW - pX, nH))
-            lines.append(QLineF(nW, nH, nW - pX, 0))
-
-        if len(lines):
-            painter.drawLines(lines)
-
-        # restore current painter transformations state
-        painter.restore()
-
-    def __init__(self, chName="Composition Helper", chVersion="testing"):
-        super(CHMainWindow, self).__init__(Krita.instance().activeWindow().qwindow())
+        CHRenderer.paintHelper(helper, painter, rectArea, options)
+
+    def __init__(self, chName="Composition Helper", chVersion="testing", documentProvider=None):
+        if documentProvider is None:
+            documentProvider = CHKritaDocumentProvider()
+        super(CHMainWindow, self).__init__(documentProvider.parentWindow())
+
+        self.__documentProvider = documentProvider
 
         # another instance already exist, exit
         self.__chName = chName
@@ -466,7 +211,7 @@ class CHMainWindow(QDialog):
             self.close()
             return
 
-        if Krita.instance().activeDocument() is None:
+        if self.__documentProvider.activeDocument() is None:
             # no document opened: cancel plugin
             QMessageBox.warning(
                     QWidget(),
@@ -483,22 +228,40 @@ class CHMainWindow(QDialog):
         self.setWindowTitle(i18n(f'{chName} v{chVersion}'))
         self.setWindowFlags(Qt.Window | Qt.WindowTitleHint | Qt.WindowMaximizeButtonHint | Qt.WindowCloseButtonHint)
 
-        # timer is used to update preview content when dialog window is resized
-        self.__timerResizeId = 0
+        # last size used to resize preview content
         self.__lastResized = QSize(0, 0)
 
-        # document preview: projection from document
+        # document preview: projection from document, downscaled to preview label dimension (full resolution projection
+        #                   is retrieved only if document is smaller than label)
         # document resized: projection resized to label dimension and store as a cache to avoid doing resizing on each
         #                   canvas refresh
+        # document size: full resolution document size
+        # document pyramid: multi-resolution pyramid built from document preview, allows to quickly resize preview
+        #                   to any label size
         self.__documentPreview = None
+        self.__documentPyramid = None
+        self.__documentSize = QSize()
         self.__documentResized = None
         # ratio applied between original size and preview size
         self.__documentRatio = 1
 
+        # preview cache
+        # - composited: checkerboard + resized document, rebuilt only when resized document is modified
+        # - overlay: helper rendered with current settings, rebuilt only when key (helper, size, pen, options...) is modified
+        self.__previewComposited = None
+        self.__previewOverlay = None
+        self.__previewOverlayKey = None
+
+        # resized document and composited preview are built in a thread
+        self.__previewWorker = WorkerCoalescing(self)
+        self.__previewWorker.finished.connect(self.__previewImagesReady)
+
         # Selection from document
         self.__documentSelection = None
 
-        self.__settings = CHSettings()
+        # use shared settings instance: delayed save made from here are flushed
+        # when window is closed (CHSettings.save())
+        self.__settings = CHSettings.instance()
         self.__settings.loadConfig()
 
         # initialise window
@@ -541,8 +304,7 @@ class CHMainWindow(QDialog):
         self.cbUseSelection.toggled.connect(self.__updatePreview)
         self.cbUseSelection.setEnabled(False)
 
-        self.cbAddAsVectorLayer.setVisible(QTSVG_AVAILABLE)
-        self.cbAddAsVectorLayer.setChecked(QTSVG_AVAILABLE and self.__settings.option(CHSettingsKey.HELPER_ADD_AS_VL.id()))
+        self.cbAddAsVectorLayer.setChecked(self.__settings.option(CHSettingsKey.HELPER_ADD_AS_VL.id()))
 
         # button 'add'
         self.pbAdd.clicked.connect(self.__addHelperLayer)
@@ -556,10 +318,7 @@ class CHMainWindow(QDialog):
         self.lblPreview.paintEvent = self.__lblPreviewPaint
         self.lblPreview.resizeEvent = self.__lblPreviewResize
 
-        self.__appNotifier = Krita.instance().notifier()
-        self.__appNotifier.viewClosed.connect(self.__activeViewChanged)
-        self.__window = Krita.instance().activeWindow()
-        self.__window.activeViewChanged.connect(self.__activeViewChanged)
+        self.__documentProvider.connectActiveViewChanged(self.__activeViewChanged)
 
         self.__updateDocumentPreview()
 
@@ -574,6 +333,9 @@ class CHMainWindow(QDialog):
 
         # setup manager
         self.wsmSetups.setupApplied.connect(self.__applySetupFromManager)
+        self.wsmSetups.setupsApplied.connect(self.__applySetupsFromManager)
+        self.wsmSetups.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.wsmSetups.setApplyMultiple(True)
         self.wsmSetups.setPropertiesEditorSetupPreviewWidgetClass(WCHViewer)
         self.wsmSetups.setExtensionFilter(f"{i18n('Composition Helper Setups')} (*.chsetups)")
         self.wsmSetups.setStoredDataFormat('ch--setup', '1.0.0')
@@ -588,7 +350,7 @@ class CHMainWindow(QDialog):
 
         lastSetupFileName = CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_LASTFILE)
         if lastSetupFileName != '' and os.path.exists(lastSetupFileName):
-            self.wsmSetups.openSetup(lastSetupFileName, False)
+            self.wsmSetups.openSetup(lastSetupFileName, False, True)
         else:
             lastSetupFileName = os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericConfigLocation), f'krita-plugin-{PkTk.packageName()}-default.chsetups')
             self.wsmSetups.newSetups(True)
@@ -599,29 +361,61 @@ class CHMainWindow(QDialog):
     def __lblPreviewPaint(self, event):
         """Update label preview"""
         # This method replace paintEvent() for widget lblPreview
-        if self.__documentResized is None:
+        if self.__previewComposited is None:
             return
 
+        # position for picture
+        pX = (self.lblPreview.width() - self.__previewComposited.width())//2
+        pY = (self.lblPreview.height() - self.__previewComposited.height())//2
+
+        self.__updatePreviewOverlay(QPoint(pX, pY))
+
         # ----------------------------------------------------------------------
         # start rendering
         painter = QPainter(self.lblPreview)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.lblPreview.rect(), Qt.NoBrush)
+        painter.drawImage(pX, pY, self.__previewComposited)
+        painter.drawImage(0, 0, self.__previewOverlay)
+        painter.end()
 
-        # position for picture
-        pX = (self.lblPreview.width() - self.__documentResized.width())/2
-        pY = (self.lblPreview.height() - self.__documentResized.height())/2
+    @staticmethod
+    def __buildPreviewImages(task, documentPyramid, size):
+        """Return a tuple (resized document, composited preview) for given
+        `documentPyramid`, resized to `size`
 
-        painter.translate(pX, pY)
+        Executed in a thread: only QImage are used here
+        """
+        documentResized = documentPyramid.scaled(size)
+        if task.isCancelled():
+            return None
+
+        composited = QImage(documentResized.size(), QImage.Format_ARGB32_Premultiplied)
 
+        painter = QPainter(composited)
         # draw a checkerboard as background, useful for picture with alpha channel
-        painter.fillRect(QRect(0, 0, self.__documentResized.width(), self.__documentResized.height()), checkerBoardBrush())
+        painter.fillRect(composited.rect(), checkerBoardBrush())
+        painter.drawImage(0, 0, documentResized)
+        painter.end()
 
-        # picture from cache
-        painter.drawImage(0, 0, self.__documentResized)
+        return (documentResized, composited)
 
-        # initialise pen according to UI
-        painter.setPen(self.__getPen(self.__documentRatio))
+    def __previewImagesReady(self, result):
+        """Resized document and composited preview have been built"""
+        if result is None or self.__documentPreview is None:
+            return
+
+        self.__documentResized, self.__previewComposited = result
+        self.__documentRatio = self.__documentResized.width() / self.__documentSize.width()
+        self.__previewOverlayKey = None
+        self.lblPreview.update()
+
+    def __updatePreviewOverlay(self, position):
+        """Update helper overlay image, if needed
+
+        Overlay is rendered over the whole label (a line can be drawn outside
+        document bounds, according to pen width) with document image at given
+        `position`
+        """
+        pen = self.__getPen(self.__documentRatio)
 
         # define drawing area
         drawRect = self.__documentResized.rect()
@@ -630,48 +424,106 @@ class CHMainWindow(QDialog):
                              int(self.__documentRatio * self.__documentSelection.y()),
                              int(self.__documentRatio * self.__documentSelection.width()),
                              int(self.__documentRatio * self.__documentSelection.height()))
+        drawRect.translate(position)
+
+        options = self.__getOptions()
+        # on HiDPI screens, overlay is rendered at physical pixels size
+        pixelRatio = self.lblPreview.devicePixelRatioF()
+        overlayKey = (self.cbxHelpers.currentData(),
+                      self.lblPreview.width(),
+                      self.lblPreview.height(),
+                      pixelRatio,
+                      drawRect.x(), drawRect.y(), drawRect.width(), drawRect.height(),
+                      pen.color().rgba(), pen.style(), pen.widthF(),
+                      tuple(options))
+
+        if overlayKey == self.__previewOverlayKey:
+            # nothing has been modified
+            return
+
+        self.__previewOverlayKey = overlayKey
+        self.__previewOverlay = QImage(round(self.lblPreview.width() * pixelRatio),
+                                       round(self.lblPreview.height() * pixelRatio),
+                                       QImage.Format_ARGB32_Premultiplied)
+        self.__previewOverlay.setDevicePixelRatio(pixelRatio)
+        self.__previewOverlay.fill(Qt.transparent)
+
+        painter = QPainter(self.__previewOverlay)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(pen)
 
         # -- draw helper
-        CHMainWindow.paintHelper(self.cbxHelpers.currentData(), painter, drawRect, self.__getOptions())
+        CHMainWindow.paintHelper(self.cbxHelpers.currentData(), painter, drawRect, options)
+        painter.end()
 
     def __lblPreviewResize(self, event=None):
         """Label has been resized"""
-        # can't update self.__documentResized QImage on each event because it's slow down the interface
-        # so implement a timer of 250ms
-        # if timer reach timeout, then trigger timerEvent() and calculate new dimension and refresh preview
-        # otherwise, if event occurs while timeout isn't reached, reinitialise timer
-        if self.__timerResizeId != 0:
-            self.killTimer(self.__timerResizeId)
-            self.__timerResizeId = 0
-
-        self.__timerResizeId = self.startTimer(250)
+        # preview is scaled from nearest level of document pyramid, in a thread, and only latest request is
+        # processed: preview can follow label size without delay
+        if self.__documentPreview is not None and self.__lastResized != self.lblPreview.size():
+            self.__updateDocumentResized()
 
     def __updateDocumentPreview(self):
         """Retrieve current document projection and refresh preview"""
-        document = Krita.instance().activeDocument()
+        document = self.__documentProvider.activeDocument()
         if document is not None:
             document.refreshProjection()
-            self.__documentPreview = document.projection(0, 0, document.width(), document.height())
+            self.__documentSize = document.size()
+            self.__documentPreview = document.projection(self.__previewMaxSize())
+            self.__documentPyramid = QImagePyramid(self.__documentPreview)
             self.__updateDocumentSelection()
             self.__updateDocumentResized()
             self.__updatePreview()
         else:
+            self.__previewWorker.cancel()
             self.__documentPreview = None
+            self.__documentPyramid = None
             self.__documentResized = None
+            self.__documentSize = QSize()
+            self.__previewComposited = None
+            self.__previewOverlayKey = None
         self.lblPreview.update()
 
+    def __previewMaxSize(self):
+        """Return maximum size for document preview
+
+        Preview label can't be bigger than screens, so retrieved projection is
+        downscaled to the biggest screen size
+        """
+        returned = QSize(self.lblPreview.size())
+        for screen in QGuiApplication.screens():
+            returned = returned.expandedTo(screen.size())
+        return returned
+
     def __updateDocumentResized(self):
-        """Update resized image of document"""
+        """Update resized image of document
+
+        Resized image is built asynchronously, see __previewImagesReady()
+        """
         if self.__documentPreview is not None:
             self.__lastResized = self.lblPreview.size()
-            self.__documentResized = self.__documentPreview.scaled(self.lblPreview.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.__documentRatio = self.__documentResized.width() / self.__documentPreview.width()
+
+            if (self.__documentPreview.width() < self.__documentSize.width() and
+               self.__documentPreview.width() < self.__lastResized.width() and
+               self.__documentPreview.height() < self.__lastResized.height()):
+                # label is bigger than downscaled projection: need to retrieve a bigger one
+                document = self.__documentProvider.activeDocument()
+                if document is not None:
+                    self.__documentPreview = document.projection(self.__lastResized)
+                    self.__documentPyramid = QImagePyramid(self.__documentPreview)
+
+            # scaling is made in a thread; current preview is kept until the new one is available
+            self.__previewWorker.submit(CHMainWindow.__buildPreviewImages, self.__documentPyramid, QSize(self.__lastResized))
         else:
+            self.__previewWorker.cancel()
             self.__documentPreview = None
+            self.__documentPyramid = None
             self.__documentResized = None
+            self.__previewComposited = None
+            self.__previewOverlayKey = None
 
     def __updateDocumentSelection(self, selection=None):
-        document = Krita.instance().activeDocument()
+        document = self.__documentProvider.activeDocument()
         if document is not None and (selection := document.selection()) is not None:
             self.cbUseSelection.setEnabled(True)
             if (self.__documentSelection is None or
@@ -679,7 +531,7 @@ class CHMainWindow(QDialog):
                selection.y() != self.__documentSelection.y() or
                selection.width() != self.__documentSelection.width() or
                selection.height() != self.__documentSelection.height()):
-                self.__documentSelection = QRect(selection.x(), selection.y(), selection.width(), selection.height())
+                self.__documentSelection = QRect(selection)
                 return True
         elif self.__documentSelection is not None:
             self.cbUseSelection.setEnabled(False)
@@ -754,7 +606,7 @@ class CHMainWindow(QDialog):
 
     def __activeViewChanged(self):
         """Called when view/active document has changed"""
-        if len(self.__window.views()) <= 1:
+        if self.__documentProvider.viewsCount() <= 1:
             # if there's no more view opened, close dialog
             # note: it seems that when notifier 'viewClosed' send signale BEFORE
             #       view is closed... then; need to check if current views is
@@ -773,6 +625,10 @@ class CHMainWindow(QDialog):
             else:
                 self.__addHelperLayer()
 
+    def __applySetupsFromManager(self, setupManagerSetups, fromColumnIndex):
+        """Multiple setups from setup manager have to be applied: add all of them as layers"""
+        self.addHelperLayers([setupManagerSetup.data() for setupManagerSetup in setupManagerSetups if isinstance(setupManagerSetup, SetupManagerSetup)])
+
     def __setupData(self):
         """Return a dict with current setup data"""
         helperId = self.cbxHelpers.currentData()
@@ -872,37 +728,24 @@ class CHMainWindow(QDialog):
         """
         self.__updateDocumentPreview()
 
-    def timerEvent(self, event):
-        """Resize timeout occurred, refresh preview according to new size"""
-        # timeout initialized during resize has been reached
-        self.__timerResizeId = 0
-
-        if self.__documentPreview is not None and self.__lastResized != self.lblPreview.size():
-            # calculate new dimension + refresh preview only if size has been modified
-            self.__updateDocumentResized()
-            self.__updatePreview()
-            self.lblPreview.update()
-
     def closeEvent(self, event):
         """Window is closed"""
         if not self.__opened:
             # window is closed before being opened, does nothing in this case
             return
 
-        try:
-            self.__window.activeViewChanged.disconnect(self.__activeViewChanged)
-        except Exception:
-            pass
-        try:
-            self.__appNotifier.viewClosed.disconnect(self.__activeViewChanged)
-        except Exception:
-            pass
+        self.__documentProvider.disconnectActiveViewChanged(self.__activeViewChanged)
+
+        self.__previewWorker.cancel()
+        self.__previewWorker.waitDone()
 
         rect = self.geometry()
 
         CHSettings.setHelperColorPickerLayout(self.pbLineColor.colorPicker().optionLayout())
 
         CHSettings.setTxtColorPickerLayout(self.wsmSetups.propertiesEditorColorPickerLayout())
+        # setups file must be completely loaded before being saved
+        self.wsmSetups.finishLoading()
         CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_LASTFILE, self.wsmSetups.lastFileName())
         CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_ZOOMLEVEL, self.wsmSetups.iconSizeIndex())
         CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLUMNWIDTH, self.wsmSetups.columnSetupWidth())
@@ -929,10 +772,10 @@ class CHMainWindow(QDialog):
         # has been modified
         # so check selection and update things if needed
         #
-        document = Krita.instance().activeDocument()
+        document = self.__documentProvider.activeDocument()
         if (document is not None and
-            (document.width() != self.__documentPreview.width() or
-             document.height() != self.__documentPreview.height())):
+            (document.width() != self.__documentSize.width() or
+             document.height() != self.__documentSize.height())):
             # document size have been modified
             self.__updateDocumentPreview()
         elif self.__updateDocumentSelection():
@@ -940,83 +783,96 @@ class CHMainWindow(QDialog):
 
     def __addHelperLayer(self):
         """Add Helper to current document"""
-        # check if a group Node for helper already exists
-        if self.__documentPreview is None:
-            return
-
-        helperId = self.cbxHelpers.currentData()
+        self.addHelperLayers([self.__setupData()])
 
-        document = Krita.instance().activeDocument()
+    def __renderHelperLayer(self, document, groupLayer, setupData):
+        """Render helper defined by `setupData` as a new layer, added to `groupLayer`
 
-        groupNode = EKritaDocument.findFirstLayerByName(document, CHMainWindow.__LAYER_GROUP)
-
-        if groupNode is None:
-            # doesn't exist, create a new one
-            groupNode = document.createGroupLayer(CHMainWindow.__LAYER_GROUP)
-            document.rootNode().addChildNode(groupNode, None)
+        Return a tuple (pen used to render helper, added layer)
+        """
+        helperId = setupData[CHSettingsKey.HELPER_LAST_USED.id()]
+        options = setupData[CHSettingsKey.HELPER_OPTIONS.id(helperId='global')]
 
         rasterMode = True
 
-        if QTSVG_AVAILABLE and self.cbAddAsVectorLayer.isChecked():
+        if setupData.get(CHSettingsKey.HELPER_ADD_AS_VL.id(), self.cbAddAsVectorLayer.isChecked()):
             rasterMode = False
 
-        if rasterMode:
-            newLayer = document.createNode(CHHelpersDef.HELPERS[helperId]['label'], "paintLayer")
-            pixmap = QPixmap(self.__documentPreview.size())
-            pixmap.fill(Qt.transparent)
-            drawRect = pixmap.rect()
-            painter = QPainter(pixmap)
+        pen = QPen(QColor(setupData[CHSettingsKey.HELPER_LINE_COLOR.id(helperId='global')]))
+        pen.setStyle(setupData[CHSettingsKey.HELPER_LINE_STYLE.id(helperId='global')])
+        pen.setWidthF(max(0.75, setupData[CHSettingsKey.HELPER_LINE_WIDTH.id(helperId='global')]))
+
+        documentRect = QRectF(0, 0, document.width(), document.height())
+
+        if self.__documentSelection is not None and CHHelpers.OPTION_USE_SELECTION in options:
+            drawRect = QRectF(self.__documentSelection)
         else:
-            newLayer = document.createVectorLayer(CHHelpersDef.HELPERS[helperId]['label'])
+            drawRect = documentRect
 
-            w = document.width()
-            h = document.height()
+        if rasterMode:
+            # only render area on which helper is drawn (stroked bounds, limited to document bounds)
+            # rendering is made tile by tile, directly in the format expected by layer, and
+            # empty tiles are ignored
+            cropRect = CHRenderer.boundingRect(helperId, drawRect, options, pen.widthF()).intersected(documentRect).toAlignedRect()
+            if cropRect.isEmpty():
+                tiles = []
+            else:
+                tiles = CHRenderer.renderTiles(helperId, drawRect, options, pen, cropRect)
 
-            drawRect = QRectF(0, 0, w, h)
+            return (pen, document.addRasterLayer(groupLayer, CHHelpersDef.HELPERS[helperId]['label'], tiles))
 
-            buffer = QBuffer()
-            svgGenerator = QSvgGenerator()
-            svgGenerator.setOutputDevice(buffer)
-            svgGenerator.setResolution(int(document.xRes()))
-            svgGenerator.setSize(QSize(int(w), int(h)))
-            svgGenerator.setViewBox(drawRect)
-            painter = QPainter(svgGenerator)
+        # helper geometry is directly written as SVG path
+        svgWriter = CHSvgWriter(document.width(), document.height(), document.resolution())
+        svgWriter.addHelper(helperId, (drawRect.x(), drawRect.y(), drawRect.width(), drawRect.height()), options,
+                            pen.color().name(QColor.HexArgb), pen.widthF(), pen.style())
 
-        if self.cbUseSelection.isEnabled() and self.cbUseSelection.isChecked():
-            drawRect = self.__documentSelection
+        return (pen, document.addVectorLayer(groupLayer, CHHelpersDef.HELPERS[helperId]['label'], svgWriter.toBytes()))
 
-        pen = self.__getPen()
+    def addHelperLayers(self, setupsData):
+        """Add helpers to current document
 
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setPen(pen)
-        CHMainWindow.paintHelper(helperId, painter, drawRect, self.__getOptions())
-        painter.end()
+        Given `setupsData` is a list of setup data (dictionaries, as stored in setup manager)
 
-        if rasterMode:
-            EKritaNode.fromQPixmap(newLayer, pixmap)
-            groupNode.addChildNode(newLayer, None)
-        else:
-            svgContent = bytes(buffer.buffer())
-            EKritaNode.fromSVG(newLayer, svgContent, document)
-            groupNode.addChildNode(newLayer, None)
-
-        # update global settings when a layers is added (keep in memory that for current helper, the
-        # preferred values are current values)
-        self.__settings.setOption(CHSettingsKey.HELPER_LAST_USED.id(), helperId)
-        self.__settings.setOption(CHSettingsKey.HELPER_ADD_AS_VL.id(), self.cbAddAsVectorLayer.isChecked())
-        self.__settings.setOption(CHSettingsKey.HELPER_LINE_COLOR.id(helperId=helperId), pen.color().name(QColor.HexArgb))
-        self.__settings.setOption(CHSettingsKey.HELPER_LINE_STYLE.id(helperId=helperId), pen.style())
-        self.__settings.setOption(CHSettingsKey.HELPER_LINE_WIDTH.id(helperId=helperId), pen.widthF())
-        self.__settings.setOption(CHSettingsKey.HELPER_OPTIONS.id(helperId=helperId), self.__getOptions(True))
-        self.__settings.saveConfig()
+        All layers are rendered and added to document, then settings are saved and
+        preview refreshed only once
+        """
+        if self.__documentPreview is None or len(setupsData) == 0:
+            return
+
+        document = self.__documentProvider.activeDocument()
+        if document is None:
+            return
+
+        groupLayer = document.groupLayer(CHMainWindow.__LAYER_GROUP)
+
+        newLayers = []
+        for setupData in setupsData:
+            pen, newLayer = self.__renderHelperLayer(document, groupLayer, setupData)
+            newLayers.append(newLayer)
+
+            # update global settings when a layers is added (keep in memory that for current helper, the
+            # preferred values are current values)
+            helperId = setupData[CHSettingsKey.HELPER_LAST_USED.id()]
+            optionsAvailable = CHHelpersDef.HELPERS[helperId]['options']['available']
+            options = [option for option in setupData[CHSettingsKey.HELPER_OPTIONS.id(helperId='global')]
+                       if option in optionsAvailable or option == CHHelpers.OPTION_USE_SELECTION]
+
+            self.__settings.setOptions({
+                    CHSettingsKey.HELPER_LAST_USED.id(): helperId,
+                    CHSettingsKey.HELPER_ADD_AS_VL.id(): setupData.get(CHSettingsKey.HELPER_ADD_AS_VL.id(), self.cbAddAsVectorLayer.isChecked()),
+                    CHSettingsKey.HELPER_LINE_COLOR.id(helperId=helperId): pen.color().name(QColor.HexArgb),
+                    CHSettingsKey.HELPER_LINE_STYLE.id(helperId=helperId): pen.style(),
+                    CHSettingsKey.HELPER_LINE_WIDTH.id(helperId=helperId): pen.widthF(),
+                    CHSettingsKey.HELPER_OPTIONS.id(helperId=helperId): options
+                })
+        self.__settings.saveConfigDelayed()
 
         # There's a lot of async stuff
         # Adding a child in layer stack is not "taken in account" immediately
         # and if update for preview is made to quickly, then it doesn't contain
         # the latest layer added
         #
-        # The `document.waitForDone()` instruction doesn't change anything
-        # So the warrior hack method: a sleep T_T
-        # 125ms is still too fast... use 250ms
-        Timer.sleep(250)
+        # Wait until added layers are available in document (never more than
+        # 1s) before updating preview
+        document.waitForLayers(newLayers, CHMainWindow.__LAYER_WAIT_TIMEOUT)
         self.__updateDocumentPreview()
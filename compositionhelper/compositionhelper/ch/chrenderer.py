@@ -0,0 +1,167 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The chrenderer module provides QPainter rendering for helpers geometry
+#
+# Helpers geometry is converted to a single QPainterPath, kept in a LRU cache
+# so repainting an helper with unchanged size/options is just a drawPath()
+# -----------------------------------------------------------------------------
+
+from PyQt5.Qt import *
+
+from .chgeometry import (
+        CHGeometry,
+        CHGeometryPath,
+        CHGeometryPrimitive
+    )
+
+from compositionhelper.pktk.modules.lrucache import LRUCache
+
+
+class CHRenderer(object):
+    """Render helpers geometry with a QPainter"""
+    __pathCache = LRUCache(128)
+
+    @staticmethod
+    def buildPainterPath(geometryPath, painterPath=None):
+        """Return a QPainterPath from given CHGeometryPath
+
+        If `painterPath` is provided, segments are added to it
+        """
+        if painterPath is None:
+            painterPath = QPainterPath()
+
+        for segment in geometryPath.segments():
+            if segment[0] == CHGeometryPath.MOVE_TO:
+                painterPath.moveTo(segment[1], segment[2])
+            elif segment[0] == CHGeometryPath.LINE_TO:
+                painterPath.lineTo(segment[1], segment[2])
+            elif segment[0] == CHGeometryPath.ARC_TO:
+                painterPath.arcTo(QRectF(segment[1] - segment[3], segment[2] - segment[3], 2 * segment[3], 2 * segment[3]), segment[4], segment[5])
+            elif segment[0] == CHGeometryPath.CLOSE:
+                painterPath.closeSubpath()
+        return painterPath
+
+    @staticmethod
+    def buildGeometryPath(geometry):
+        """Return a QPainterPath from given CHGeometry
+
+        Each primitive is added as a subpath
+        """
+        returned = QPainterPath()
+        for primitive in geometry.primitives():
+            if primitive.type() == CHGeometryPrimitive.TYPE_LINE:
+                x1, y1, x2, y2 = primitive.points()
+                returned.moveTo(x1, y1)
+                returned.lineTo(x2, y2)
+            elif primitive.type() == CHGeometryPrimitive.TYPE_RECT:
+                returned.addRect(QRectF(*primitive.rect()))
+            elif primitive.type() == CHGeometryPrimitive.TYPE_PATH:
+                CHRenderer.buildPainterPath(primitive, returned)
+        return returned
+
+    @staticmethod
+    def painterPath(helperId, width, height, options=None):
+        """Return QPainterPath for `helperId`, for given size and options
+
+        If path has already been built, it's returned from cache
+        """
+        key = CHGeometry.key(helperId, width, height, options)
+        returned = CHRenderer.__pathCache.get(key)
+        if returned is None:
+            returned = CHRenderer.buildGeometryPath(CHGeometry.get(helperId, width, height, options))
+            CHRenderer.__pathCache.set(key, returned)
+        return returned
+
+    @staticmethod
+    def boundingRect(helperId, rectArea, options=None, penWidth=0):
+        """Return bounding rect (QRectF) of `helperId` painted in given `rectArea`
+
+        Returned rect include stroke width, according to given `penWidth`
+        """
+        path = CHRenderer.painterPath(helperId, rectArea.width(), rectArea.height(), options)
+        if path.isEmpty():
+            return QRectF()
+
+        # square caps and joins can go beyond half pen width, add full pen width + 1 pixel for antialiasing
+        margin = penWidth + 1
+        return path.boundingRect().translated(rectArea.x(), rectArea.y()).adjusted(-margin, -margin, margin, margin)
+
+    @staticmethod
+    def paintHelper(helperId, painter, rectArea, options=None):
+        """Paint `helperId` on `painter`, using given `rectArea`
+
+        Consider that paint surface is initialised as well as the painter pen
+        """
+        path = CHRenderer.painterPath(helperId, rectArea.width(), rectArea.height(), options)
+        if path.isEmpty():
+            return
+
+        # save current painter transformations state
+        painter.save()
+
+        if rectArea.x() != 0 or rectArea.y() != 0:
+            painter.translate(rectArea.x(), rectArea.y())
+
+        # helpers are outlines only
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(path)
+
+        # restore current painter transformations state
+        painter.restore()
+
+    @staticmethod
+    def renderTiles(helperId, rectArea, options, pen, rect, tileSize=512):
+        """Generator of `helperId` rendered with `pen` in given `rectArea`, as tiles
+
+        Tiles cover given `rect` (QRect) and are returned as tuples (QRect, QImage);
+        tiles that doesn't intersect helper stroke are not rendered and not returned
+
+        Images are ARGB32 (non premultiplied)
+        """
+        path = CHRenderer.painterPath(helperId, rectArea.width(), rectArea.height(), options)
+        if path.isEmpty():
+            return
+
+        stroke = QPainterPathStroker(pen).createStroke(path.translated(rectArea.x(), rectArea.y()))
+        # 1 pixel margin for antialiasing
+        strokeRect = stroke.boundingRect().adjusted(-1, -1, 1, 1)
+
+        for y in range(rect.top(), rect.top() + rect.height(), tileSize):
+            for x in range(rect.left(), rect.left() + rect.width(), tileSize):
+                tileRect = QRect(x, y, min(tileSize, rect.left() + rect.width() - x), min(tileSize, rect.top() + rect.height() - y))
+                tileRectF = QRectF(tileRect).adjusted(-1, -1, 1, 1)
+
+                if not strokeRect.intersects(tileRectF) or not stroke.intersects(tileRectF):
+                    continue
+
+                image = QImage(tileRect.size(), QImage.Format_ARGB32)
+                image.fill(Qt.transparent)
+
+                painter = QPainter(image)
+                painter.setRenderHint(QPainter.Antialiasing)
+                painter.setPen(pen)
+                painter.translate(-tileRect.x(), -tileRect.y())
+                CHRenderer.paintHelper(helperId, painter, rectArea, options)
+                painter.end()
+
+                yield (tileRect, image)
+
+    @staticmethod
+    def clearCache():
+        """Clear painter path cache"""
+        CHRenderer.__pathCache.clear()
+
+    @staticmethod
+    def cacheStats():
+        """Return painter path cache statistics"""
+        return CHRenderer.__pathCache.stats()
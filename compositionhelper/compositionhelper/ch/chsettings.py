@@ -23,6 +23,7 @@ import os
 
 from compositionhelper.pktk.widgets.wcolorselector import (
         WColorPicker,
+        WColorPickerLayout,
         WColorComplementary
     )
 from compositionhelper.pktk.modules.settings import (
@@ -109,6 +110,48 @@ class CHSettings(Settings):
     Configuration is saved as JSON file
     """
 
+    # color picker layout options (see WColorPickerLayout) => settings keys
+    __TXT_COLORPICKER_LAYOUT = {
+            'compactUi': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_COMPACT,
+            'layoutOrientation': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_ORIENTATION,
+            'colorPalette': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_PALETTE_VISIBLE,
+            'colorPaletteName': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_PALETTE_DEFAULT,
+            'colorWheel': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CWHEEL_VISIBLE,
+            'colorPreview': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CWHEEL_CPREVIEW,
+            'colorCombination': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CCOMBINATION,
+            'colorCssRGB': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CCSS,
+            'colorRGB': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_RGB_VISIBLE,
+            'colorRGB%': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_RGB_ASPCT,
+            'colorCMYK': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_CMYK_VISIBLE,
+            'colorCMYK%': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_CMYK_ASPCT,
+            'colorHSL': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSL_VISIBLE,
+            'colorHSL%': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSL_ASPCT,
+            'colorHSV': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSV_VISIBLE,
+            'colorHSV%': CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSV_ASPCT
+        }
+
+    __HELPER_COLORPICKER_LAYOUT = {
+            'compactUi': CHSettingsKey.CONFIG_HELPER_COLORPICKER_COMPACT,
+            'layoutOrientation': CHSettingsKey.CONFIG_HELPER_COLORPICKER_ORIENTATION,
+            'colorPalette': CHSettingsKey.CONFIG_HELPER_COLORPICKER_PALETTE_VISIBLE,
+            'colorPaletteName': CHSettingsKey.CONFIG_HELPER_COLORPICKER_PALETTE_DEFAULT,
+            'colorWheel': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CWHEEL_VISIBLE,
+            'colorPreview': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CWHEEL_CPREVIEW,
+            'colorCombination': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCOMBINATION,
+            'colorCssRGB': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCSS,
+            'colorCssRGBAlphaChecked': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCSS_ALPHA,
+            'colorRGB': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_RGB_VISIBLE,
+            'colorRGB%': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_RGB_ASPCT,
+            'colorCMYK': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_CMYK_VISIBLE,
+            'colorCMYK%': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_CMYK_ASPCT,
+            'colorHSL': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSL_VISIBLE,
+            'colorHSL%': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSL_ASPCT,
+            'colorHSV': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSV_VISIBLE,
+            'colorHSV%': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSV_ASPCT,
+            'colorAlpha': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_ALPHA_VISIBLE,
+            'colorAlpha%': CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_ALPHA_ASPCT
+        }
+
     def __init__(self, pluginId=None):
         """Initialise settings"""
         if pluginId is None or pluginId == '':
@@ -209,104 +252,39 @@ class CHSettings(Settings):
 
         super(CHSettings, self).__init__(pluginId, rules)
 
+    @staticmethod
+    def __colorPickerLayout(settingsKeys):
+        """Return color picker layout from settings
+
+        Given `settingsKeys` is a dictionary {layout option: settings key}
+        """
+        return WColorPickerLayout.fromOptions({option: CHSettings.get(settingsKey) for option, settingsKey in settingsKeys.items()})
+
+    @staticmethod
+    def __setColorPickerLayout(settingsKeys, layout):
+        """Set color picker layout in settings
+
+        Given `settingsKeys` is a dictionary {layout option: settings key}
+        """
+        options = WColorPickerLayout.toOptions(layout)
+        CHSettings.setMultiple({settingsKey: options[option] for option, settingsKey in settingsKeys.items() if options[option] is not None})
+
     @staticmethod
     def getTxtColorPickerLayout():
         """Convert picker layout from settings to layout"""
-        # build a dummy color picker
-        tmpColorPicker = WColorPicker()
-        tmpColorPicker.setConstraintSize(True)
-        tmpColorPicker.setOptionCompactUi(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_COMPACT))
-        tmpColorPicker.setOptionOrientation(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_ORIENTATION))
-        tmpColorPicker.setOptionShowColorPalette(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_PALETTE_VISIBLE))
-        tmpColorPicker.setOptionColorPalette(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_PALETTE_DEFAULT))
-        tmpColorPicker.setOptionShowColorWheel(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CWHEEL_VISIBLE))
-        tmpColorPicker.setOptionShowPreviewColor(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CWHEEL_CPREVIEW))
-        tmpColorPicker.setOptionShowColorCombination(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CCOMBINATION))
-        tmpColorPicker.setOptionShowCssRgb(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CCSS))
-        tmpColorPicker.setOptionShowColorRGB(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_RGB_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorRGB(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_RGB_ASPCT))
-        tmpColorPicker.setOptionShowColorCMYK(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_CMYK_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorCMYK(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_CMYK_ASPCT))
-        tmpColorPicker.setOptionShowColorHSV(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSL_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorHSV(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSL_ASPCT))
-        tmpColorPicker.setOptionShowColorHSL(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSV_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorHSL(CHSettings.get(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSV_ASPCT))
-        tmpColorPicker.setOptionShowColorAlpha(False)
-        return tmpColorPicker.optionLayout()
+        return CHSettings.__colorPickerLayout(CHSettings.__TXT_COLORPICKER_LAYOUT)
 
     @staticmethod
     def setTxtColorPickerLayout(layout):
         """Convert color picker layout from settings to layout"""
-        # build a dummy color picker
-        tmpColorPicker = WColorPicker()
-        tmpColorPicker.setOptionLayout(layout)
-
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_COMPACT, tmpColorPicker.optionCompactUi())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_ORIENTATION, tmpColorPicker.optionOrientation())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_PALETTE_VISIBLE, tmpColorPicker.optionShowColorPalette())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_PALETTE_DEFAULT, tmpColorPicker.optionColorPalette())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CWHEEL_VISIBLE, tmpColorPicker.optionShowColorWheel())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CWHEEL_CPREVIEW, tmpColorPicker.optionShowPreviewColor())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CCOMBINATION, tmpColorPicker.optionShowColorCombination())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CCSS, tmpColorPicker.optionShowColorCssRGB())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_RGB_VISIBLE, tmpColorPicker.optionShowColorRGB())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_RGB_ASPCT, tmpColorPicker.optionDisplayAsPctColorRGB())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_CMYK_VISIBLE, tmpColorPicker.optionShowColorCMYK())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_CMYK_ASPCT, tmpColorPicker.optionDisplayAsPctColorCMYK())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSL_VISIBLE, tmpColorPicker.optionShowColorHSL())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSL_ASPCT, tmpColorPicker.optionDisplayAsPctColorHSL())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSV_VISIBLE, tmpColorPicker.optionShowColorHSV())
-        CHSettings.set(CHSettingsKey.CONFIG_SETUPMANAGER_COLORPICKER_CSLIDER_HSV_ASPCT, tmpColorPicker.optionDisplayAsPctColorHSV())
+        CHSettings.__setColorPickerLayout(CHSettings.__TXT_COLORPICKER_LAYOUT, layout)
 
     @staticmethod
     def getHelperColorPickerLayout():
         """Convert picker layout from settings to layout"""
-        # build a dummy color picker
-        tmpColorPicker = WColorPicker()
-        tmpColorPicker.setConstraintSize(True)
-        tmpColorPicker.setOptionCompactUi(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_COMPACT))
-        tmpColorPicker.setOptionOrientation(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_ORIENTATION))
-        tmpColorPicker.setOptionShowColorPalette(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_PALETTE_VISIBLE))
-        tmpColorPicker.setOptionColorPalette(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_PALETTE_DEFAULT))
-        tmpColorPicker.setOptionShowColorWheel(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CWHEEL_VISIBLE))
-        tmpColorPicker.setOptionShowPreviewColor(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CWHEEL_CPREVIEW))
-        tmpColorPicker.setOptionShowColorCombination(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCOMBINATION))
-        tmpColorPicker.setOptionShowColorRGB(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_RGB_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorRGB(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_RGB_ASPCT))
-        tmpColorPicker.setOptionShowColorCMYK(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_CMYK_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorCMYK(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_CMYK_ASPCT))
-        tmpColorPicker.setOptionShowColorHSV(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSL_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorHSV(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSL_ASPCT))
-        tmpColorPicker.setOptionShowColorHSL(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSV_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorHSL(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSV_ASPCT))
-        tmpColorPicker.setOptionShowColorAlpha(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_ALPHA_VISIBLE))
-        tmpColorPicker.setOptionDisplayAsPctColorAlpha(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_ALPHA_ASPCT))
-        tmpColorPicker.setOptionShowCssRgb(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCSS))
-        tmpColorPicker.setOptionShowCssRgbAlphaChecked(CHSettings.get(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCSS_ALPHA))
-        return tmpColorPicker.optionLayout()
+        return CHSettings.__colorPickerLayout(CHSettings.__HELPER_COLORPICKER_LAYOUT)
 
     @staticmethod
     def setHelperColorPickerLayout(layout):
         """Convert color picker layout from settings to layout"""
-        # build a dummy color picker
-        tmpColorPicker = WColorPicker()
-        tmpColorPicker.setOptionLayout(layout)
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_COMPACT, tmpColorPicker.optionCompactUi())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_ORIENTATION, tmpColorPicker.optionOrientation())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_PALETTE_VISIBLE, tmpColorPicker.optionShowColorPalette())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_PALETTE_DEFAULT, tmpColorPicker.optionColorPalette())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CWHEEL_VISIBLE, tmpColorPicker.optionShowColorWheel())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CWHEEL_CPREVIEW, tmpColorPicker.optionShowPreviewColor())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCOMBINATION, tmpColorPicker.optionShowColorCombination())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_RGB_VISIBLE, tmpColorPicker.optionShowColorRGB())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_RGB_ASPCT, tmpColorPicker.optionDisplayAsPctColorRGB())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_CMYK_VISIBLE, tmpColorPicker.optionShowColorCMYK())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_CMYK_ASPCT, tmpColorPicker.optionDisplayAsPctColorCMYK())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSL_VISIBLE, tmpColorPicker.optionShowColorHSL())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSL_ASPCT, tmpColorPicker.optionDisplayAsPctColorHSL())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSV_VISIBLE, tmpColorPicker.optionShowColorHSV())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_HSV_ASPCT, tmpColorPicker.optionDisplayAsPctColorHSV())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_ALPHA_VISIBLE, tmpColorPicker.optionShowColorAlpha())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CSLIDER_ALPHA_ASPCT, tmpColorPicker.optionDisplayAsPctColorAlpha())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCSS, tmpColorPicker.optionShowColorCssRGB())
-        CHSettings.set(CHSettingsKey.CONFIG_HELPER_COLORPICKER_CCSS_ALPHA, tmpColorPicker.optionShowCssRgbAlphaChecked())
+        CHSettings.__setColorPickerLayout(CHSettings.__HELPER_COLORPICKER_LAYOUT, layout)
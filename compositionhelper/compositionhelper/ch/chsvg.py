@@ -0,0 +1,173 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The chsvg module provides a SVG writer for helpers geometry
+#
+# Helpers geometry is directly serialized as SVG path data: all helpers with
+# the same style are written as one <path> element, without any group or
+# transformation
+# -----------------------------------------------------------------------------
+
+import math
+
+from PyQt5.Qt import Qt
+
+from .chgeometry import (
+        CHGeometry,
+        CHGeometryPath,
+        CHGeometryPrimitive
+    )
+
+
+class CHSvgWriter(object):
+    """Build a SVG document from helpers geometry"""
+
+    # dash patterns, in pen width unit (as defined by Qt)
+    __DASH_PATTERNS = {
+            Qt.SolidLine: None,
+            Qt.DashLine: (4, 2),
+            Qt.DotLine: (1, 2),
+            Qt.DashDotLine: (4, 2, 1, 2),
+            Qt.DashDotDotLine: (4, 2, 1, 2, 1, 2)
+        }
+
+    @staticmethod
+    def number(value):
+        """Return compact string representation of given number"""
+        returned = f"{value:.3f}".rstrip('0').rstrip('.')
+        if returned in ('', '-0'):
+            return '0'
+        return returned
+
+    @staticmethod
+    def pathData(geometry, x=0, y=0):
+        """Return SVG path data (str) for given `geometry` (CHGeometry), translated to (`x`, `y`)"""
+        n = CHSvgWriter.number
+        returned = []
+
+        for primitive in geometry.primitives():
+            if primitive.type() == CHGeometryPrimitive.TYPE_LINE:
+                x1, y1, x2, y2 = primitive.points()
+                returned.append(f"M{n(x + x1)} {n(y + y1)}L{n(x + x2)} {n(y + y2)}")
+            elif primitive.type() == CHGeometryPrimitive.TYPE_RECT:
+                rX, rY, rW, rH = primitive.rect()
+                returned.append(f"M{n(x + rX)} {n(y + rY)}h{n(rW)}v{n(rH)}h{n(-rW)}Z")
+            elif primitive.type() == CHGeometryPrimitive.TYPE_PATH:
+                returned.append(CHSvgWriter.__segmentsData(primitive.segments(), x, y))
+
+        return ''.join(returned)
+
+    @staticmethod
+    def __segmentsData(segments, x, y):
+        """Return SVG path data for given CHGeometryPath `segments`"""
+        n = CHSvgWriter.number
+        returned = []
+        current = None
+
+        for segment in segments:
+            if segment[0] == CHGeometryPath.MOVE_TO:
+                current = (x + segment[1], y + segment[2])
+                returned.append(f"M{n(current[0])} {n(current[1])}")
+            elif segment[0] == CHGeometryPath.LINE_TO:
+                current = (x + segment[1], y + segment[2])
+                returned.append(f"L{n(current[0])} {n(current[1])}")
+            elif segment[0] == CHGeometryPath.CLOSE:
+                returned.append("Z")
+            elif segment[0] == CHGeometryPath.ARC_TO:
+                centerX, centerY, radius, startAngle, sweepLength = segment[1:]
+                if radius == 0:
+                    # like QPainterPath.arcTo(), nothing is drawn for a null rectangle
+                    continue
+
+                centerX += x
+                centerY += y
+
+                # Qt angles are counter-clockwise with Y axis pointing down
+                start = (centerX + radius * math.cos(math.radians(startAngle)), centerY - radius * math.sin(math.radians(startAngle)))
+                if current is None:
+                    returned.append(f"M{n(start[0])} {n(start[1])}")
+                elif abs(current[0] - start[0]) > 0.0005 or abs(current[1] - start[1]) > 0.0005:
+                    # like QPainterPath.arcTo(), a line is drawn to arc start point
+                    returned.append(f"L{n(start[0])} {n(start[1])}")
+
+                current = start
+                if sweepLength == 0:
+                    continue
+
+                # a SVG arc can't be a full circle: split arc if needed
+                nbArcs = max(1, math.ceil(abs(sweepLength) / 180))
+                sweepFlag = 0 if sweepLength > 0 else 1
+                for index in range(1, nbArcs + 1):
+                    angle = math.radians(startAngle + sweepLength * index / nbArcs)
+                    current = (centerX + radius * math.cos(angle), centerY - radius * math.sin(angle))
+                    returned.append(f"A{n(radius)} {n(radius)} 0 0 {sweepFlag} {n(current[0])} {n(current[1])}")
+
+        return ''.join(returned)
+
+    def __init__(self, width, height, resolution=72.0):
+        self.__width = width
+        self.__height = height
+        self.__resolution = resolution
+        # style key => list of path data
+        self.__paths = {}
+
+    def addHelper(self, helperId, rectArea, options=None, color='#ff000000', lineWidth=1.0, lineStyle=Qt.SolidLine):
+        """Add `helperId` to SVG document
+
+        Given `rectArea` is a tuple (x, y, width, height) defining area in which
+        helper is drawn
+        Given `color` is a string '#AARRGGBB' or '#RRGGBB'
+        """
+        x, y, width, height = rectArea
+        pathData = CHSvgWriter.pathData(CHGeometry.get(helperId, width, height, options), x, y)
+        if pathData != '':
+            key = (color, lineWidth, int(lineStyle))
+            if key not in self.__paths:
+                self.__paths[key] = []
+            self.__paths[key].append(pathData)
+
+    def __styleAttributes(self, color, lineWidth, lineStyle):
+        """Return SVG presentation attributes for given style"""
+        n = CHSvgWriter.number
+
+        if isinstance(color, str) and len(color) == 9:
+            opacity = int(color[1:3], 16) / 255
+            color = f'#{color[3:]}'
+        else:
+            opacity = 1
+
+        returned = [f'fill="none" stroke="{color}" stroke-width="{n(lineWidth)}" stroke-linecap="square" stroke-linejoin="bevel"']
+        if opacity < 1:
+            returned.append(f'stroke-opacity="{n(opacity)}"')
+
+        dashPattern = CHSvgWriter.__DASH_PATTERNS.get(lineStyle, None)
+        if dashPattern is not None:
+            returned.append(f'stroke-dasharray="{",".join(n(value * lineWidth) for value in dashPattern)}"')
+
+        return ' '.join(returned)
+
+    def toString(self):
+        """Return SVG document as a string"""
+        n = CHSvgWriter.number
+        # size is defined in points, according to resolution: 1 user unit is 1 pixel
+        returned = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{n(72 * self.__width / self.__resolution)}pt" '
+                    f'height="{n(72 * self.__height / self.__resolution)}pt" viewBox="0 0 {n(self.__width)} {n(self.__height)}">']
+
+        for (color, lineWidth, lineStyle), pathsData in self.__paths.items():
+            returned.append(f'<path {self.__styleAttributes(color, lineWidth, lineStyle)} d="{"".join(pathsData)}"/>')
+
+        returned.append('</svg>')
+        return ''.join(returned)
+
+    def toBytes(self):
+        """Return SVG document as bytes"""
+        return self.toString().encode()
@@ -37,6 +37,7 @@
 from enum import Enum
 import xml.etree.ElementTree as ETree
 import re
+import time
 
 from ..pktk import *
 from krita import (
@@ -52,13 +53,16 @@ from PyQt5.QtCore import (
         QMimeData,
         QPoint,
         QRect,
+        QSize,
         QTimer,
         QUuid,
+        Qt
     )
 from PyQt5.QtGui import (
         QGuiApplication,
         QKeySequence,
         QImage,
+        QPainter,
         QPixmap,
         qRgb
     )
@@ -71,6 +75,8 @@ from PyQt5.QtWidgets import (
 
 from PyQt5.Qt import (QObject, QMdiArea, QAbstractScrollArea)
 
+from .pixelconv import PixelConverter
+
 # -----------------------------------------------------------------------------
 
 
@@ -898,6 +904,13 @@ class EKritaResizeMethods:
 
 class EKritaDocument:
     """Provides methods to manage Krita Documents"""
+    __waitForNodesStats = {'calls': 0,
+                           'timeouts': 0,
+                           'polls': 0,
+                           'lastDuration': 0,
+                           'maxDuration': 0,
+                           'totalDuration': 0
+                           }
 
     @staticmethod
     def findLayerById(document, layerId):
@@ -1077,6 +1090,119 @@ class EKritaDocument:
 
         return find(pathNodes, 0, searchFrom.rootNode())
 
+    @staticmethod
+    def projection(document, maxSize=None):
+        """Return `document` projection as a QImage
+
+        If `maxSize` (QSize) is provided and document is greater than given size,
+        returned image is a downscaled projection (aspect ratio is kept) that fit
+        in given size: full resolution projection is not retrieved, avoiding to
+        allocate memory for huge documents
+
+        If `maxSize` is None or document fit in given size, return projection at
+        full resolution
+        """
+        if not isinstance(document, Document):
+            raise EInvalidType("Given `document` must be a Krita <Document> type")
+        elif maxSize is not None and not isinstance(maxSize, QSize):
+            raise EInvalidType("Given `maxSize` must be a <QSize> or None")
+
+        documentSize = QSize(document.width(), document.height())
+
+        if maxSize is None or not maxSize.isValid() or (documentSize.width() <= maxSize.width() and documentSize.height() <= maxSize.height()):
+            return document.projection(0, 0, documentSize.width(), documentSize.height())
+
+        # thumbnail is calculated from Krita internal image, according to aspect ratio
+        thumbnailSize = documentSize.scaled(maxSize, Qt.KeepAspectRatio)
+        return document.thumbnail(max(1, thumbnailSize.width()), max(1, thumbnailSize.height()))
+
+    @staticmethod
+    def __isNodeRendered(node):
+        """Return True if given `node` content is rendered
+
+        Shapes of a vector layer are rendered asynchronously: while not rendered,
+        layer bounds are empty
+        """
+        if node.type() != 'vectorlayer' or not hasattr(node, 'shapes'):
+            return True
+        return len(node.shapes()) == 0 or not node.bounds().isEmpty()
+
+    @staticmethod
+    def waitForNodes(document, nodes, timeout=1000):
+        """Wait until given `nodes` are available and rendered in `document` projection
+
+        Adding a node in layer stack is asynchronous: even if node is available
+        in layers tree, document projection doesn't contain it yet.
+
+        Layers tree is polled (with an increasing delay between each poll, from
+        5ms to 50ms) until all nodes are found and their content is rendered
+        (non empty bounds for vector layers with shapes), then projection is
+        refreshed and method returns once refresh is done; polling stops when
+        `timeout` (in milliseconds) is reached.
+
+        Return True if all nodes are rendered, otherwise False (timeout)
+        """
+        if not isinstance(document, Document):
+            raise EInvalidType("Given `document` must be a Krita <Document> type")
+        elif isinstance(nodes, Node):
+            nodes = [nodes]
+        elif not isinstance(nodes, (list, tuple)):
+            raise EInvalidType("Given `nodes` must be a Krita <Node> or a <list> of <Node>")
+
+        startTime = time.time()
+        nodesId = [node.uniqueId() for node in nodes]
+        delay = 5
+        polls = 0
+        returned = False
+
+        while True:
+            document.waitForDone()
+            polls += 1
+
+            pendingNodesId = []
+            for nodeId in nodesId:
+                node = EKritaDocument.findLayerById(document, nodeId)
+                if node is None or not EKritaDocument.__isNodeRendered(node):
+                    pendingNodesId.append(nodeId)
+            nodesId = pendingNodesId
+
+            if len(nodesId) == 0:
+                # all nodes are rendered, wait for projection update
+                document.refreshProjection()
+                document.waitForDone()
+                returned = True
+                break
+
+            elapsed = 1000 * (time.time() - startTime)
+            if elapsed >= timeout:
+                break
+
+            # process events while waiting, to let Krita update layers tree
+            loop = QEventLoop()
+            QTimer.singleShot(int(min(delay, timeout - elapsed)), loop.quit)
+            loop.exec()
+            delay = min(delay * 2, 50)
+
+        duration = 1000 * (time.time() - startTime)
+
+        EKritaDocument.__waitForNodesStats['calls'] += 1
+        EKritaDocument.__waitForNodesStats['polls'] += polls
+        EKritaDocument.__waitForNodesStats['lastDuration'] = duration
+        EKritaDocument.__waitForNodesStats['maxDuration'] = max(duration, EKritaDocument.__waitForNodesStats['maxDuration'])
+        EKritaDocument.__waitForNodesStats['totalDuration'] += duration
+        if not returned:
+            EKritaDocument.__waitForNodesStats['timeouts'] += 1
+
+        return returned
+
+    @staticmethod
+    def waitForNodesStats():
+        """Return waitForNodes() statistics as a dictionary
+
+        Durations are in milliseconds
+        """
+        return dict(EKritaDocument.__waitForNodesStats)
+
 
 class EKritaNode:
     """Provides methods to manage Krita Nodes"""
@@ -1096,6 +1222,75 @@ class EKritaNode:
         QTimer.singleShot(value, loop.quit)
         loop.exec()
 
+    @staticmethod
+    def __imageByteArray(image):
+        """Return a QByteArray for given `image` pixels data
+
+        Returned QByteArray use `image` buffer directly, without copy: it's only
+        valid while image exists and is not modified
+        """
+        ptr = image.constBits()
+        ptr.setsize(image.sizeInBytes())
+        try:
+            return QByteArray.fromRawData(ptr)
+        except TypeError:
+            # buffer protocol not supported by current PyQt version: need a copy
+            return QByteArray(ptr.asstring())
+
+    @staticmethod
+    def __pixelFormat(layerNode):
+        """Return a tuple (color model, color depth, color profile) for pixel data of given `layerNode`
+
+        Masks pixel data are 8bits/pixel alpha values, without color profile
+        """
+        if layerNode.type() in ('transparencymask', 'filtermask', 'transformmask', 'selectionmask'):
+            return ('A', 'U8', None)
+        return (layerNode.colorModel(), layerNode.colorDepth(), layerNode.colorProfile())
+
+    @staticmethod
+    def __isTransparent(image):
+        """Return True if given ARGB32 `image` is fully transparent"""
+        ptr = image.constBits()
+        ptr.setsize(image.sizeInBytes())
+        # pixels are stored as BGRA bytes: check alpha bytes only
+        alpha = memoryview(ptr)[3::4].tobytes()
+        return alpha.count(0) == len(alpha)
+
+    @staticmethod
+    def tilesRect(rect, tileSize=256):
+        """Generator of QRect tiles covering given `rect` (QRect)
+
+        Tiles are returned row by row; tiles on right and bottom borders can be
+        smaller than `tileSize`
+        """
+        if not isinstance(rect, QRect):
+            raise EInvalidType("Given `rect` must be a valid <QRect>")
+        elif not isinstance(tileSize, int) or tileSize <= 0:
+            raise EInvalidValue("Given `tileSize` must be a positive <int>")
+
+        for y in range(rect.top(), rect.top() + rect.height(), tileSize):
+            height = min(tileSize, rect.top() + rect.height() - y)
+            for x in range(rect.left(), rect.left() + rect.width(), tileSize):
+                yield QRect(x, y, min(tileSize, rect.left() + rect.width() - x), height)
+
+    @staticmethod
+    def imageTiles(image, tileSize=None, position=None):
+        """Generator of tiles for given `image`, as tuples (QRect, QImage)
+
+        Returned QRect is tile position in image, translated to given `position`
+        (QPoint)
+
+        If `tileSize` is None, a unique tile is returned (image itself)
+        """
+        if position is None:
+            position = QPoint(0, 0)
+
+        if tileSize is None:
+            yield (QRect(position, image.size()), image)
+        else:
+            for tileRect in EKritaNode.tilesRect(image.rect(), tileSize):
+                yield (tileRect.translated(position), image.copy(tileRect))
+
     @staticmethod
     def path(layerNode):
         """Return `layerNode` path in tree
@@ -1126,13 +1321,17 @@ class EKritaNode:
         return parentPath(layerNode)
 
     @staticmethod
-    def toQImage(layerNode, rect=None, projectionMode=None):
+    def toQImage(layerNode, rect=None, projectionMode=None, tileSize=None):
         """Return `layerNode` content as a QImage (as ARGB32)
 
         The `rect` value can be:
         - None, in this case will return all `layerNode` content
         - A QRect() object, in this case return `layerNode` content reduced to given rectangle bounds
         - A Krita document, in this case return `layerNode` content reduced to document bounds
+
+        If `tileSize` is provided, content is read tile by tile: only returned
+        image is allocated at full size (no intermediate buffer for whole pixel
+        data)
         """
         if layerNode is None:
             raise EInvalidValue("Given `layerNode` can't be None")
@@ -1174,20 +1373,71 @@ class EKritaNode:
             else:
                 projectionMode = EKritaNode.ProjectionMode.TRUE
 
-        # Need to check what todo for:
-        # - masks (8bit/pixels)
-        # - other color space (need to convert to 8bits/rgba...?)
-        if (layerNode.type() in ('transparencymask', 'filtermask', 'transformmask', 'selectionmask') or
-           layerNode.colorModel() != 'RGBA' or
-           layerNode.colorDepth() != 'U8'):
-            # pixelData/projectionPixelData return a 8bits/pixel matrix
-            # didn't find how to convert pixel data to QImlage then use thumbnail() function
+        colorModel, colorDepth, colorProfile = EKritaNode.__pixelFormat(layerNode)
+        if not PixelConverter.isSupported(colorModel, colorDepth, colorProfile):
+            # no profile conversion available: values are returned as-is
+            colorProfile = None
+
+        if PixelConverter.isNative(colorModel, colorDepth, colorProfile):
+            converted = False
+        elif PixelConverter.isSupported(colorModel, colorDepth, colorProfile):
+            # pixel data need to be converted to 8bits/rgba
+            converted = True
+        else:
+            # can't convert pixel data to QImage then use thumbnail() function
             return layerNode.thumbnail(rect.width(), rect.height())
+
+        if tileSize is not None:
+            returned = QImage(rect.size(), QImage.Format_ARGB32)
+            returned.fill(Qt.transparent)
+            painter = QPainter(returned)
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            for tileRect, tileImage in EKritaNode.toQImageTiles(layerNode, rect, tileSize, projectionMode, True):
+                painter.drawImage(tileRect.topLeft() - rect.topLeft(), tileImage)
+            painter.end()
+            return returned
+
+        if projectionMode == EKritaNode.ProjectionMode.TRUE:
+            pixelData = layerNode.projectionPixelData(rect.left(), rect.top(), rect.width(), rect.height())
         else:
-            if projectionMode == EKritaNode.ProjectionMode.TRUE:
-                return QImage(layerNode.projectionPixelData(rect.left(), rect.top(), rect.width(), rect.height()), rect.width(), rect.height(), QImage.Format_ARGB32)
-            else:
-                return QImage(layerNode.pixelData(rect.left(), rect.top(), rect.width(), rect.height()), rect.width(), rect.height(), QImage.Format_ARGB32)
+            pixelData = layerNode.pixelData(rect.left(), rect.top(), rect.width(), rect.height())
+
+        if converted:
+            return PixelConverter.toQImage(pixelData, rect.width(), rect.height(), colorModel, colorDepth, colorProfile)
+        return QImage(pixelData, rect.width(), rect.height(), QImage.Format_ARGB32)
+
+    @staticmethod
+    def toQImageTiles(layerNode, rect=None, tileSize=256, projectionMode=None, skipTransparent=False):
+        """Generator of `layerNode` content as tiles, returned as tuples (QRect, QImage)
+
+        Returned QRect is tile position in layer, QImage is tile content (as ARGB32)
+
+        The `rect` value can be:
+        - None, in this case will return all `layerNode` content
+        - A QRect() object, in this case return `layerNode` content reduced to given rectangle bounds
+        - A Krita document, in this case return `layerNode` content reduced to document bounds
+
+        If `skipTransparent` is True, fully transparent tiles are not returned
+        """
+        if layerNode is None:
+            raise EInvalidValue("Given `layerNode` can't be None")
+
+        if rect is None:
+            rect = layerNode.bounds()
+        elif isinstance(rect, Document):
+            rect = rect.bounds()
+        elif not isinstance(rect, QRect):
+            raise EInvalidType("Given `rect` must be a valid Krita <Document>, a <QRect> or None")
+
+        colorModel, colorDepth = EKritaNode.__pixelFormat(layerNode)[0:2]
+        if (colorModel != 'RGBA' or colorDepth != 'U8') and not PixelConverter.isSupported(colorModel, colorDepth):
+            raise EInvalidValue(f"Given `layerNode` color space can't be converted ({colorModel}/{colorDepth})")
+
+        for tileRect in EKritaNode.tilesRect(rect, tileSize):
+            tileImage = EKritaNode.toQImage(layerNode, tileRect, projectionMode)
+            if skipTransparent and EKritaNode.__isTransparent(tileImage):
+                continue
+            yield (tileRect, tileImage)
 
     @staticmethod
     def toQPixmap(layerNode, rect=None, projectionMode=None):
@@ -1204,12 +1454,39 @@ class EKritaNode:
         return QPixmap.fromImage(EKritaNode.toQImage(layerNode, rect, projectionMode))
 
     @staticmethod
-    def fromQImage(layerNode, image, position=None):
+    def fromQImage(layerNode, image, position=None, tileSize=None, skipTransparent=False):
         """Paste given `image` to `position` in '`layerNode`
 
         The `position` value can be:
         - None, in this case, pixmap will be pasted at position (0, 0)
         - A QPoint() object, pixmap will be pasted at defined position
+
+        If `tileSize` is provided, image is pasted tile by tile: memory needed
+        for transfer is limited to one tile
+        If `skipTransparent` is True, fully transparent tiles are not pasted
+        (if `tileSize` is None, the whole image is considered as one tile)
+        """
+        if not isinstance(image, QImage):
+            raise EInvalidType("Given `image` must be a valid <QImage> ")
+
+        if position is None:
+            position = QPoint(0, 0)
+
+        if not isinstance(position, QPoint):
+            raise EInvalidType("Given `position` must be a valid <QPoint> ")
+
+        EKritaNode.fromQImageTiles(layerNode, EKritaNode.imageTiles(image, tileSize, position), skipTransparent)
+
+    @staticmethod
+    def fromQImageTiles(layerNode, tiles, skipTransparent=False):
+        """Paste given `tiles` in '`layerNode`
+
+        Given `tiles` is an iterable (can be a generator) of tuples (QRect, QImage)
+        for which QRect define position in layer of QImage
+
+        If `skipTransparent` is True, fully transparent tiles are not pasted
+
+        Return number of pasted tiles
         """
         # NOTE: layerNode can be a QObject...
         #       that's weird, but document.nodeByUniqueID() return a QObject for a paintlayer (other Nodes seems to be Ok...)
@@ -1229,33 +1506,41 @@ class EKritaNode:
         elif not isinstance(layerNode, Node):
             raise EInvalidType("Given `layerNode` must be a valid Krita <Node> ")
 
-        if not isinstance(image, QImage):
-            raise EInvalidType("Given `image` must be a valid <QImage> ")
-
-        if position is None:
-            position = QPoint(0, 0)
+        layerNeedBackConversion = False
+        layerNeedPixelConversion = False
+        layerColorModel, layerColorDepth, layerColorProfile = EKritaNode.__pixelFormat(layerNode)
 
-        if not isinstance(position, QPoint):
-            raise EInvalidType("Given `position` must be a valid <QPoint> ")
+        if not PixelConverter.isNative(layerColorModel, layerColorDepth, layerColorProfile):
+            if PixelConverter.isSupported(layerColorModel, layerColorDepth, layerColorProfile):
+                # pixel data are converted to layer color space (sRGB or linear sRGB profiles only)
+                layerNeedPixelConversion = True
+            else:
+                # we need to convert layer to RGBA/U8, Krita will apply color profile conversion
+                layerNode.setColorSpace("RGBA", "U8", "sRGB-elle-V2-srgbtrc.icc")
+                layerNeedBackConversion = True
 
-        layerNeedBackConversion = False
-        layerColorModel = layerNode.colorModel()
-        layerColorDepth = layerNode.colorDepth()
-        layerColorProfile = layerNode.colorProfile()
+        returned = 0
+        for tileRect, tileImage in tiles:
+            if tileImage.format() != QImage.Format_ARGB32:
+                # pixel data are expected as non premultiplied BGRA bytes
+                tileImage = tileImage.convertToFormat(QImage.Format_ARGB32)
 
-        if layerColorModel != "RGBA" or layerColorDepth != 'U8':
-            # we need to convert layer to RGBA/U8
-            layerNode.setColorSpace("RGBA", "U8", "sRGB-elle-V2-srgbtrc.icc")
-            layerNeedBackConversion = True
+            if skipTransparent and EKritaNode.__isTransparent(tileImage):
+                continue
 
-        ptr = image.bits()
-        ptr.setsize(image.byteCount())
+            if layerNeedPixelConversion:
+                pixelData = PixelConverter.fromQImage(tileImage, layerColorModel, layerColorDepth, layerColorProfile)
+            else:
+                pixelData = EKritaNode.__imageByteArray(tileImage)
 
-        layerNode.setPixelData(QByteArray(ptr.asstring()), position.x(), position.y(), image.width(), image.height())
+            layerNode.setPixelData(pixelData, tileRect.x(), tileRect.y(), tileImage.width(), tileImage.height())
+            returned += 1
 
         if layerNeedBackConversion:
             layerNode.setColorSpace(layerColorModel, layerColorDepth, layerColorProfile)
 
+        return returned
+
     @staticmethod
     def fromQPixmap(layerNode, pixmap, position=None):
         """Paste given `pixmap` to `position` in '`layerNode`
@@ -29,6 +29,7 @@ from PyQt5.QtGui import (
 from math import ceil
 import re
 import pickle
+import time
 
 from ..pktk import *
 
@@ -65,12 +66,13 @@ def checkerBoardBrush(size=32, color1=QColor(255, 255, 255), color2=QColor(220,
 
     size = s1+s2
 
-    tmpPixmap = QPixmap(size, size)
-    tmpPixmap.fill(color1)
+    # use a QImage rather than a QPixmap, allowing to use brush outside GUI thread
+    tmpImage = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+    tmpImage.fill(color1)
     brush = QBrush(color2)
 
     canvas = QPainter()
-    canvas.begin(tmpPixmap)
+    canvas.begin(tmpImage)
     canvas.setPen(Qt.NoPen)
 
     canvas.setRenderHint(QPainter.Antialiasing, False)
@@ -78,7 +80,7 @@ def checkerBoardBrush(size=32, color1=QColor(255, 255, 255), color2=QColor(220,
     canvas.fillRect(QRect(s1, s1, s2, s2), brush)
     canvas.end()
 
-    return QBrush(tmpPixmap)
+    return QBrush(tmpImage)
 
 
 def checkerBoardImage(size, checkerSize=32):
@@ -571,3 +573,89 @@ class QUriIcon(QObject):
     def icon(self):
         """Return QIconPickable icon or None"""
         return self.__icon
+
+
+class QImagePyramid(object):
+    """A multi-resolution (mip-map like) pyramid of an image
+
+    Level 0 is original image, each following level is half size of previous
+    one, until the smallest level fit in given `minSize`
+
+    Levels are built lazily (each level is built from previous one, when
+    needed) then any size can be served by a cheap scale from the nearest
+    bigger level
+
+    Only QImage are used, so pyramid can be used outside GUI thread
+    """
+
+    def __init__(self, image, minSize=64):
+        if not isinstance(image, QImage):
+            raise EInvalidType("Given `image` must be a <QImage>")
+
+        self.__sizes = [image.size()]
+        while max(self.__sizes[-1].width(), self.__sizes[-1].height()) > minSize:
+            self.__sizes.append(QSize(max(1, self.__sizes[-1].width()//2), max(1, self.__sizes[-1].height()//2)))
+
+        self.__levels = [image] + [None] * (len(self.__sizes) - 1)
+
+        # instrumentation, per level
+        self.__stats = [{'width': size.width(),
+                         'height': size.height(),
+                         'buildTime': 0.0,
+                         'scaleCount': 0,
+                         'scaleTime': 0.0
+                         } for size in self.__sizes]
+
+    def __repr__(self):
+        return f"<QImagePyramid({self.__sizes[0].width()}x{self.__sizes[0].height()}, {len(self.__sizes)} levels)>"
+
+    def size(self):
+        """Return original image size"""
+        return QSize(self.__sizes[0])
+
+    def levels(self):
+        """Return number of levels"""
+        return len(self.__sizes)
+
+    def level(self, index):
+        """Return image for level `index`"""
+        if self.__levels[index] is None:
+            previous = self.level(index - 1)
+            startTime = time.time()
+            self.__levels[index] = previous.scaled(self.__sizes[index], Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            self.__stats[index]['buildTime'] = time.time() - startTime
+        return self.__levels[index]
+
+    def levelFor(self, size):
+        """Return index of smallest level for which image, scaled to fit in `size`, is not upscaled"""
+        target = self.__sizes[0].scaled(size, Qt.KeepAspectRatio)
+        returned = 0
+        for index, levelSize in enumerate(self.__sizes):
+            if levelSize.width() < target.width() or levelSize.height() < target.height():
+                break
+            returned = index
+        return returned
+
+    def scaled(self, size, transformationMode=Qt.SmoothTransformation):
+        """Return image scaled to fit in given `size` (aspect ratio is kept)
+
+        Image is scaled from nearest level
+        """
+        index = self.levelFor(size)
+        image = self.level(index)
+
+        startTime = time.time()
+        returned = image.scaled(size, Qt.KeepAspectRatio, transformationMode)
+        self.__stats[index]['scaleTime'] += time.time() - startTime
+        self.__stats[index]['scaleCount'] += 1
+        return returned
+
+    def stats(self):
+        """Return instrumentation statistics, as a list of dictionaries (one per level)
+
+        - width, height: level size
+        - buildTime: time (in seconds) used to build level from previous one
+        - scaleCount: number of scaled() call served from level
+        - scaleTime: total time (in seconds) used to scale from level
+        """
+        return [dict(stats) for stats in self.__stats]
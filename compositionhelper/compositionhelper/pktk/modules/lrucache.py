@@ -0,0 +1,152 @@
+# -----------------------------------------------------------------------------
+# PyKritaToolKit
+# Copyright (C) 2019-2022 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin framework
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The lrucache module provides a bounded cache
+#
+# Main class from this module
+#
+# - LRUCache:
+#       A Least Recently Used cache, with hit/miss/eviction statistics
+#       Cache can be bounded by number of items and/or by size (in bytes) of
+#       items
+#
+# -----------------------------------------------------------------------------
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """A bounded Least Recently Used cache
+
+    When cache is full, the least recently used item is removed
+
+    If a maximum size in bytes is defined, items size must be provided when set
+    in cache; when total size is greater than maximum size, least recently used
+    items are removed (the most recently used item is always kept)
+    """
+
+    def __init__(self, maxSize=128, maxBytes=0):
+        self.__items = OrderedDict()
+        self.__itemsBytes = {}
+        self.__maxSize = 1
+        self.__maxBytes = 0
+        self.__bytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+        self.setMaxSize(maxSize)
+        self.setMaxBytes(maxBytes)
+
+    def __repr__(self):
+        return f"<LRUCache({len(self.__items)}/{self.__maxSize}, bytes={self.__bytes}/{self.__maxBytes}, hits={self.__hits}, misses={self.__misses}, evictions={self.__evictions})>"
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __contains__(self, key):
+        return key in self.__items
+
+    def __evict(self):
+        """Remove least recently used items until cache size is valid"""
+        while len(self.__items) > self.__maxSize or (self.__maxBytes > 0 and self.__bytes > self.__maxBytes and len(self.__items) > 1):
+            key, value = self.__items.popitem(last=False)
+            self.__bytes -= self.__itemsBytes.pop(key, 0)
+            self.__evictions += 1
+
+    def get(self, key, default=None):
+        """Return value for given `key`
+
+        If key is not found, return `default` value
+        """
+        try:
+            value = self.__items[key]
+        except KeyError:
+            self.__misses += 1
+            return default
+
+        self.__items.move_to_end(key)
+        self.__hits += 1
+        return value
+
+    def set(self, key, value, nbBytes=0):
+        """Set `value` for given `key`
+
+        Given `nbBytes` is size of value, used when a maximum size in bytes is
+        defined
+        """
+        self.__items[key] = value
+        self.__items.move_to_end(key)
+        self.__bytes += nbBytes - self.__itemsBytes.get(key, 0)
+        self.__itemsBytes[key] = nbBytes
+        self.__evict()
+
+    def remove(self, key):
+        """Remove given `key` from cache
+
+        Return True if key was found, otherwise False
+        """
+        if key in self.__items:
+            self.__items.pop(key)
+            self.__bytes -= self.__itemsBytes.pop(key, 0)
+            return True
+        return False
+
+    def clear(self):
+        """Clear cache content
+
+        Statistics are not reset
+        """
+        self.__items.clear()
+        self.__itemsBytes.clear()
+        self.__bytes = 0
+
+    def maxSize(self):
+        """Return maximum number of items in cache"""
+        return self.__maxSize
+
+    def setMaxSize(self, value):
+        """Set maximum number of items in cache"""
+        if isinstance(value, int) and value > 0:
+            self.__maxSize = value
+            self.__evict()
+
+    def maxBytes(self):
+        """Return maximum size (in bytes) of items in cache, 0 if not limited"""
+        return self.__maxBytes
+
+    def setMaxBytes(self, value):
+        """Set maximum size (in bytes) of items in cache, 0 to not limit size"""
+        if isinstance(value, int) and value >= 0:
+            self.__maxBytes = value
+            self.__evict()
+
+    def bytes(self):
+        """Return current size (in bytes) of items in cache"""
+        return self.__bytes
+
+    def stats(self):
+        """Return cache statistics as a dictionary"""
+        return {'size': len(self.__items),
+                'maxSize': self.__maxSize,
+                'bytes': self.__bytes,
+                'maxBytes': self.__maxBytes,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions
+                }
+
+    def resetStats(self):
+        """Reset cache statistics"""
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
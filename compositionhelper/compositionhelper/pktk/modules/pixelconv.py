@@ -0,0 +1,267 @@
+# -----------------------------------------------------------------------------
+# PyKritaToolKit
+# Copyright (C) 2019-2022 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin framework
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# The pixelconv module provides methods to convert raw Krita pixel data to/from
+# QImage ARGB32 format
+#
+# Main class from this module
+#
+# - PixelConverter:
+#       Convert pixel data (as returned by Node.pixelData()) for color models
+#       RGBA, GRAYA, CMYKA and A (masks) and color depth U8, U16, F16, F32
+#
+# Conversion is made with NumPy; if NumPy is not available, no conversion is
+# possible (PixelConverter.isSupported() always return False)
+#
+# Note: there's no color profile conversion; when a color profile is given,
+#       only sRGB and linear sRGB (elle g10) profiles are supported, for which
+#       sRGB transfer curve is applied; without color profile values are
+#       converted as-is
+# -----------------------------------------------------------------------------
+
+from PyQt5.QtCore import QByteArray
+from PyQt5.QtGui import QImage
+
+from ..pktk import *
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+
+class PixelConverter(object):
+    """Convert Krita raw pixel data from/to ARGB32"""
+
+    # number of channels per color model
+    __COLOR_MODELS = {
+            'RGBA': 4,
+            'GRAYA': 2,
+            'CMYKA': 5,
+            'A': 1
+        }
+
+    # numpy type per color depth
+    __COLOR_DEPTHS = {
+            'U8': '<u1',
+            'U16': '<u2',
+            'F16': '<f2',
+            'F32': '<f4'
+        }
+
+    # max value for CMYK channels, in floating point color spaces
+    __CMYK_FLOAT_UNIT = 100.0
+
+    # color profiles with sRGB primaries, per transfer curve
+    __PROFILES_SRGB = ('sRGB built-in',
+                       'sRGB-elle-V2-srgbtrc.icc',
+                       'sRGB-elle-V4-srgbtrc.icc',
+                       'Gray-D50-elle-V2-srgbtrc.icc',
+                       'Gray-D50-elle-V4-srgbtrc.icc')
+    __PROFILES_LINEAR = ('sRGB-elle-V2-g10.icc',
+                         'sRGB-elle-V4-g10.icc',
+                         'Gray-D50-elle-V2-g10.icc',
+                         'Gray-D50-elle-V4-g10.icc')
+
+    @staticmethod
+    def __isLinear(colorModel, colorProfile):
+        """Return True if pixel values for given `colorModel` and `colorProfile` are linear
+
+        Return None if given `colorProfile` is not supported
+        """
+        if colorProfile is None or colorModel == 'A':
+            return False
+        elif colorModel == 'CMYKA':
+            return None
+        elif colorProfile in PixelConverter.__PROFILES_SRGB:
+            return False
+        elif colorProfile in PixelConverter.__PROFILES_LINEAR:
+            return True
+        return None
+
+    @staticmethod
+    def isNative(colorModel, colorDepth, colorProfile=None):
+        """Return True if pixel data for given `colorModel`, `colorDepth` and `colorProfile` are ARGB32 values
+
+        In this case, no conversion is needed
+        """
+        return (colorModel == 'RGBA' and
+                colorDepth == 'U8' and
+                PixelConverter.__isLinear(colorModel, colorProfile) is False)
+
+    @staticmethod
+    def isSupported(colorModel, colorDepth, colorProfile=None):
+        """Return True if conversion is possible for given `colorModel`, `colorDepth` and `colorProfile`"""
+        return (NUMPY_AVAILABLE and
+                colorModel in PixelConverter.__COLOR_MODELS and
+                colorDepth in PixelConverter.__COLOR_DEPTHS and
+                PixelConverter.__isLinear(colorModel, colorProfile) is not None)
+
+    @staticmethod
+    def __checkSupported(colorModel, colorDepth, colorProfile):
+        """Raise an exception if conversion is not possible for given `colorModel`, `colorDepth` and `colorProfile`"""
+        if not NUMPY_AVAILABLE:
+            raise EInvalidStatus("NumPy is not available, pixel data can't be converted")
+        elif colorModel not in PixelConverter.__COLOR_MODELS:
+            raise EInvalidValue(f"Given `colorModel` is not supported: {colorModel}")
+        elif colorDepth not in PixelConverter.__COLOR_DEPTHS:
+            raise EInvalidValue(f"Given `colorDepth` is not supported: {colorDepth}")
+        elif PixelConverter.__isLinear(colorModel, colorProfile) is None:
+            raise EInvalidValue(f"Given `colorProfile` is not supported: {colorProfile}")
+
+    @staticmethod
+    def __toLinear(array):
+        """Return given `array` of sRGB float32 values as linear values"""
+        return numpy.where(array <= 0.04045, array / 12.92, numpy.power((numpy.maximum(array, 0.04045) + 0.055) / 1.055, 2.4))
+
+    @staticmethod
+    def __fromLinear(array):
+        """Return given `array` of linear float32 values as sRGB values"""
+        return numpy.where(array <= 0.0031308, array * 12.92, 1.055 * numpy.power(numpy.maximum(array, 0.0031308), 1 / 2.4) - 0.055)
+
+    @staticmethod
+    def __normalize(array, colorDepth):
+        """Return given `array` values as float32 values in range [0.0, 1.0]
+
+        For floating point color depth, values are not clipped
+        """
+        if colorDepth == 'U8':
+            return array.astype(numpy.float32) / 255.0
+        elif colorDepth == 'U16':
+            return array.astype(numpy.float32) / 65535.0
+        else:
+            return array.astype(numpy.float32)
+
+    @staticmethod
+    def __denormalize(array, colorDepth):
+        """Return given `array` of float32 values in range [0.0, 1.0] as values for given `colorDepth`"""
+        if colorDepth == 'U8':
+            return (numpy.clip(array, 0.0, 1.0) * 255.0 + 0.5).astype(numpy.uint8)
+        elif colorDepth == 'U16':
+            return (numpy.clip(array, 0.0, 1.0) * 65535.0 + 0.5).astype('<u2')
+        else:
+            return array.astype(PixelConverter.__COLOR_DEPTHS[colorDepth])
+
+    @staticmethod
+    def toQImage(pixelData, width, height, colorModel, colorDepth, colorProfile=None):
+        """Return a QImage (ARGB32) from given `pixelData`
+
+        Given `pixelData` are raw pixel data (bytes or QByteArray) of size `width`x`height`
+        for given `colorModel`, `colorDepth` and `colorProfile`
+        """
+        PixelConverter.__checkSupported(colorModel, colorDepth, colorProfile)
+        isLinear = PixelConverter.__isLinear(colorModel, colorProfile)
+
+        nbChannels = PixelConverter.__COLOR_MODELS[colorModel]
+        pixels = numpy.frombuffer(bytes(pixelData), dtype=PixelConverter.__COLOR_DEPTHS[colorDepth]).reshape(height, width, nbChannels)
+        # result is a BGRA array
+        returned = numpy.empty((height, width, 4), dtype=numpy.uint8)
+
+        if colorModel == 'RGBA' and colorDepth == 'U8' and not isLinear:
+            # nothing to convert
+            returned[...] = pixels
+        elif colorModel == 'RGBA':
+            pixels = PixelConverter.__normalize(pixels, colorDepth)
+            if colorDepth in ('F16', 'F32'):
+                # floating point color spaces are stored as RGBA, integer color spaces as BGRA
+                pixels = pixels[..., [2, 1, 0, 3]]
+            if isLinear:
+                pixels[..., 0:3] = PixelConverter.__fromLinear(pixels[..., 0:3])
+            returned[...] = PixelConverter.__denormalize(pixels, 'U8')
+        elif colorModel == 'GRAYA':
+            pixels = PixelConverter.__normalize(pixels, colorDepth)
+            if isLinear:
+                pixels[..., 0] = PixelConverter.__fromLinear(pixels[..., 0])
+            pixels = PixelConverter.__denormalize(pixels, 'U8')
+            returned[..., 0] = pixels[..., 0]
+            returned[..., 1] = pixels[..., 0]
+            returned[..., 2] = pixels[..., 0]
+            returned[..., 3] = pixels[..., 1]
+        elif colorModel == 'A':
+            # mask: return an opaque grayscale image
+            pixels = PixelConverter.__denormalize(PixelConverter.__normalize(pixels, colorDepth), 'U8')
+            returned[..., 0] = pixels[..., 0]
+            returned[..., 1] = pixels[..., 0]
+            returned[..., 2] = pixels[..., 0]
+            returned[..., 3] = 255
+        else:
+            # CMYK(A)
+            pixels = PixelConverter.__normalize(pixels, colorDepth)
+            cmyk = pixels[..., 0:4]
+            if colorDepth in ('F16', 'F32'):
+                cmyk = cmyk / PixelConverter.__CMYK_FLOAT_UNIT
+            cmyk = numpy.clip(cmyk, 0.0, 1.0)
+            key = 1.0 - cmyk[..., 3]
+            returned[..., 0] = PixelConverter.__denormalize((1.0 - cmyk[..., 2]) * key, 'U8')
+            returned[..., 1] = PixelConverter.__denormalize((1.0 - cmyk[..., 1]) * key, 'U8')
+            returned[..., 2] = PixelConverter.__denormalize((1.0 - cmyk[..., 0]) * key, 'U8')
+            returned[..., 3] = PixelConverter.__denormalize(pixels[..., 4], 'U8')
+
+        # QImage keep a reference to bytes buffer
+        return QImage(returned.tobytes(), width, height, width * 4, QImage.Format_ARGB32)
+
+    @staticmethod
+    def fromQImage(image, colorModel, colorDepth, colorProfile=None):
+        """Return raw pixel data (as QByteArray) from given `image`, for given `colorModel`, `colorDepth` and `colorProfile`
+
+        Returned data can be used with Node.setPixelData()
+        """
+        PixelConverter.__checkSupported(colorModel, colorDepth, colorProfile)
+        isLinear = PixelConverter.__isLinear(colorModel, colorProfile)
+
+        if not isinstance(image, QImage):
+            raise EInvalidType("Given `image` must be a valid <QImage>")
+
+        if image.format() != QImage.Format_ARGB32:
+            image = image.convertToFormat(QImage.Format_ARGB32)
+
+        width = image.width()
+        height = image.height()
+
+        ptr = image.constBits()
+        ptr.setsize(image.sizeInBytes())
+        # BGRA array; take care of lines padding
+        pixels = numpy.frombuffer(ptr, dtype=numpy.uint8).reshape(height, image.bytesPerLine())[:, :width * 4].reshape(height, width, 4)
+
+        if colorModel == 'RGBA' and colorDepth == 'U8' and not isLinear:
+            return QByteArray(pixels.tobytes())
+
+        bgra = PixelConverter.__normalize(pixels, 'U8')
+        if isLinear:
+            bgra[..., 0:3] = PixelConverter.__toLinear(bgra[..., 0:3])
+
+        if colorModel == 'RGBA':
+            if colorDepth in ('F16', 'F32'):
+                bgra = bgra[..., [2, 1, 0, 3]]
+            returned = PixelConverter.__denormalize(bgra, colorDepth)
+        elif colorModel in ('GRAYA', 'A'):
+            # Rec.709 luminance
+            gray = bgra[..., 2] * 0.2126 + bgra[..., 1] * 0.7152 + bgra[..., 0] * 0.0722
+            if colorModel == 'A':
+                returned = PixelConverter.__denormalize(gray[..., numpy.newaxis], colorDepth)
+            else:
+                returned = PixelConverter.__denormalize(numpy.stack((gray, bgra[..., 3]), axis=-1), colorDepth)
+        else:
+            # CMYK(A)
+            key = 1.0 - numpy.max(bgra[..., 0:3], axis=-1)
+            divider = numpy.where(key < 1.0, 1.0 - key, 1.0)
+            cmyk = numpy.stack(((1.0 - bgra[..., 2] - key) / divider,
+                                (1.0 - bgra[..., 1] - key) / divider,
+                                (1.0 - bgra[..., 0] - key) / divider,
+                                key), axis=-1)
+            if colorDepth in ('F16', 'F32'):
+                cmyk = cmyk * PixelConverter.__CMYK_FLOAT_UNIT
+            returned = numpy.concatenate((PixelConverter.__denormalize(cmyk, colorDepth),
+                                          PixelConverter.__denormalize(bgra[..., 3:4], colorDepth)), axis=-1)
+
+        return QByteArray(numpy.ascontiguousarray(returned).tobytes())
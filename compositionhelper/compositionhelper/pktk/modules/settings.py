@@ -26,6 +26,10 @@
 # - SettingsRule
 #       Manage validation rule for a setting configuration variable
 #
+# Configuration file is always written atomically (temporary file + rename)
+# Delayed saves (see Settings.saveConfigDelayed()) are coalesced and written in
+# a thread; a synchronous save (Settings.saveConfig()) flush pending delayed save
+#
 # -----------------------------------------------------------------------------
 
 from enum import Enum
@@ -42,9 +46,12 @@ import os
 import re
 import sys
 import shutil
+import stat
+import tempfile
 
 
 from .utils import Debug
+from .workers import WorkerCoalescing
 
 from ..pktk import *
 
@@ -185,6 +192,14 @@ class Settings(QObject):
     _settingsSaved = Signal()          # settings has been saved
     _settingsLoaded = Signal()         # settings has been loaded
 
+    # process umask, used to define mode of a new configuration file (umask can only be read by setting it;
+    # it's read once, as configuration file is written in a thread)
+    __UMASK = os.umask(0o022)
+    os.umask(__UMASK)
+
+    # default delay (in milliseconds) before a delayed save is executed
+    SAVE_DELAY = 1000
+
     @classmethod
     def __init(cls):
         """Internal function to initialise class"""
@@ -208,6 +223,12 @@ class Settings(QObject):
         cls.__init()
         return cls.__settings.saveConfig()
 
+    @classmethod
+    def saveDelayed(cls, delay=None):
+        """save configuration, later"""
+        cls.__init()
+        return cls.__settings.saveConfigDelayed(delay)
+
     @classmethod
     def fileName(cls):
         """return file name"""
@@ -226,6 +247,12 @@ class Settings(QObject):
         cls.__init()
         return cls.__settings.setOption(id, value)
 
+    @classmethod
+    def setMultiple(cls, values):
+        """Set options values from a dictionary {id: value}"""
+        cls.__init()
+        return cls.__settings.setOptions(values)
+
     @classmethod
     def get(cls, id):
         """Get option value"""
@@ -261,12 +288,23 @@ class Settings(QObject):
         self.__pluginCfgFile = os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericConfigLocation), f'krita-plugin-{pluginId}rc.json')
         self.__config = {}
 
+        # flat index of options: id => (dictionary, key)
+        # let direct access to value in nested configuration dictionary
+        self.__slots = {}
+
         # define current rules for options
         self.__rules = {}
 
         # configuration has been modified and need to be saved?
         self.__modified = False
 
+        # delayed save: changes are coalesced by timer, file is written in a thread
+        self.__saveTimer = QTimer(self)
+        self.__saveTimer.setSingleShot(True)
+        self.__saveTimer.timeout.connect(self.__saveDelayedTimeout)
+        self.__saveWorker = WorkerCoalescing(self)
+        self.__saveWorker.finished.connect(self.__saveDelayedFinished)
+
         if rules is not None:
             self.setRules(rules)
         self.setDefaultConfig()
@@ -288,14 +326,80 @@ class Settings(QObject):
 
             self.__setValue(target[keys[0]], keys[1], value)
 
-    def __getValue(self, target, id):
-        """From an id like 'a.b.c', get value in target dictionary"""
-        keys = id.split('.', 1)
+    def __getSlot(self, target, id):
+        """From an id like 'a.b.c', return tuple (dictionary, key) in target dictionary"""
+        keys = id.split('.')
 
-        if len(keys) == 1:
-            return target[keys[0]]
-        else:
-            return self.__getValue(target[keys[0]], keys[1])
+        for key in keys[:-1]:
+            target = target[key]
+
+        return (target, keys[-1])
+
+    def __updateSlots(self):
+        """Build flat index of options from current configuration"""
+        self.__slots = {ruleId: self.__getSlot(self.__config, ruleId) for ruleId in self.__rules}
+
+    def __flatten(self, source, parentKey=''):
+        """Return given nested `source` dictionary as a list of tuple (id, value)"""
+        returned = []
+        for key, value in source.items():
+            if parentKey != '':
+                key = f'{parentKey}.{key}'
+
+            if isinstance(value, dict):
+                returned += self.__flatten(value, key)
+            else:
+                returned.append((key, value))
+        return returned
+
+    def __writeFile(self, content):
+        """Write given `content` (str) in configuration file
+
+        File is written in a temporary file, then renamed: if process is
+        interrupted while writing, current configuration file is kept unchanged
+
+        Return True if file has been written, otherwise False
+        """
+        tmpFileName = None
+        try:
+            fHandle, tmpFileName = tempfile.mkstemp(prefix=f'{os.path.basename(self.__pluginCfgFile)}.',
+                                                    suffix='.tmp',
+                                                    dir=os.path.dirname(self.__pluginCfgFile))
+            with os.fdopen(fHandle, 'w') as file:
+                file.write(content)
+                file.flush()
+                os.fsync(file.fileno())
+            # temporary file is created with mode 0600: keep mode of current file, or use default mode for a new file
+            try:
+                fileMode = stat.S_IMODE(os.stat(self.__pluginCfgFile).st_mode)
+            except FileNotFoundError:
+                fileMode = 0o666 & ~Settings.__UMASK
+            os.chmod(tmpFileName, fileMode)
+            os.replace(tmpFileName, self.__pluginCfgFile)
+        except Exception as e:
+            Debug.print('[Settings.saveConfig] Unable to save file {0}: {1}', self.__pluginCfgFile, f"{e}")
+            if tmpFileName is not None and os.path.isfile(tmpFileName):
+                try:
+                    os.remove(tmpFileName)
+                except Exception:
+                    pass
+            return False
+        return True
+
+    def __saveDelayedTimeout(self):
+        """Delay for save is expired, write configuration in a thread"""
+        # configuration is serialized here, written file is a consistent snapshot
+        content = json.dumps(self.__config, indent=4, sort_keys=True)
+        self.__modified = False
+        self.__saveWorker.submit(lambda task, content: self.__writeFile(content), content)
+
+    def __saveDelayedFinished(self, saved):
+        """Delayed save has been executed"""
+        if not saved:
+            self.__modified = True
+        self.configurationSavedEvent(saved)
+        if saved:
+            self._settingsSaved.emit()
 
     def configurationFileName(self):
         """Return the configuration file name"""
@@ -332,6 +436,8 @@ class Settings(QObject):
         for ruleId in self.__rules:
             self.__setValue(self.__config, ruleId, self.__rules[ruleId].defaultValue())
 
+        self.__updateSlots()
+
         # just initialised with default values, consider that it's not modified
         self.__modified = False
 
@@ -341,13 +447,6 @@ class Settings(QObject):
         If file doesn't exist return False
         Otherwise True
         """
-        def setKeyValue(sourceKey, value):
-            if isinstance(value, dict):
-                for key in value:
-                    setKeyValue(f'{sourceKey}.{key}', value[key])
-            else:
-                self.setOption(sourceKey, value)
-
         jsonAsDict = None
 
         if os.path.isfile(self.__pluginCfgFile):
@@ -370,8 +469,20 @@ class Settings(QObject):
             return False
 
         # parse all items, and set current config
-        for key in jsonAsDict:
-            setKeyValue(key, jsonAsDict[key])
+        # values are checked once here, then directly set through flat index
+        for id, value in self.__flatten(jsonAsDict):
+            if id not in self.__slots:
+                Debug.print('[Settings.loadConfig] Given id `{0}` is not valid', id)
+                continue
+
+            try:
+                self.__rules[id].checkValue(value)
+            except Exception as e:
+                Debug.print('[Settings.loadConfig] Given value for id `{0}` is not valid: {1}', id, f"{e}")
+                continue
+
+            target, key = self.__slots[id]
+            target[key] = value
 
         self.configurationLoadedEvent(True)
 
@@ -383,16 +494,18 @@ class Settings(QObject):
     def saveConfig(self):
         """Save configuration to file
 
+        Save is synchronous: pending delayed save is replaced by this one
+
         If file can't be saved, return False
         Otherwise True
         """
-        with open(self.__pluginCfgFile, 'w') as file:
-            try:
-                file.write(json.dumps(self.__config, indent=4, sort_keys=True))
-            except Exception as e:
-                Debug.print('[Settings.saveConfig] Unable to save file {0}: {1}', self.__pluginCfgFile, f"{e}")
-                self.configurationSavedEvent(False)
-                return False
+        self.__saveTimer.stop()
+        self.__saveWorker.cancel()
+        self.__saveWorker.waitDone()
+
+        if not self.__writeFile(json.dumps(self.__config, indent=4, sort_keys=True)):
+            self.configurationSavedEvent(False)
+            return False
 
         self.configurationSavedEvent(True)
 
@@ -401,6 +514,23 @@ class Settings(QObject):
         self._settingsSaved.emit()
         return True
 
+    def saveConfigDelayed(self, delay=None):
+        """Save configuration to file, later
+
+        File is saved after given `delay` (in milliseconds, default is SAVE_DELAY)
+        in a thread; if a new delayed save is requested before delay is expired,
+        delay is restarted and only one save is made
+
+        Use saveConfig() to flush pending save
+        """
+        if delay is None:
+            delay = self.SAVE_DELAY
+        self.__saveTimer.start(max(0, delay))
+
+    def isSavePending(self):
+        """Return True if a delayed save has not been written yet"""
+        return self.__saveTimer.isActive() or self.__saveWorker.isRunning()
+
     def configurationLoadedEvent(self, fileLoaded):
         """Called after configuration is loaded and before signal is emitted
 
@@ -430,30 +560,59 @@ class Settings(QObject):
         if isinstance(id, SettingsKey):
             id = id.id()
 
-        if not isinstance(id, str) or id not in self.__rules:
+        slot = self.__slots.get(id) if isinstance(id, str) else None
+        if slot is None:
             # raise EInvalidValue(f'Given `id` is not valid: {id}')
             Debug.print('[Settings.setOption] Given id `{0}` is not valid', id)
             return False
 
+        target, key = slot
+        if target[key] == value and type(target[key]) == type(value):
+            # nothing to check/update
+            return True
+
         # check if value is valid
         try:
             self.__rules[id].checkValue(value)
-            # value is valid, set it
-            self.__setValue(self.__config, id, value)
         except Exception as e:
             Debug.print('[Settings.setOption] Given value is not valid: {0}', f"{e}")
             return False
 
+        # value is valid, set it
+        self.__modified = True
+        target[key] = value
+        return True
+
+    def setOptions(self, values):
+        """Set values for given options
+
+        Given `values` is a dictionary {id: value}, with id a valid SettingsKey or
+        string identifier
+
+        Return True if all values have been set, otherwise False (invalid id and
+        values are ignored)
+        """
+        if not isinstance(values, dict):
+            raise EInvalidType('Given `values` must be a <dict>')
+
+        returned = True
+        for id, value in values.items():
+            if self.setOption(id, value) is False:
+                returned = False
+        return returned
+
     def option(self, id):
         """Return value for option"""
         # check if id is valid
         if isinstance(id, SettingsKey):
             id = id.id()
 
-        if not isinstance(id, str) or id not in self.__rules:
+        try:
+            target, key = self.__slots[id]
+        except (KeyError, TypeError):
             raise EInvalidValue(f'Given `id` is not valid: {id}')
 
-        return self.__getValue(self.__config, id)
+        return target[key]
 
     def options(self):
         return self.__config
@@ -31,7 +31,8 @@
 
 import hashlib
 import re
-import time
+import sys
+import warnings
 
 from PyQt5.Qt import *
 from PyQt5.QtGui import (
@@ -40,6 +41,7 @@ from PyQt5.QtGui import (
         QTextCharFormat
     )
 from .elist import EList
+from .lrucache import LRUCache
 from .uitheme import UITheme
 from ..pktk import *
 
@@ -170,27 +172,39 @@ class Token(object):
     - a type
     - a value
     - position (column and row) from original text
+
+    As many tokens can be created, attributes are defined as slots and
+    lowercase text and value are only evaluated when needed
     """
+    __slots__ = ('__text', '__rule', '__type', '__positionStart', '__length', '__lineNumber', '__linePositionStart',
+                 '__indent', '__simplifySpaces', '__next', '__previous', '__iText', '__value')
+
     __LINE_NUMBER = 0
     __LINE_POSSTART = 0
+    # value not yet evaluated
+    __UNDEFINED = object()
 
     @staticmethod
-    def resetTokenizer():
-        Token.__LINE_NUMBER = 1
-        Token.__LINE_POSSTART = 0
+    def resetTokenizer(lineNumber=1, linePositionStart=0):
+        """Reset line number and line position used to build tokens
+
+        By default, next built token is considered on first line of text
+        """
+        Token.__LINE_NUMBER = lineNumber
+        Token.__LINE_POSSTART = linePositionStart
 
     def __init__(self, text, rule, positionStart, positionEnd, length, simplifySpaces=False):
         self.__text = text.lstrip()
         self.__rule = rule
         self.__positionStart = positionStart
-        self.__positionEnd = positionEnd
         self.__length = length
         self.__lineNumber = Token.__LINE_NUMBER
         self.__linePositionStart = (positionStart - Token.__LINE_POSSTART) + 1
-        self.__linePositionEnd = self.__linePositionStart + length
         self.__next = None
         self.__previous = None
         self.__simplifySpaces = simplifySpaces
+        self.__iText = None
+        self.__value = Token.__UNDEFINED
 
         self.__type = rule.type()
         # check for subtype
@@ -214,11 +228,6 @@ class Token(object):
             # do not simplify COMMENT token
             self.__text = re.sub(r"\s+", " ", self.__text)
 
-        self.__caseInsensitive = self.__rule.caseInsensitive()
-        self.__iText = self.__text.lower()
-
-        self.__value = self.__rule.initValue(self.__text)
-
     def __repr__(self):
         if self.__type == TokenType.NEWLINE:
             txt = ''
@@ -226,8 +235,8 @@ class Token(object):
             txt = self.__text
         return (f"<Token({self.__indent}, '{txt}', Type[{self.__type}]"
                 f"Length: {self.__length}, "
-                f"Global[Start: {self.__positionStart}, End: {self.__positionEnd}], "
-                f"Line[Start: {self.__linePositionStart}, End: {self.__linePositionEnd}, Number: {self.__lineNumber}])>")
+                f"Global[Start: {self.__positionStart}, End: {self.__positionStart + self.__length}], "
+                f"Line[Start: {self.__linePositionStart}, End: {self.__linePositionStart + self.__length}, Number: {self.__lineNumber}])>")
 
     def __str__(self):
         return f'| {self.__linePositionStart:>5} | {self.__lineNumber:>5} | {self.__indent:>2} | {self.__type:<50} | {self.__length:>2} | `{self.__text}`'
@@ -242,7 +251,7 @@ class Token(object):
 
     def positionEnd(self):
         """Return position (end) in text"""
-        return self.__positionEnd
+        return self.__positionStart + self.__length
 
     def length(self):
         """Return text length"""
@@ -262,13 +271,39 @@ class Token(object):
         Value can differ from text:
         - text is raw text, provided as string value
         - value is a pre-processed text
+
+        Value is processed on first call
         """
+        if self.__value is Token.__UNDEFINED:
+            self.__value = self.__rule.initValue(self.__text)
         return self.__value
 
     def rule(self):
         """Return token rule"""
         return self.__rule
 
+    def copy(self, positionDelta=0, rowDelta=0, columnDelta=0):
+        """Return a copy of token, moved from given deltas
+
+        Token type and value are not evaluated again
+        Returned token is not linked to previous and next tokens
+        """
+        returned = Token.__new__(Token)
+        returned.__text = self.__text
+        returned.__rule = self.__rule
+        returned.__type = self.__type
+        returned.__positionStart = self.__positionStart + positionDelta
+        returned.__length = self.__length
+        returned.__lineNumber = self.__lineNumber + rowDelta
+        returned.__linePositionStart = self.__linePositionStart + columnDelta
+        returned.__indent = self.__indent
+        returned.__simplifySpaces = self.__simplifySpaces
+        returned.__next = None
+        returned.__previous = None
+        returned.__iText = self.__iText
+        returned.__value = self.__value
+        return returned
+
     def setNext(self, token=None):
         """Set next token"""
         self.__next = token
@@ -315,10 +350,13 @@ class Token(object):
         Otherwise (None value) comparison will use the rule defined by tokenizerule
         """
         if caseInsensitive is None:
-            checkCaseInsensitive = self.__caseInsensitive
+            checkCaseInsensitive = self.__rule.caseInsensitive()
         else:
             checkCaseInsensitive = (caseInsensitive is True)
 
+        if checkCaseInsensitive and self.__iText is None:
+            self.__iText = self.__text.lower()
+
         if isinstance(value, str):
             if checkCaseInsensitive:
                 if doLower:
@@ -461,6 +499,10 @@ class TokenizerRule(object):
     - An optional flag to set rule case insensitive (by default=True) or case sensitive
     """
 
+    # PCRE syntax accepted by python regular expressions with a different meaning (or that can't be
+    # checked): POSIX classes, escape sequences, possessive quantifiers, '{,n}' (literal for PCRE)
+    __PCRE_SYNTAX = re.compile(r'\[:|\\[zZvGKQEXRhHNpPgkc]|[*+?}]\+|\{,')
+
     @staticmethod
     def formatDescription(title=None, description='', example=''):
         """Return a formatted text, ready for tooltip
@@ -624,6 +666,25 @@ class TokenizerRule(object):
             return f"<TokenizerRule({self.__type}, None)>"
         return f"<TokenizerRule({self.__type}, '{self.__regEx.pattern()}')>"
 
+    @staticmethod
+    def __pyRegEx(pattern):
+        """Return a python compiled regular expression for given `pattern`
+
+        Python regular expression are used to check lookahead and lookbehind at
+        token position without converting all text to a QString; return None if
+        pattern may not be interpreted by python as by QRegularExpression (PCRE)
+        """
+        if TokenizerRule.__PCRE_SYNTAX.search(pattern):
+            return None
+
+        try:
+            with warnings.catch_warnings():
+                # python warns about syntax with a future different meaning (like '[[:digit:]]')
+                warnings.simplefilter('error')
+                return re.compile(pattern)
+        except (re.error, Warning):
+            return None
+
     def __setRegEx(self, regEx):
         """Set current regular expression for rule
 
@@ -653,9 +714,19 @@ class TokenizerRule(object):
         #    (?<=xxx)...
         #
         #   Note: lookahead & lookbehind normally don't accept unfixed patterns; here we accept them :-)
+        #         - fixed length lookbehind is checked at token position (atOffset=True)
+        #         - unfixed length lookbehind is checked on text preceding token (atOffset=False), limited
+        #           to Tokenizer.LOOKBEHIND_MAX_LENGTH characters
         if found := re.search(r"^\(\?<([!=])(.*?)\)", pattern):
             # store lookbehind pattern
-            self.__regExLookbehind = QRegularExpression(f"{found.groups()[1]}$", QRegularExpression.UseUnicodePropertiesOption)
+            self.__regExLookbehind = QRegularExpression(f"(?<={found.groups()[1]})", QRegularExpression.UseUnicodePropertiesOption)
+            self.__regExLookbehind.atOffset = True
+            self.__regExLookbehind.pyRegEx = TokenizerRule.__pyRegEx(f"(?<={found.groups()[1]})")
+            if not self.__regExLookbehind.isValid():
+                # not a fixed length pattern
+                self.__regExLookbehind = QRegularExpression(f"{found.groups()[1]}$", QRegularExpression.UseUnicodePropertiesOption)
+                self.__regExLookbehind.atOffset = False
+                self.__regExLookbehind.pyRegEx = TokenizerRule.__pyRegEx(f"(?:{found.groups()[1]})$")
             self.__regExLookbehind.isNegative = (found.groups()[0] == '!')
 
             # remove lookbehind from pattern
@@ -672,9 +743,13 @@ class TokenizerRule(object):
         #    ...(?=xxx)
         #
         #   Note: lookahead & lookbehind normally don't accept unfixed patterns; here we accept them :-)
+        #
+        #   Note: lookahead is checked at token end position (anchored match)
         if found := re.search(r"\(\?([!=])(.*?)\)$", pattern):
             # store lookahead pattern
-            self.__regExLookAhead = QRegularExpression(f"^{found.groups()[1]}", QRegularExpression.UseUnicodePropertiesOption)
+            self.__regExLookAhead = QRegularExpression(f"(?:{found.groups()[1]})", QRegularExpression.UseUnicodePropertiesOption)
+            self.__regExLookAhead.atOffset = True
+            self.__regExLookAhead.pyRegEx = TokenizerRule.__pyRegEx(f"(?:{found.groups()[1]})")
             self.__regExLookAhead.isNegative = (found.groups()[0] == '!')
 
             # remove lookahead from pattern
@@ -914,6 +989,19 @@ class Tokenizer(object):
     POP_RULE_FIRST = 1
     POP_RULE_ALL = 2
 
+    # default cache size: maximum number of tokenized texts, and maximum size (in bytes)
+    CACHE_MAX_SIZE = 500
+    CACHE_MAX_BYTES = 32 * 1024 * 1024
+    # estimated size (in bytes) of a token, used to estimate size of tokenized texts in cache
+    CACHE_TOKEN_BYTES = 256
+
+    # maximum number of characters preceding a token checked by a lookbehind with unfixed length,
+    # and number of characters around a token given to look-around not supported by python regular expressions
+    LOOKBEHIND_MAX_LENGTH = 1024
+
+    # characters encoded with 2 UTF-16 code units: positions from QRegularExpression are not string indexes
+    __REGEX_SURROGATES = re.compile('[\U00010000-\U0010FFFF]')
+
     __TOKEN_INDENT_RULE = TokenizerRule(TokenType.INDENT, '')
     __TOKEN_DEDENT_RULE = TokenizerRule(TokenType.DEDENT, '')
     __TOKEN_WRONGINDENT_RULE = TokenizerRule(TokenType.WRONG_INDENT, '')
@@ -927,6 +1015,13 @@ class Tokenizer(object):
 
         # a global regEx with all rules
         self.__regEx = None
+        # for each capture group of global regEx, index of rule that define group
+        self.__regExGroupRules = []
+        # True if at least one rule have a lookbehind
+        self.__regExLookBehind = False
+
+        # True if positions from QRegularExpression are indexes in tokenized text
+        self.__textIndexes = True
 
         # list of rules with multiline management
         # None if not initialised, otherwise a list
@@ -936,9 +1031,7 @@ class Tokenizer(object):
         self.__needUpdate = True
 
         # a cache to store tokenized code
-        self.__cache = {}
-        self.__cacheOrdered = []
-        self.__cacheLastCleared = time.time()
+        self.__cache = LRUCache(Tokenizer.CACHE_MAX_SIZE, Tokenizer.CACHE_MAX_BYTES)
 
         self.__massUpdate = False
 
@@ -1002,37 +1095,6 @@ class Tokenizer(object):
 
         return None
 
-    def __setCache(self, hashValue, tokens=None):
-        """Update cache content
-
-        If no tokens is provided, consider to update existing hashValue
-        If in self.__massUpdate, do not maintain oredered cache as it's useless '
-        """
-        if tokens is True:
-            # update cache timestamp
-            # ==> assume that hashvalue exists in cache!!
-            self.__cache[hashValue][0] = time.time()
-            if not self.__massUpdate:
-                self.__cache[hashValue][1].resetIndex()
-                index = self.__cacheOrdered.index(hashValue)
-                self.__cacheOrdered.pop(self.__cacheOrdered.index(hashValue))
-                self.__cacheOrdered.append(hashValue)
-        elif tokens is False:
-            # remove from cache
-            # ==> assume that hashvalue exists in cache!!
-            if not self.__massUpdate:
-                index = self.__cacheOrdered.index(hashValue)
-                self.__cacheOrdered.pop(self.__cacheOrdered.index(hashValue))
-                self.__cache.pop(hashValue)
-        else:
-            # add to cache
-            if not self.__massUpdate:
-                self.__cache[hashValue] = [time.time(), tokens, len(self.__cacheOrdered)]
-                self.__cache[hashValue][1].resetIndex()
-                self.__cacheOrdered.append(hashValue)
-            else:
-                self.__cache[hashValue] = [time.time(), tokens, 0]
-
     def indent(self):
         """Return current indent value used to generate INDENT/DEDENT tokens"""
         return self.__indent
@@ -1133,46 +1195,145 @@ class Tokenizer(object):
         return self.__invalidRules
 
     def regEx(self):
-        """Return current built regular expression used for lexer"""
-        def ruleInsensitive(rule):
+        """Return current built regular expression used for lexer
+
+        Each rule is defined in a named group 'pktkR<rule index>'
+        """
+        def rulePattern(index, rule):
             if rule.caseInsensitive():
-                return f"(?i)(?:{rule.regEx().pattern()})"
+                return f"(?<pktkR{index}>(?i:{rule.regEx().pattern()}))"
             else:
-                return rule.regEx().pattern()
+                return f"(?<pktkR{index}>{rule.regEx().pattern()})"
 
         if self.__needUpdate:
             self.clearCache(True)
             self.__needUpdate = False
-            self.__regEx = QRegularExpression('|'.join([ruleInsensitive(rule) for rule in self.__rules]), QRegularExpression.MultilineOption | QRegularExpression.UseUnicodePropertiesOption)
+            self.__regEx = QRegularExpression('|'.join([rulePattern(index, rule) for index, rule in enumerate(self.__rules)]),
+                                              QRegularExpression.MultilineOption | QRegularExpression.UseUnicodePropertiesOption)
+
+            # capture group 0 is full match, then for each rule: rule named group + capture groups defined in rule
+            self.__regExGroupRules = [None]
+            self.__regExLookBehind = False
+            for index, rule in enumerate(self.__rules):
+                self.__regExGroupRules += [index] * (1 + max(0, rule.regEx().captureCount()))
+                if rule.regExLookBehind():
+                    self.__regExLookBehind = True
 
         return self.__regEx
 
+    def __matchLookBehind(self, regex, text, position):
+        """Return True if lookbehind `regex` match `text` preceding `position`"""
+        if not self.__textIndexes:
+            # positions are not indexes in text: check with all text
+            if regex.atOffset:
+                return regex.match(text, position, QRegularExpression.NormalMatch, QRegularExpression.AnchoredMatchOption).hasMatch()
+            return regex.match(text[0:position]).hasMatch()
+
+        start = max(0, position - Tokenizer.LOOKBEHIND_MAX_LENGTH)
+        if regex.pyRegEx is not None:
+            if regex.atOffset:
+                return regex.pyRegEx.match(text, position) is not None
+            return regex.pyRegEx.search(text, start, position) is not None
+        elif regex.atOffset:
+            return regex.match(text[start:position + Tokenizer.LOOKBEHIND_MAX_LENGTH], position - start,
+                               QRegularExpression.NormalMatch, QRegularExpression.AnchoredMatchOption).hasMatch()
+        return regex.match(text[start:position]).hasMatch()
+
+    def __matchLookAhead(self, regex, text, position):
+        """Return True if lookahead `regex` match `text` from `position`"""
+        if not self.__textIndexes:
+            # positions are not indexes in text: check with all text
+            return regex.match(text, position, QRegularExpression.NormalMatch, QRegularExpression.AnchoredMatchOption).hasMatch()
+        elif regex.pyRegEx is not None:
+            return regex.pyRegEx.match(text, position) is not None
+
+        start = max(0, position - Tokenizer.LOOKBEHIND_MAX_LENGTH)
+        return regex.match(text[start:position + Tokenizer.LOOKBEHIND_MAX_LENGTH], position - start,
+                           QRegularExpression.NormalMatch, QRegularExpression.AnchoredMatchOption).hasMatch()
+
+    def __checkLookAround(self, rule, text, match):
+        """Return True if lookbehind and lookahead from given `rule` are verified for given `match` in `text`
+
+        Regular expressions are evaluated at token position with python regular
+        expressions if pattern has the same meaning for python, otherwise with
+        QRegularExpression on text around token: cost doesn't depend on text
+        length; lookbehind with unfixed length is checked on text preceding
+        token, limited to LOOKBEHIND_MAX_LENGTH characters
+        """
+        if regex := rule.regExLookBehind():
+            # need to check if not preceded by
+            if self.__matchLookBehind(regex, text, match.capturedStart(0)):
+                if regex.isNegative:
+                    # there's a match and we have a negative look behind
+                    return False
+            elif not regex.isNegative:
+                # there's no match and we have a positive behind
+                return False
+
+        if regex := rule.regExLookAhead():
+            # need to check if not followed by
+            if self.__matchLookAhead(regex, text, match.capturedEnd(0)):
+                if regex.isNegative:
+                    # there's a match and we have a negative look ahead
+                    return False
+            elif not regex.isNegative:
+                # there's no match and we have a positive look ahead
+                return False
+
+        return True
+
+    def __matchRule(self, text, match):
+        """Return rule for given `match` in `text`, or None if no rule match
+
+        Rule that produced match is given by matched named group; if its
+        lookbehind/lookahead are not verified, check next rules
+        """
+        index = self.__regExGroupRules[match.lastCapturedIndex()]
+        if index is None:
+            return None
+
+        rule = self.__rules[index]
+        if self.__checkLookAround(rule, text, match):
+            return rule
+
+        tokenText = match.captured(0)
+        for rule in self.__rules[index + 1:]:
+            if rule.regEx(True).match(tokenText).hasMatch() and self.__checkLookAround(rule, text, match):
+                return rule
+
+        return None
+
     def clearCache(self, full=True):
         """Clear cache content
 
         If `full`, clear everything
 
-        Otherwise clear oldest values
-        - At least 5 items are kept in cache
-        - At most, 500 items are kept in cache
+        Otherwise do nothing: least recently used items are automatically
+        removed from cache when cache size is reached
         """
-        currentTime = time.time()
         if full:
-            self.__cache = {}
-            self.__cacheOrdered = []
-            self.__cacheLastCleared = currentTime
-        elif self.__massUpdate is False and currentTime - self.__cacheLastCleared > 120:
-            # keep at least, five items
-            for key in self.__cacheOrdered[:-5]:
-                if (currentTime - self.__cache[key][0]) > 120:
-                    # older than than 2minutes, clear it
-                    self.__setCache(key, False)
-
-            if len(self.__cacheOrdered) > 500:
-                keys = self.__cacheOrdered[:-500]
-                for key in keys:
-                    self.__setCache(key, False)
-            self.__cacheLastCleared = currentTime
+            self.__cache.clear()
+
+    def cacheSize(self):
+        """Return a tuple (maximum number of tokenized texts, maximum size in bytes) for cache"""
+        return (self.__cache.maxSize(), self.__cache.maxBytes())
+
+    def setCacheSize(self, maxSize=None, maxBytes=None):
+        """Set cache size
+
+        Given `maxSize` is maximum number of tokenized texts kept in cache
+        Given `maxBytes` is maximum (estimated) size in bytes of tokenized texts kept in cache, 0 for no limit
+
+        None value let current value unchanged
+        """
+        if maxSize is not None:
+            self.__cache.setMaxSize(maxSize)
+        if maxBytes is not None:
+            self.__cache.setMaxBytes(maxBytes)
+
+    def cacheStats(self):
+        """Return cache statistics as a dictionary (see LRUCache.stats())"""
+        return self.__cache.stats()
 
     def simplifyTokenSpaces(self):
         """Return if option 'simplify token spaces' is active or not"""
@@ -1196,19 +1357,39 @@ class Tokenizer(object):
 
         It could be usefull to set the massupdate to True when tokenize() method is called many times in a very short time (tokenize all lines of a file for example)
         to reduce tokenization time
-        In this situation, ordered cache + automatic cleanup is disabled during operation
-
-        Whe nset to true, cache is automatically ordered and cleanup applied
+        In this situation, index of tokens returned from cache is not reset
         """
         if value != self.__massUpdate and isinstance(value, bool):
             self.__massUpdate = value
-            if self.__massUpdate is False:
-                # item[1][0] ==> 1-> item value; 0 -> value time
-                self.__cacheOrdered = [item[0] for item in sorted(self.__cache.items(), key=lambda item: item[1][0])]
-                self.clearCache(False)
-                # reset idnex for all tokens item
-                for item in self.__cache.values():
-                    item[1].resetIndex()
+
+    def __cacheKey(self, text):
+        """Return key used to store tokenized `text` in cache"""
+        return hashlib.blake2b(text.encode(), digest_size=64).digest()
+
+    def __editRange(self, oldText, newText):
+        """Return a tuple (position, charsRemoved, charsAdded) defining modified part from `oldText` to `newText`"""
+        # common prefix length, searched by dichotomy
+        low = 0
+        high = min(len(oldText), len(newText))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if oldText[low:middle] == newText[low:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        position = low
+
+        # common suffix length, in text after common prefix
+        low = 0
+        high = min(len(oldText), len(newText)) - position
+        while low < high:
+            middle = (low + high + 1) // 2
+            if oldText[len(oldText) - middle:len(oldText) - low] == newText[len(newText) - middle:len(newText) - low]:
+                low = middle
+            else:
+                high = middle - 1
+
+        return (position, len(oldText) - position - low, len(newText) - position - low)
 
     def tokenize(self, text):
         """Tokenize given text
@@ -1235,16 +1416,15 @@ class Tokenizer(object):
             # nothing to process (empty string and/or no rules?)
             return Tokens(text, returned)
 
-        hashValue = hashlib.blake2b(text.encode(), digest_size=64).digest()
+        hashValue = self.__cacheKey(text)
 
-        if hashValue in self.__cache:
-            # update
-            self.__setCache(hashValue, True)
-            # need to clear unused items in cache
-            self.clearCache(False)
-            return self.__cache[hashValue][1]
+        if (tokens := self.__cache.get(hashValue)) is not None:
+            if not self.__massUpdate:
+                tokens.resetIndex()
+            return tokens
 
         matchIterator = self.regEx().globalMatch(text)
+        self.__textIndexes = (Tokenizer.__REGEX_SURROGATES.search(text) is None)
 
         Token.resetTokenizer()
 
@@ -1254,125 +1434,228 @@ class Tokenizer(object):
         # iterate all found tokens
         while matchIterator.hasNext():
             match = matchIterator.next()
-
-            for textIndex in range(len(match.capturedTexts())):
-                tokenText = match.captured(textIndex)
-
-                if tokenText == '':
-                    # empty string!?
-                    # no need to check rules for a token
-                    continue
-
-                position = 0
-                for rule in self.__rules:
-                    # We've got a token, we need to determinate token type
-                    # ==> loop on rules, check one by one if token match rule
-                    #     if yes, then token type is known
-
-                    if rule.regEx(True).match(tokenText).hasMatch():
-                        if regex := rule.regExLookBehind():
-                            # need to check if not preceded by
-                            matchedP = regex.match(text[0:match.capturedStart(textIndex)])
-                            if matchedP.hasMatch():
-                                if regex.isNegative:
-                                    # there's a match and we have a negative look behind, search next rule
-                                    continue
-                            else:
-                                if not regex.isNegative:
-                                    # there's no match and we have a positive behind, search next rule
-                                    continue
-
-                        if regex := rule.regExLookAhead():
-                            # need to check if not followed by
-                            matchedF = regex.match(text[match.capturedStart(textIndex) + match.capturedLength(textIndex):])
-                            if matchedF.hasMatch():
-                                if regex.isNegative:
-                                    # there's a match and we have a negative look behind, search next rule
-                                    continue
-                            else:
-                                if not regex.isNegative:
-                                    # there's no match and we have a positive behind, search next rule
-                                    continue
-
-                        token = Token(tokenText, rule,
-                                      match.capturedStart(textIndex),
-                                      match.capturedEnd(textIndex),
-                                      match.capturedLength(textIndex),
-                                      self.__simplifyTokenSpaces)
-
-                        # ---- manage indent/dedent ----
-                        if not rule.ignoreIndent() and indent != 0 and (re.search(r'^\s*$', tokenText) is None) and token.column() == 1:
-                            # indent value is not zero => means that indent are managed
-                            # token is not empty string (only spaces and/or newline)
-                            if indent < 0 and token.indent() > 0:
-                                # if indent is negative, define indent value with first indented token
-                                indent = token.indent()
-
-                            if indent > 0:
-                                if previousIndent < token.indent():
-                                    # token indent is greater than previous indent value
-                                    # need to add INDENT token
-                                    nbIndent, nbWrongIndent = divmod(token.indent() - previousIndent, indent)
-
-                                    for numIndent in range(nbIndent):
-                                        pStart = token.positionStart() + indent * numIndent
-                                        pEnd = token.positionStart() + indent * (numIndent + 1)
-                                        length = pEnd-pStart
-
-                                        tokenIndent = Token(' ' * indent, Tokenizer.__TOKEN_INDENT_RULE, pStart, pEnd, length)
-                                        tokenIndent.setPrevious(previousToken)
-                                        returned.append(tokenIndent)
-                                        previousToken = tokenIndent
-
-                                    if nbWrongIndent > 0:
-                                        pStart = token.positionStart() + indent * (numIndent + 1)
-                                        pEnd = pStart+nbWrongIndent
-
-                                        tokenIndent = Token(' ' * nbWrongIndent, Tokenizer.__TOKEN_WRONGINDENT_RULE, pStart, pEnd, nbWrongIndent)
-                                        tokenIndent.setPrevious(previousToken)
-                                        returned.append(tokenIndent)
-                                        previousToken = tokenIndent
-
-                                elif previousIndent > token.indent():
-                                    # token indent is lower than previous indent value
-                                    # need to add DEDENT token
-                                    nbIndent, nbWrongIndent = divmod(previousIndent - token.indent(), indent)
-
-                                    for numIndent in range(nbIndent):
-                                        pStart = token.positionStart() + indent * numIndent
-                                        pEnd = token.positionStart() + indent * (numIndent + 1)
-                                        length = pEnd-pStart
-
-                                        tokenIndent = Token(' ' * indent, Tokenizer.__TOKEN_DEDENT_RULE, pStart, pEnd, length)
-                                        tokenIndent.setPrevious(previousToken)
-                                        returned.append(tokenIndent)
-                                        previousToken = tokenIndent
-
-                                    if nbWrongIndent > 0:
-                                        pStart = token.positionStart() + indent * (numIndent + 1)
-                                        pEnd = pStart+nbWrongIndent
-
-                                        tokenIndent = Token(' ' * nbWrongIndent, Tokenizer.__TOKEN_WRONGDEDENT_RULE, pStart, pEnd, nbWrongIndent)
-                                        tokenIndent.setPrevious(previousToken)
-                                        returned.append(tokenIndent)
-                                        previousToken = tokenIndent
-
-                                previousIndent = token.indent()
-
-                        token.setPrevious(previousToken)
-                        if previousToken is not None:
-                            previousToken.setNext(token)
-                        returned.append(token)
-                        previousToken = token
-
-                        # token type is found:
-                        # => do not need to continue to check for an another token type
-                        break
+            tokenText = match.captured(0)
+
+            if tokenText == '':
+                # empty string!?
+                # no need to check rules for a token
+                continue
+
+            # We've got a token, we need to determinate token type
+            # ==> matched named group provide rule
+            rule = self.__matchRule(text, match)
+            if rule is None:
+                continue
+
+            token = Token(tokenText, rule,
+                          match.capturedStart(0),
+                          match.capturedEnd(0),
+                          match.capturedLength(0),
+                          self.__simplifyTokenSpaces)
+
+            # ---- manage indent/dedent ----
+            if not rule.ignoreIndent() and indent != 0 and (re.search(r'^\s*$', tokenText) is None) and token.column() == 1:
+                # indent value is not zero => means that indent are managed
+                # token is not empty string (only spaces and/or newline)
+                if indent < 0 and token.indent() > 0:
+                    # if indent is negative, define indent value with first indented token
+                    indent = token.indent()
+
+                if indent > 0:
+                    if previousIndent < token.indent():
+                        # token indent is greater than previous indent value
+                        # need to add INDENT token
+                        nbIndent, nbWrongIndent = divmod(token.indent() - previousIndent, indent)
+
+                        for numIndent in range(nbIndent):
+                            pStart = token.positionStart() + indent * numIndent
+                            pEnd = token.positionStart() + indent * (numIndent + 1)
+                            length = pEnd-pStart
+
+                            tokenIndent = Token(' ' * indent, Tokenizer.__TOKEN_INDENT_RULE, pStart, pEnd, length)
+                            tokenIndent.setPrevious(previousToken)
+                            returned.append(tokenIndent)
+                            previousToken = tokenIndent
+
+                        if nbWrongIndent > 0:
+                            pStart = token.positionStart() + indent * (numIndent + 1)
+                            pEnd = pStart+nbWrongIndent
+
+                            tokenIndent = Token(' ' * nbWrongIndent, Tokenizer.__TOKEN_WRONGINDENT_RULE, pStart, pEnd, nbWrongIndent)
+                            tokenIndent.setPrevious(previousToken)
+                            returned.append(tokenIndent)
+                            previousToken = tokenIndent
+
+                    elif previousIndent > token.indent():
+                        # token indent is lower than previous indent value
+                        # need to add DEDENT token
+                        nbIndent, nbWrongIndent = divmod(previousIndent - token.indent(), indent)
+
+                        for numIndent in range(nbIndent):
+                            pStart = token.positionStart() + indent * numIndent
+                            pEnd = token.positionStart() + indent * (numIndent + 1)
+                            length = pEnd-pStart
+
+                            tokenIndent = Token(' ' * indent, Tokenizer.__TOKEN_DEDENT_RULE, pStart, pEnd, length)
+                            tokenIndent.setPrevious(previousToken)
+                            returned.append(tokenIndent)
+                            previousToken = tokenIndent
+
+                        if nbWrongIndent > 0:
+                            pStart = token.positionStart() + indent * (numIndent + 1)
+                            pEnd = pStart+nbWrongIndent
+
+                            tokenIndent = Token(' ' * nbWrongIndent, Tokenizer.__TOKEN_WRONGDEDENT_RULE, pStart, pEnd, nbWrongIndent)
+                            tokenIndent.setPrevious(previousToken)
+                            returned.append(tokenIndent)
+                            previousToken = tokenIndent
+
+                    previousIndent = token.indent()
+
+            token.setPrevious(previousToken)
+            if previousToken is not None:
+                previousToken.setNext(token)
+            returned.append(token)
+            previousToken = token
 
         # add
-        self.__setCache(hashValue, Tokens(text, returned))
+        tokens = Tokens(text, returned)
+        self.__cache.set(hashValue, tokens, sys.getsizeof(text) + len(returned) * Tokenizer.CACHE_TOKEN_BYTES)
+
+        return tokens
+
+    def retokenize(self, tokens, text, position=None, charsRemoved=None, charsAdded=None):
+        """Tokenize given `text`, being a modified version of text from given `tokens`
+
+        Given `tokens` (Tokens) must be returned by a previous tokenization made
+        with this tokenizer
+
+        Given `position`, `charsRemoved` and `charsAdded` define the modified part
+        of text (as provided by QTextDocument.contentsChange() signal); if not
+        provided, modified part is determined from differences between texts
+
+        Text is tokenized from its start (a token preceding modified part, whatever
+        its position, can be extended by modification), and tokenization stops on
+        first token after modified part identical to a previous token (stable
+        boundary); next tokens are then taken from given `tokens`, with updated
+        positions
+
+        Text is fully tokenized if given `tokens` are not from current rules, or
+        if indent are managed
+
+        Return a Tokens object
+        """
+        if not isinstance(text, str):
+            raise EInvalidType("Given `text` must be a <str>")
+        elif not isinstance(tokens, Tokens):
+            raise EInvalidType("Given `tokens` must be a <Tokens>")
+
+        oldText = tokens.text()
+
+        if position is None:
+            position, charsRemoved, charsAdded = self.__editRange(oldText, text)
+        elif not (isinstance(position, int) and isinstance(charsRemoved, int) and isinstance(charsAdded, int)):
+            raise EInvalidType("Given `position`, `charsRemoved` and `charsAdded` must be <int>")
+        elif (position < 0 or charsRemoved < 0 or charsAdded < 0 or position + charsRemoved > len(oldText) or
+              len(text) - len(oldText) != charsAdded - charsRemoved):
+            raise EInvalidValue("Given `position`, `charsRemoved` and `charsAdded` doesn't match texts")
+
+        if self.__needUpdate or self.__indent != 0 or text == "" or len(self.__rules) == 0 or tokens.length() == 0:
+            # rules has been modified, or indent are managed, or nothing to reuse
+            return self.tokenize(text)
+
+        regEx = self.regEx()
+        self.__textIndexes = (Tokenizer.__REGEX_SURROGATES.search(text) is None)
+
+        if (self.__regExLookBehind and not self.__textIndexes) or self.__cache.get(self.__cacheKey(oldText)) is not tokens:
+            # a rule lookbehind is checked with all text preceding token, or given tokens are not
+            # from current rules (cache is cleared when rules are modified)
+            return self.tokenize(text)
+
+        hashValue = self.__cacheKey(text)
+
+        if (returnedTokens := self.__cache.get(hashValue)) is not None:
+            if not self.__massUpdate:
+                returnedTokens.resetIndex()
+            return returnedTokens
+
+        oldTokens = tokens.list()
+        delta = charsAdded - charsRemoved
+        editEnd = position + charsAdded
+        if self.__regExLookBehind:
+            # lookbehind of tokens following modified part can be impacted by modification
+            stableStart = editEnd + Tokenizer.LOOKBEHIND_MAX_LENGTH
+        else:
+            stableStart = editEnd
+
+        # search first token ending in or after modified part
+        low = 0
+        high = len(oldTokens)
+        while low < high:
+            middle = (low + high) // 2
+            if oldTokens[middle].positionEnd() < position:
+                low = middle + 1
+            else:
+                high = middle
+        oldIndex = low
+
+        # tokens before modified part can't be kept: a regular expression can read text up to
+        # modified part and return, for the same position, a longer token (for example, a
+        # CDATA token that is closed by modification)
+        returned = []
+        Token.resetTokenizer()
+
+        matchIterator = regEx.globalMatch(text)
+
+        while matchIterator.hasNext():
+            match = matchIterator.next()
+            tokenText = match.captured(0)
+
+            if tokenText == '':
+                continue
+
+            rule = self.__matchRule(text, match)
+            if rule is None:
+                continue
+
+            token = Token(tokenText, rule,
+                          match.capturedStart(0),
+                          match.capturedEnd(0),
+                          match.capturedLength(0),
+                          self.__simplifyTokenSpaces)
+            returned.append(token)
+
+            if token.positionStart() <= stableStart:
+                # token is in modified part (or just after)
+                continue
+
+            # search previous token starting at the same position
+            oldPosition = token.positionStart() - delta
+            while oldIndex < len(oldTokens) and oldTokens[oldIndex].positionStart() < oldPosition:
+                oldIndex += 1
+
+            if oldIndex < len(oldTokens):
+                oldToken = oldTokens[oldIndex]
+                if oldToken.positionStart() == oldPosition and oldToken.length() == token.length() and oldToken.rule() is token.rule():
+                    # stable boundary: text after token is not modified, following tokens are the same
+                    rowDelta = token.row() - oldToken.row()
+                    if token.type() == TokenType.NEWLINE:
+                        columnDelta = 0
+                    else:
+                        columnDelta = token.column() - oldToken.column()
+
+                    for oldToken in oldTokens[oldIndex + 1:]:
+                        returned.append(oldToken.copy(delta, rowDelta, columnDelta))
+                        if oldToken.type() == TokenType.NEWLINE:
+                            # column of tokens on next lines are not impacted by modification
+                            columnDelta = 0
+                    break
+
+        for index in range(1, len(returned)):
+            returned[index].setPrevious(returned[index - 1])
+            returned[index - 1].setNext(returned[index])
 
-        # need to clear unused items in cache
-        self.clearCache(False)
+        returnedTokens = Tokens(text, returned)
+        self.__cache.set(hashValue, returnedTokens, sys.getsizeof(text) + len(returned) * Tokenizer.CACHE_TOKEN_BYTES)
 
-        return self.__cache[hashValue][1]
+        return returnedTokens
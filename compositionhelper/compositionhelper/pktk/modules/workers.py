@@ -22,6 +22,10 @@
 #       A single worker that will do something in multithreaded process
 #       Basically, WorkerPool will instanciate one Worker per thread
 #
+# - WorkerCoalescing:
+#       Execute tasks in a thread, one at a time, keeping only the result of
+#       latest submitted task (stale tasks are cancelled)
+#
 # -----------------------------------------------------------------------------
 
 import re
@@ -338,3 +342,124 @@ class WorkerPool(QObject):
         self.waitProcessed()
         self.__mapResults = WorkerPool.__MAP_MODE_OFF
         return self.__results
+
+
+class WorkerCoalescingSignals(QObject):
+    finished = Signal(int, object)      # a task has been processed (task id, result)
+
+
+class WorkerCoalescingTask(QRunnable):
+    """A task executed by WorkerCoalescing
+
+    Not aimed to be instancied directly, just use WorkerCoalescing
+    """
+
+    def __init__(self, coalescing, taskId, callback, *callbackArgv):
+        super(WorkerCoalescingTask, self).__init__()
+        self.__coalescing = coalescing
+        self.__taskId = taskId
+        self.__callback = callback
+        self.__callbackArgv = callbackArgv
+        self.signals = WorkerCoalescingSignals()
+
+    def id(self):
+        """Return task id"""
+        return self.__taskId
+
+    def isCancelled(self):
+        """Return True if task is stale (cancelled, or a newer task has been submitted)
+
+        Long callbacks should check it regularly and exit as soon as possible when True
+        """
+        return self.__coalescing.isStale(self.__taskId)
+
+    @pyqtSlot()
+    def run(self):
+        """Execute callback, if task is not already stale"""
+        result = None
+        if not self.isCancelled():
+            result = self.__callback(self, *self.__callbackArgv)
+        self.signals.finished.emit(self.__taskId, result)
+
+
+class WorkerCoalescing(QObject):
+    """Execute tasks in a thread, keeping only the latest request
+
+    - Only one task is executed at a time
+    - When a task is submitted while another one is running, it's queued; if a
+      task was already queued, it's replaced (coalesced) by the new one
+    - When a task is submitted, all previous tasks become stale: a running stale
+      task result is ignored
+
+    Callback is called with the task (WorkerCoalescingTask) as first argument,
+    allowing to check if task has been cancelled
+
+    Signal `finished` is emitted with result of latest submitted task only
+    """
+    finished = Signal(object)
+
+    def __init__(self, parent=None):
+        super(WorkerCoalescing, self).__init__(parent)
+        self.__threadpool = QThreadPool()
+        self.__threadpool.setMaxThreadCount(1)
+        self.__lastTaskId = 0
+        self.__running = None
+        self.__pending = None
+
+    def __start(self, task):
+        """Start given task"""
+        self.__running = task
+        task.signals.finished.connect(self.__onFinished)
+        task.setAutoDelete(True)
+        self.__threadpool.start(task)
+
+    def __onFinished(self, taskId, result):
+        """A task has been processed"""
+        self.__running = None
+
+        if taskId == self.__lastTaskId:
+            self.finished.emit(result)
+
+        if self.__pending is not None:
+            task = self.__pending
+            self.__pending = None
+            self.__start(task)
+
+    def isStale(self, taskId):
+        """Return True if given `taskId` is not the latest submitted task"""
+        return taskId != self.__lastTaskId
+
+    def isRunning(self):
+        """Return True if a task is currently running or pending"""
+        return self.__running is not None or self.__pending is not None
+
+    def submit(self, callback, *callbackArgv):
+        """Submit a new task, executing `callback` with optional `*callbackArgv` arguments
+
+        Return task id
+        """
+        self.__lastTaskId += 1
+        task = WorkerCoalescingTask(self, self.__lastTaskId, callback, *callbackArgv)
+
+        if self.__running is None:
+            self.__start(task)
+        else:
+            # replace pending task if any
+            self.__pending = task
+
+        return self.__lastTaskId
+
+    def cancel(self):
+        """Cancel all tasks
+
+        Pending task is removed, running task become stale and its result will be ignored
+        """
+        self.__lastTaskId += 1
+        self.__pending = None
+
+    def waitDone(self, msecs=-1):
+        """Wait until running task is finished
+
+        Return True if running task is finished, otherwise False (timeout)
+        """
+        return self.__threadpool.waitForDone(msecs)
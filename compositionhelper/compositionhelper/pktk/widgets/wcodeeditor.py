@@ -994,7 +994,11 @@ class WCodeEditor(QPlainTextEdit):
             tokens = userData.tokens()
         elif self.__languageDef is not None:
             # text changed, update tokens
-            tokens = self.__languageDef.tokenizer().tokenize(blockText)
+            if isinstance(userData.tokens(), Tokens):
+                # only modified part of text need to be tokenized again
+                tokens = self.__languageDef.tokenizer().retokenize(userData.tokens(), blockText)
+            else:
+                tokens = self.__languageDef.tokenizer().tokenize(blockText)
             userData.setTokens(tokens)
             userData.setText(blockText)
         else:
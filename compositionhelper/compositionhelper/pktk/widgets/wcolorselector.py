@@ -3,11 +3,17 @@
 import math
 import re
 
-from krita import (
-        Krita,
-        Palette,
-        Swatch
-    )
+try:
+    from krita import (
+            Krita,
+            Palette,
+            Swatch
+        )
+except ImportError:
+    # not executed from Krita: palettes are not available
+    Krita = None
+    Palette = None
+    Swatch = object
 from PyQt5.Qt import *
 from PyQt5.QtCore import (
         pyqtSignal as Signal
@@ -2029,7 +2035,7 @@ class WColorPalette(QWidget):
             if asQColor:
                 if not color.isValid():
                     return None
-                if Krita.instance().activeWindow():
+                if Krita is not None and Krita.instance().activeWindow():
                     if Krita.instance().activeWindow().activeView():
                         return color.color().colorForCanvas(Krita.instance().activeWindow().activeView().canvas())
             else:
@@ -2052,7 +2058,7 @@ class WColorPalette(QWidget):
 
         def setPalette(self, palette):
             """Set current palette"""
-            if isinstance(palette, Palette):
+            if Palette is not None and isinstance(palette, Palette):
                 self.__palette = palette
                 self.__nbColors = self.__palette.colorsCountTotal()
                 self.__columns = self.__palette.columnCount()
@@ -2149,7 +2155,15 @@ QScrollArea > QWidget > QScrollBar { background: 0; }
         If `palettes` is None, widget will manage and expose all Krita's palettes
         If `palettes` is an empty list, widget will manage the "Default" palette only
         If `palettes` is a list(<str>), widget will manage the palettes from list
+
+        If not executed from Krita, there's no palette
         """
+        if Krita is None:
+            self.__palettes = {}
+            self.__cbPalettes.clear()
+            self.__cbPalettes.setVisible(False)
+            return
+
         allPalettes = Krita.instance().resources("palette")
 
         if palettes is None:
@@ -2183,6 +2197,90 @@ QScrollArea > QWidget > QScrollBar { background: 0; }
             self.setPalette(list(self.__palettes.keys())[0])
 
 
+class WColorPickerLayout(object):
+    """Convert a color picker layout (see WColorPicker.setOptionLayout()) from/to
+    a dictionary of options
+
+    No widget is built: can be used to store/restore a layout in settings
+
+    Returned options dictionary keys are:
+        'colorRGB', 'colorCMYK', 'colorHSV', 'colorHSL', 'colorAlpha',
+        'colorCssRGB', 'colorCssRGBAlphaChecked', 'colorPalette', 'colorWheel',
+        'colorPreview', 'colorRGB%', 'colorCMYK%', 'colorHSV%', 'colorHSL%',
+        'colorAlpha%', 'compactUi'
+            <bool> values
+        'colorPaletteName'
+            <str> value
+        'colorCombination'
+            <int> value (see WColorComplementary COLOR_COMBINATION_xxx values)
+        'layoutOrientation'
+            <int> value (see WColorPicker OPTION_ORIENTATION_xxx values)
+
+    For 'colorPaletteName', 'colorCombination' and 'layoutOrientation', value is
+    None when not defined in layout
+    """
+
+    # boolean options, in layout order
+    FLAGS = ('colorRGB',
+             'colorCMYK',
+             'colorHSV',
+             'colorHSL',
+             'colorAlpha',
+             'colorCssRGB',
+             'colorCssRGBAlphaChecked',
+             'colorPalette',
+             'colorWheel',
+             'colorPreview',
+             'colorRGB%',
+             'colorCMYK%',
+             'colorHSV%',
+             'colorHSL%',
+             'colorAlpha%',
+             'compactUi')
+
+    @staticmethod
+    def toOptions(layout):
+        """Return a dictionary of options from given `layout` (list of string)"""
+        if not isinstance(layout, (list, tuple)):
+            raise EInvalidType('Given `layout` must be a <list> or <tuple>')
+
+        returned = {flag: (flag in layout) for flag in WColorPickerLayout.FLAGS}
+        returned['colorPaletteName'] = None
+        returned['colorCombination'] = None
+        returned['layoutOrientation'] = None
+
+        for item in layout:
+            if r := re.match('colorPalette:(.*)', item, re.IGNORECASE):
+                returned['colorPaletteName'] = r.groups()[0]
+            elif r := re.match(r'colorCombination:(\d)', item, re.IGNORECASE):
+                returned['colorCombination'] = int(r.groups()[0])
+            elif r := re.match(r'layoutOrientation:(\d)', item, re.IGNORECASE):
+                returned['layoutOrientation'] = int(r.groups()[0])
+
+        return returned
+
+    @staticmethod
+    def fromOptions(options):
+        """Return a layout (list of string) from given `options` dictionary
+
+        Missing boolean options are considered as False, missing (or None) other
+        options are not defined in layout
+        """
+        if not isinstance(options, dict):
+            raise EInvalidType('Given `options` must be a <dict>')
+
+        returned = [flag for flag in WColorPickerLayout.FLAGS if options.get(flag, False)]
+
+        if options.get('colorCombination', None) is not None:
+            returned.append(f"colorCombination:{options['colorCombination']}")
+        if options.get('colorPaletteName', None) is not None:
+            returned.append(f"colorPalette:{options['colorPaletteName']}")
+        if options.get('layoutOrientation', None) is not None:
+            returned.append(f"layoutOrientation:{options['layoutOrientation']}")
+
+        return returned
+
+
 class WColorPicker(QWidget):
     """A color picker
 
@@ -3303,47 +3401,27 @@ class WColorPicker(QWidget):
 
     def optionLayout(self):
         """Return a list of current layout options status"""
-        returned = []
-        if self.__optionShowColorRGB:
-            returned.append('colorRGB')
-        if self.__optionShowColorCMYK:
-            returned.append('colorCMYK')
-        if self.__optionShowColorHSV:
-            returned.append('colorHSV')
-        if self.__optionShowColorHSL:
-            returned.append('colorHSL')
-        if self.__optionShowColorAlpha:
-            returned.append('colorAlpha')
-        if self.__optionShowColorCssRGB:
-            returned.append('colorCssRGB')
-        if self.__colorCssEdit.alphaButtonChecked():
-            returned.append('colorCssRGBAlphaChecked')
-        if self.__optionShowColorPalette:
-            returned.append('colorPalette')
-        if self.__optionShowColorWheel:
-            returned.append('colorWheel')
-        if self.__optionShowPreviewColor:
-            returned.append('colorPreview')
-
-        if self.__optionDisplayAsPctRGB:
-            returned.append('colorRGB%')
-        if self.__optionDisplayAsPctCMYK:
-            returned.append('colorCMYK%')
-        if self.__optionDisplayAsPctHSV:
-            returned.append('colorHSV%')
-        if self.__optionDisplayAsPctHSL:
-            returned.append('colorHSL%')
-        if self.__optionDisplayAsPctAlpha:
-            returned.append('colorAlpha%')
-
-        if self.__optionCompactUi:
-            returned.append('compactUi')
-
-        returned.append(f"colorCombination:{self.__optionShowColorCombination}")
-        returned.append(f"colorPalette:{self.__colorPalette.palette()}")
-        returned.append(f"layoutOrientation:{self.__optionOrientation}")
-
-        return returned
+        return WColorPickerLayout.fromOptions({
+                'colorRGB': self.__optionShowColorRGB,
+                'colorCMYK': self.__optionShowColorCMYK,
+                'colorHSV': self.__optionShowColorHSV,
+                'colorHSL': self.__optionShowColorHSL,
+                'colorAlpha': self.__optionShowColorAlpha,
+                'colorCssRGB': self.__optionShowColorCssRGB,
+                'colorCssRGBAlphaChecked': self.__colorCssEdit.alphaButtonChecked(),
+                'colorPalette': self.__optionShowColorPalette,
+                'colorWheel': self.__optionShowColorWheel,
+                'colorPreview': self.__optionShowPreviewColor,
+                'colorRGB%': self.__optionDisplayAsPctRGB,
+                'colorCMYK%': self.__optionDisplayAsPctCMYK,
+                'colorHSV%': self.__optionDisplayAsPctHSV,
+                'colorHSL%': self.__optionDisplayAsPctHSL,
+                'colorAlpha%': self.__optionDisplayAsPctAlpha,
+                'compactUi': self.__optionCompactUi,
+                'colorCombination': self.__optionShowColorCombination,
+                'colorPaletteName': self.__colorPalette.palette(),
+                'layoutOrientation': self.__optionOrientation
+            })
 
     def setOptionLayout(self, layout):
         """Set layout from given options
@@ -3375,41 +3453,39 @@ class WColorPicker(QWidget):
             'colorCombination:N'        Display complementary color combination (number: see WColorComplementary COLOR_COMBINATION_xxx values)
             'layoutOrientation:N'       Define orientation horizontal/vertical (number: see WColorPicker OPTION_ORIENTATION_xxx values)
         """
-        if not (isinstance(layout, list) or isinstance(layout, tuple)):
-            raise EInvalidType('Given `layout` must be a <list> or <tuple>')
+        options = WColorPickerLayout.toOptions(layout)
 
         self.__inUpdate = True
 
-        self.setOptionShowColorRGB('colorRGB' in layout)
-        self.setOptionShowColorCMYK('colorCMYK' in layout)
-        self.setOptionShowColorHSV('colorHSV' in layout)
-        self.setOptionShowColorHSL('colorHSL' in layout)
-        self.setOptionShowColorAlpha('colorAlpha' in layout)
-        self.setOptionShowCssRgb('colorCssRGB' in layout)
-        self.setOptionShowCssRgbAlphaChecked('colorCssRGBAlphaChecked' in layout)
-        self.setOptionShowColorPalette('colorPalette' in layout)
-        self.setOptionShowColorWheel('colorWheel' in layout)
-        self.setOptionShowPreviewColor('colorPreview' in layout)
-
-        self.setOptionDisplayAsPctColorRGB('colorRGB%' in layout)
-        self.setOptionDisplayAsPctColorCMYK('colorCMYK%' in layout)
-        self.setOptionDisplayAsPctColorHSV('colorHSV%' in layout)
-        self.setOptionDisplayAsPctColorHSL('colorHSL%' in layout)
-        self.setOptionDisplayAsPctColorAlpha('colorAlpha%' in layout)
-
-        if 'compactUi' in layout:
+        self.setOptionShowColorRGB(options['colorRGB'])
+        self.setOptionShowColorCMYK(options['colorCMYK'])
+        self.setOptionShowColorHSV(options['colorHSV'])
+        self.setOptionShowColorHSL(options['colorHSL'])
+        self.setOptionShowColorAlpha(options['colorAlpha'])
+        self.setOptionShowCssRgb(options['colorCssRGB'])
+        self.setOptionShowCssRgbAlphaChecked(options['colorCssRGBAlphaChecked'])
+        self.setOptionShowColorPalette(options['colorPalette'])
+        self.setOptionShowColorWheel(options['colorWheel'])
+        self.setOptionShowPreviewColor(options['colorPreview'])
+
+        self.setOptionDisplayAsPctColorRGB(options['colorRGB%'])
+        self.setOptionDisplayAsPctColorCMYK(options['colorCMYK%'])
+        self.setOptionDisplayAsPctColorHSV(options['colorHSV%'])
+        self.setOptionDisplayAsPctColorHSL(options['colorHSL%'])
+        self.setOptionDisplayAsPctColorAlpha(options['colorAlpha%'])
+
+        if options['compactUi']:
             self.setConstraintSize(True)
             self.setOptionCompactUi(True)
         else:
             self.setOptionCompactUi(False)
 
-        for item in layout:
-            if r := re.match('colorPalette:(.*)', item, re.IGNORECASE):
-                self.setOptionColorPalette(r.groups()[0])
-            elif r := re.match(r'colorCombination:(\d)', item, re.IGNORECASE):
-                self.setOptionShowColorCombination(int(r.groups()[0]))
-            elif r := re.match(r'layoutOrientation:(\d)', item, re.IGNORECASE):
-                self.setOptionOrientation(int(r.groups()[0]))
+        if options['colorPaletteName'] is not None:
+            self.setOptionColorPalette(options['colorPaletteName'])
+        if options['colorCombination'] is not None:
+            self.setOptionShowColorCombination(options['colorCombination'])
+        if options['layoutOrientation'] is not None:
+            self.setOptionOrientation(options['layoutOrientation'])
 
         self.__inUpdate = False
         self.__updateSize()
@@ -14,7 +14,12 @@ import PyQt5.uic
 import os.path
 import sys
 
-from krita import Resource
+try:
+    from krita import Resource
+except ImportError:
+    # not executed from Krita: Krita resources are not available
+    class Resource(object):
+        pass
 
 from PyQt5.Qt import *
 from PyQt5.QtCore import (
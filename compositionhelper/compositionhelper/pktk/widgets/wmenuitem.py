@@ -55,11 +55,17 @@ from PyQt5.QtWidgets import (
         QWidget
     )
 
-from krita import PresetChooser
+try:
+    from krita import PresetChooser
+except ImportError:
+    # not executed from Krita: brushes preset selector is not available
+    PresetChooser = None
 
 from .wcolorselector import WColorPicker
 from .wmanagedresourcesselector import WManagedResourcesSelector
 
+from ..pktk import *
+
 
 class WMenuSlider(QWidgetAction):
     """Encapsulate a slider as a menu item"""
@@ -217,6 +223,9 @@ class WMenuBrushesPresetSelector(QWidgetAction):
     def __init__(self, parent=None):
         super(WMenuBrushesPresetSelector, self).__init__(parent)
 
+        if PresetChooser is None:
+            raise EInvalidStatus("Brushes preset selector is only available from Krita")
+
         self.__presetChooser = PresetChooser()
         self.__presetChooser.setMinimumSize(350, 400)
 
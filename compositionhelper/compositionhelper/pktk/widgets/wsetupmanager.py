@@ -69,7 +69,9 @@ class SetupManagerBase(QObject):
         self.__position = 999999
         self.__node = None
         self.__iconUri = 'pktk:tune'
-        self.__icon = buildIcon(self.__iconUri)
+        # icon is built from uri (or decoded from base64 value) only when needed
+        self.__icon = None
+        self.__iconB64 = ''
         self.__name = ''
         self.__comments = ''
         self.__dateCreated = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -137,37 +139,69 @@ class SetupManagerBase(QObject):
         return self.__iconUri
 
     def setIconUri(self, uri, icon=None):
-        """Set item image uri"""
+        """Set item image uri
+
+        If no `icon` is provided, icon will be built from uri when needed
+        """
         updated = False
         if isinstance(uri, QUriIcon):
             updated = (self.__iconUri != uri.uri())
             self.__iconUri = uri.uri()
             self.__icon = uri.icon()
+            self.__iconB64 = ''
         elif isinstance(uri, str):
             updated = (self.__iconUri != uri)
             self.__iconUri = uri
-            if icon is None:
-                try:
-                    icon = buildIcon(uri)
-                    self.__icon = icon
-                except Exception as e:
-                    # not able to create icon?
-                    # ignore case
-                    pass
-            else:
-                self.__icon = icon
+            self.__icon = icon
+            self.__iconB64 = ''
 
         if updated:
             self.applyUpdate('iconUri')
 
+    def setIconUriB64(self, uri, iconB64):
+        """Set item image uri, with icon provided as a base64 string
+
+        Icon is decoded only when needed
+        """
+        if isinstance(uri, str) and isinstance(iconB64, str):
+            updated = (self.__iconUri != uri)
+            self.__iconUri = uri
+            self.__icon = None
+            self.__iconB64 = iconB64
+
+            if updated:
+                self.applyUpdate('iconUri')
+
     def icon(self):
         """Return icon (defined directly or built from uri)"""
+        if self.__icon is None:
+            try:
+                if self.__iconB64 != '':
+                    self.__icon = QIconPickable()
+                    self.__icon.fromB64(self.__iconB64)
+                else:
+                    self.__icon = buildIcon(self.__iconUri)
+            except Exception as e:
+                # not able to create icon?
+                # ignore case
+                self.__icon = None
+
+            if self.__icon is None:
+                # return an empty icon
+                self.__icon = QIcon()
         return self.__icon
 
+    def iconB64(self):
+        """Return icon as a base64 string"""
+        if self.__iconB64 == '':
+            self.__iconB64 = QIconPickable(self.icon()).toB64()
+        return self.__iconB64
+
     def setIcon(self, icon):
         if isinstance(icon, (QIcon, QIconPickable)):
             self.__iconUri = QIconPickable(icon).toB64()
             self.__icon = QIcon(icon)
+            self.__iconB64 = ''
             self.applyUpdate('iconUri')
 
     def dateCreated(self):
@@ -255,7 +289,7 @@ class SetupManagerSetup(SetupManagerBase):
         uriIcon = self.iconUri()
         if re.search("^(pktk:|krita:|qicon:b64=)", uriIcon) is None:
             # an external file; serialize ICON in a base64 format
-            icon = QIconPickable(self.icon()).toB64()
+            icon = self.iconB64()
 
         returned = {
                 SetupManagerBase.KEY_UUID: self.id(),
@@ -301,9 +335,8 @@ class SetupManagerSetup(SetupManagerBase):
 
                 if iconB64 != '':
                     # if a b64 icon is provided, use it (uri is then provided as an information)
-                    icon = QIconPickable()
-                    icon.fromB64(iconB64)
-                    self.setIconUri(QUriIcon(value[SetupManagerBase.KEY_ICON_URI], icon))
+                    # icon is decoded only when needed
+                    self.setIconUriB64(value[SetupManagerBase.KEY_ICON_URI], iconB64)
                 else:
                     self.setIconUri(value[SetupManagerBase.KEY_ICON_URI])
 
@@ -1321,6 +1354,97 @@ class SetupManagerModel(QAbstractItemModel):
         return self.__rootNode
 
 
+class SetupManagerModelImport(QObject):
+    """Import data in a SetupManagerModel, by chunks
+
+    Setups and groups definitions are converted by chunks from event loop (UI
+    stay responsive while importing large setups files), then model is updated
+    once all items are available
+
+    As model is not modified until import is finished, cancelling an import
+    let model unchanged
+    """
+    # import progress: (number of processed items, total number of items)
+    progress = Signal(int, int)
+    # import is finished: True if data has been imported, False if not (error or cancelled)
+    finished = Signal(bool)
+
+    CHUNK_SIZE = 250
+
+    def __init__(self, model, data, mergeWithExistingData=False, chunkSize=None, parent=None):
+        super(SetupManagerModelImport, self).__init__(parent)
+
+        if not isinstance(model, SetupManagerModel):
+            raise EInvalidType("Given `model` must be a <SetupManagerModel>")
+        elif not isinstance(data, dict):
+            raise EInvalidType("Given `data` must be a <dict>")
+        elif 'setups' not in data or 'groups' not in data or 'nodes' not in data:
+            raise EInvalidValue("Given `data` must contains following keys: 'setups', 'groups', 'nodes'")
+
+        if chunkSize is None:
+            chunkSize = SetupManagerModelImport.CHUNK_SIZE
+
+        self.__model = model
+        self.__data = data
+        self.__mergeWithExistingData = mergeWithExistingData
+        self.__chunkSize = max(1, chunkSize)
+
+        # items to convert: (list, index in list, class)
+        self.__items = [(data['setups'], index, SetupManagerSetup) for index in range(len(data['setups']))] + \
+                       [(data['groups'], index, SetupManagerGroup) for index in range(len(data['groups']))]
+        self.__processed = 0
+
+        self.__timer = QTimer(self)
+        self.__timer.setInterval(0)
+        self.__timer.timeout.connect(self.__processChunk)
+
+    def __processItems(self, nbItems):
+        """Convert next `nbItems` items"""
+        for items, index, itemClass in self.__items[self.__processed:self.__processed + nbItems]:
+            if isinstance(items[index], dict):
+                items[index] = itemClass(items[index])
+        self.__processed = min(len(self.__items), self.__processed + nbItems)
+        self.progress.emit(self.__processed, len(self.__items))
+
+    def __processChunk(self):
+        """Convert a chunk of items; when all items are converted, update model"""
+        try:
+            self.__processItems(self.__chunkSize)
+            if self.__processed < len(self.__items):
+                return
+
+            self.__timer.stop()
+            self.__model.importData(self.__data, self.__mergeWithExistingData)
+        except Exception as e:
+            print("Unable to import setups:", e)
+            self.__timer.stop()
+            self.finished.emit(False)
+            return
+
+        self.finished.emit(True)
+
+    def start(self):
+        """Start import"""
+        if not self.__timer.isActive():
+            self.__timer.start()
+
+    def isRunning(self):
+        """Return True if import is currently running"""
+        return self.__timer.isActive()
+
+    def cancel(self):
+        """Cancel import; model is not modified"""
+        if self.__timer.isActive():
+            self.__timer.stop()
+            self.finished.emit(False)
+
+    def finish(self):
+        """Import all remaining items immediately"""
+        if self.__timer.isActive():
+            self.__chunkSize = len(self.__items)
+            self.__processChunk()
+
+
 class WSetupManagerTv(QTreeView):
     focused = Signal()
     keyPressed = Signal(int)
@@ -1771,9 +1895,9 @@ class SetupManagerModelDelegateTv(QStyledItemDelegate):
 
     def sizeHint(self, option, index):
         """Calculate size for items"""
-        size = QStyledItemDelegate.sizeHint(self, option, index)
-
         if index.column() == SetupManagerModel.COLNUM_SETUP:
+            # note: don't use default size hint, that need icon (icon is built only
+            #       when item is painted)
             node = index.data(SetupManagerModel.ROLE_NODE)
             textDocument = QTextDocument()
             textDocument.setHtml(node.data().name())
@@ -1797,7 +1921,10 @@ class SetupManagerModelDelegateTv(QStyledItemDelegate):
             size = QSize(self.__csize, textDocument.size().toSize().height())
         elif index.column() == SetupManagerModel.COLNUM_DATE:
             # size for comments cell (width is forced, calculate height of rich text)
+            size = QStyledItemDelegate.sizeHint(self, option, index)
             size.setWidth(size.width() + 2 * SetupManagerModelDelegateTv.MARGIN_TEXT)
+        else:
+            size = QStyledItemDelegate.sizeHint(self, option, index)
 
         return size
 
@@ -1998,6 +2125,11 @@ class WSetupManager(QWidget):
     # - int: which column has been clicked in treeview (-1 if button "apply setup")
     setupApplied = Signal(SetupManagerSetup, int)
 
+    # several setups are applied (multiple setups and/or groups selected, see setApplyMultiple())
+    # - list: list of SetupManagerSetup (setups from selected groups are included)
+    # - int: which column has been clicked in treeview (-1 if button "apply setup")
+    setupsApplied = Signal(list, int)
+
     # selected item changed, provide a list of ManagedResource
     selectionChanged = Signal(list)
 
@@ -2100,6 +2232,12 @@ class WSetupManager(QWidget):
         # action on dblClick
         self.__onDblClick = WSetupManager.MODE_EDIT
 
+        # allow to apply multiple setups at once
+        self.__applyMultiple = False
+
+        # current import (SetupManagerModelImport) when a setups file is loaded incrementally
+        self.__modelImport = None
+
         # init UI
         self.tvSetups.setModel(self.__model)
 
@@ -2140,6 +2278,7 @@ class WSetupManager(QWidget):
 
     def __newSetups(self):
         """initialise new setups"""
+        self.__cancelImport()
         self.__setSetupFile('', '')
         self.__model.clear()
         self.__updateUi()
@@ -2147,8 +2286,50 @@ class WSetupManager(QWidget):
         self.setupFileNew.emit()
         return True
 
-    def __loadSetupsFile(self, fileName, settingsNfo):
-        """Load a setups file"""
+    def __cancelImport(self):
+        """Cancel current incremental import, if any"""
+        if self.__modelImport is not None:
+            self.__modelImport.cancel()
+            self.__modelImport = None
+
+    def __finishImport(self):
+        """Finish current incremental import, if any"""
+        if self.__modelImport is not None:
+            self.__modelImport.finish()
+
+    def __loadSetupsProgress(self, processed, total):
+        """Incremental import progress"""
+        self.lblNfoSetupFile.setText(i18n('Loading...') + f' {processed}/{total}')
+
+    def __loadSetupsFinished(self, fileName, description):
+        """Setups file content has been imported in model"""
+        self.__setSetupFile(fileName, description)
+        self.__setModified(False)
+        self.setupsModified.emit()
+        self.setupFileOpened.emit(fileName)
+        self.__updateUi()
+
+    def __loadSetupsImportFinished(self, modelImport, imported, fileName, description):
+        """Incremental import is finished"""
+        if modelImport != self.__modelImport:
+            # import has been cancelled and replaced
+            return
+
+        self.__modelImport = None
+        if imported:
+            self.__loadSetupsFinished(fileName, description)
+        else:
+            self.__setSetupFile(self.__lastFileName, self.__lastFileDescription)
+            self.__updateUi()
+
+    def __loadSetupsFile(self, fileName, settingsNfo, incremental=False):
+        """Load a setups file
+
+        If `incremental` is True, setups are imported by chunks from event loop
+        and method returns when import is started
+        """
+        self.__cancelImport()
+
         try:
             with open(fileName, 'r') as fHandle:
                 jsonData = fHandle.read()
@@ -2164,22 +2345,34 @@ class WSetupManager(QWidget):
 
         isValid, message = WSetupManager.isValidPkTkSMContent(data, self.__storedDataFormatIdentifier)
         if isValid:
+            description = data[WSetupManager.FILE_KEY_PKTKSM][WSetupManager.FILE_KEY_PKTKSM_DESCRIPTION]
             try:
+                if incremental:
+                    modelImport = SetupManagerModelImport(self.__model,
+                                                          data[WSetupManager.FILE_KEY_PKTKSM][WSetupManager.FILE_KEY_PKTKSM_DATA],
+                                                          settingsNfo['openMode'] == 'merge',
+                                                          parent=self)
+                    modelImport.progress.connect(self.__loadSetupsProgress)
+                    modelImport.finished.connect(lambda imported: self.__loadSetupsImportFinished(modelImport, imported, fileName, description))
+                    self.__modelImport = modelImport
+                    self.__modelImport.start()
+                    self.__updateUi()
+                    return True
+
                 self.__model.importData(data[WSetupManager.FILE_KEY_PKTKSM][WSetupManager.FILE_KEY_PKTKSM_DATA], settingsNfo['openMode'] == 'merge')
-                self.__setSetupFile(fileName, data[WSetupManager.FILE_KEY_PKTKSM][WSetupManager.FILE_KEY_PKTKSM_DESCRIPTION])
-                self.__setModified(False)
-                self.setupsModified.emit()
-                self.setupFileOpened.emit(fileName)
             except Exception as e:
                 print(f"Unable to interpret file: {fileName}", e)
                 return False
 
-            self.__updateUi()
+            self.__loadSetupsFinished(fileName, description)
             return True
         return False
 
     def __saveSetupsFile(self, fileName, settingsNfo):
         """Save setups to a file"""
+        # ensure setups file currently loaded is complete before saving
+        self.__finishImport()
+
         if settingsNfo['saveMode'] == 'all':
             data = self.__model.exportData()
         else:
@@ -2235,7 +2428,7 @@ class WSetupManager(QWidget):
                                                WDialogFile.OPTION_SETTINGS_WIDGET: wSettings}
                                       )
         if result:
-            return self.__loadSetupsFile(result['file'], result['settingsNfo'])
+            return self.__loadSetupsFile(result['file'], result['settingsNfo'], True)
         return False
 
     def __saveSetupsUI(self):
@@ -2422,12 +2615,14 @@ class WSetupManager(QWidget):
                 self.setupsModified.emit()
 
     def __actionApplySetup(self, columnIndex=-1):
-        """Apply selected setup"""
-        if self.tvSetups.nbSelectedItems() == 1:
-            item = self.tvSetups.selectedItems()[0]
-            if isinstance(item, SetupManagerSetup):
-                self.setupApplied.emit(item, columnIndex)
-                self.__updateUi()
+        """Apply selected setup(s)"""
+        selectedItems = self.tvSetups.selectedItems()
+        if len(selectedItems) == 1 and isinstance(selectedItems[0], SetupManagerSetup):
+            self.setupApplied.emit(selectedItems[0], columnIndex)
+            self.__updateUi()
+        elif self.__applyMultiple and len(setups := self.selectedSetups()) > 0:
+            self.setupsApplied.emit(setups, columnIndex)
+            self.__updateUi()
 
     def __actionItem(self, index):
         """Double click on item
@@ -2459,7 +2654,7 @@ class WSetupManager(QWidget):
         """Update user interface according to current status"""
         self.lblNbSetups.setText(f"{self.__model.rootNode().childStats()['total-setups']}")
 
-        if self.__model.rowCount() > 0:
+        if self.__model.rowCount() > 0 and not self.isLoading():
             self.tbSaveSetups.setEnabled(True)
         else:
             self.tbSaveSetups.setEnabled(False)
@@ -2468,12 +2663,12 @@ class WSetupManager(QWidget):
             if isinstance(self.tvSetups.selectedItems()[0], SetupManagerSetup):
                 self.tbApplySetup.setEnabled(True)
             else:
-                self.tbApplySetup.setEnabled(False)
+                self.tbApplySetup.setEnabled(self.__applyMultiple and len(self.selectedSetups()) > 0)
 
             self.tbEdit.setEnabled(True)
         else:
             self.tbEdit.setEnabled(False)
-            self.tbApplySetup.setEnabled(False)
+            self.tbApplySetup.setEnabled(self.__applyMultiple and len(self.selectedSetups()) > 0)
 
         if self.tvSetups.nbSelectedItems() > 0:
             self.tbDelete.setEnabled(True)
@@ -2504,6 +2699,44 @@ class WSetupManager(QWidget):
             return widget
         return None
 
+    def selectedSetups(self):
+        """Return a list of selected setups (SetupManagerSetup)
+
+        For selected groups, all setups from group (and sub-groups) are returned
+        """
+        def groupSetups(node, returned, foundIds):
+            for childNode in sorted(node.childs(), key=lambda item: item.data().position()):
+                item = childNode.data()
+                if isinstance(item, SetupManagerGroup):
+                    groupSetups(childNode, returned, foundIds)
+                elif isinstance(item, SetupManagerSetup) and item.id() not in foundIds:
+                    foundIds.add(item.id())
+                    returned.append(item)
+
+        returned = []
+        foundIds = set()
+        for item in self.tvSetups.selectedItems():
+            if isinstance(item, SetupManagerGroup):
+                groupSetups(item.node(), returned, foundIds)
+            elif isinstance(item, SetupManagerSetup) and item.id() not in foundIds:
+                foundIds.add(item.id())
+                returned.append(item)
+        return returned
+
+    def applyMultiple(self):
+        """Return True if multiple setups can be applied at once"""
+        return self.__applyMultiple
+
+    def setApplyMultiple(self, value):
+        """Set if multiple setups can be applied at once
+
+        When True, applying a selection of more than one setup, or group(s), emit
+        signal `setupsApplied`
+        """
+        if isinstance(value, bool) and value != self.__applyMultiple:
+            self.__applyMultiple = value
+            self.__updateUi()
+
     def selectionMode(self):
         """Return current selection mode"""
         return self.tvSetups.selectionMode()
@@ -2697,10 +2930,14 @@ class WSetupManager(QWidget):
         else:
             return self.__newSetupsUI()
 
-    def openSetup(self, fileName=None, merge=False):
+    def openSetup(self, fileName=None, merge=False, incremental=False):
         """open setup file
 
         If None is provided, display open dialog box
+
+        If `incremental` is True, setups are loaded by chunks without blocking
+        user interface: method returns when loading is started, and signal
+        `setupFileOpened` is emitted when setups are loaded
         """
         if fileName is None:
             return self.__loadSetupsUI()
@@ -2708,9 +2945,17 @@ class WSetupManager(QWidget):
             settingsNfo = {'openMode': 'replace'}
             if merge:
                 settingsNfo['openMode'] = 'merge'
-            return self.__loadSetupsFile(fileName, settingsNfo)
+            return self.__loadSetupsFile(fileName, settingsNfo, incremental)
         return False
 
+    def isLoading(self):
+        """Return True if a setups file is currently loaded incrementally"""
+        return self.__modelImport is not None
+
+    def finishLoading(self):
+        """If a setups file is currently loaded incrementally, load remaining setups immediately"""
+        self.__finishImport()
+
     def saveSetup(self, fileName=None, description=None):
         """Save setup file
 
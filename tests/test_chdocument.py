@@ -0,0 +1,72 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# Check in memory documents, used without Krita
+# -----------------------------------------------------------------------------
+
+import importlib
+
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from PyQt5.Qt import *
+
+APP = QApplication.instance() or QApplication([])
+
+from compositionhelper.ch.chdocument import (
+        CHDocument,
+        CHDocumentProvider,
+        CHMemoryDocument,
+        CHMemoryDocumentProvider
+    )
+
+
+def test_importWithoutKrita():
+    # main window and all imported widgets can be imported without Krita
+    importlib.import_module('compositionhelper.ch.chmainwindow')
+
+
+def test_abstractInterfaces():
+    with pytest.raises(TypeError):
+        CHDocument()
+    with pytest.raises(TypeError):
+        CHDocumentProvider()
+
+
+def test_memoryDocument():
+    document = CHMemoryDocument(size=QSize(200, 100))
+    groupLayer = document.groupLayer('group')
+    assert document.groupLayer('group') is groupLayer
+
+    image = QImage(10, 10, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.red)
+    layer = document.addRasterLayer(groupLayer, 'raster', [(QRect(20, 30, 10, 10), image)])
+    assert groupLayer.children() == [layer]
+
+    projection = document.projection()
+    assert projection.size() == QSize(200, 100)
+    assert projection.pixelColor(25, 35) == QColor(Qt.red)
+    assert projection.pixelColor(0, 0) == QColor(Qt.white)
+    assert document.projection(QSize(100, 100)).size() == QSize(100, 50)
+
+
+def test_memoryDocumentProvider():
+    calls = []
+    provider = CHMemoryDocumentProvider()
+    provider.connectActiveViewChanged(lambda: calls.append(provider.activeDocument()))
+    assert provider.viewsCount() == 0
+
+    document = CHMemoryDocument(size=QSize(20, 10))
+    provider.setActiveDocument(document)
+    assert calls == [document]
+    assert provider.viewsCount() == 1
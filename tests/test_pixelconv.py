@@ -0,0 +1,66 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# Check pixel data conversion for color profiles
+# -----------------------------------------------------------------------------
+
+import pytest
+
+pytest.importorskip('PyQt5')
+numpy = pytest.importorskip('numpy')
+
+from PyQt5.Qt import *
+
+from compositionhelper.pktk.modules.pixelconv import PixelConverter
+
+
+def sampleImage():
+    """Return a 2x1 ARGB32 image"""
+    returned = QImage(2, 1, QImage.Format_ARGB32)
+    returned.setPixelColor(0, 0, QColor(128, 64, 255, 200))
+    returned.setPixelColor(1, 0, QColor(0, 10, 250, 255))
+    return returned
+
+
+def test_profilesSupport():
+    assert PixelConverter.isNative('RGBA', 'U8')
+    assert PixelConverter.isNative('RGBA', 'U8', 'sRGB-elle-V2-srgbtrc.icc')
+    assert not PixelConverter.isNative('RGBA', 'U8', 'sRGB-elle-V2-g10.icc')
+    assert not PixelConverter.isNative('RGBA', 'U8', 'AdobeRGB')
+
+    assert PixelConverter.isSupported('RGBA', 'F32', 'sRGB-elle-V2-g10.icc')
+    assert PixelConverter.isSupported('GRAYA', 'U16', 'Gray-D50-elle-V2-srgbtrc.icc')
+    assert PixelConverter.isSupported('A', 'U8', None)
+    assert not PixelConverter.isSupported('RGBA', 'F32', 'AdobeRGB')
+    assert not PixelConverter.isSupported('CMYKA', 'U8', 'Chemical proof')
+
+
+def test_linearProfile():
+    # sRGB values are written as linear values
+    pixels = numpy.frombuffer(bytes(PixelConverter.fromQImage(sampleImage(), 'RGBA', 'F32', 'sRGB-elle-V2-g10.icc')), dtype='<f4')
+    assert pixels[0] == pytest.approx(0.2158605, abs=1e-5)
+    assert pixels[1] == pytest.approx(0.0512695, abs=1e-5)
+    assert pixels[2] == pytest.approx(1.0)
+    assert pixels[3] == pytest.approx(200 / 255)
+
+    pixels = numpy.frombuffer(bytes(PixelConverter.fromQImage(sampleImage(), 'RGBA', 'F32', 'sRGB-elle-V2-srgbtrc.icc')), dtype='<f4')
+    assert pixels[0] == pytest.approx(128 / 255)
+
+
+@pytest.mark.parametrize('colorDepth', ['U16', 'F16', 'F32'])
+@pytest.mark.parametrize('colorProfile', ['sRGB-elle-V2-g10.icc', 'sRGB-elle-V2-srgbtrc.icc', None])
+def test_roundTrip(colorDepth, colorProfile):
+    image = sampleImage()
+    pixelData = PixelConverter.fromQImage(image, 'RGBA', colorDepth, colorProfile)
+    returned = PixelConverter.toQImage(pixelData, 2, 1, 'RGBA', colorDepth, colorProfile)
+    for x in range(2):
+        assert returned.pixel(x, 0) == image.pixel(x, 0)
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# Check configuration file writing
+# -----------------------------------------------------------------------------
+
+import os
+import stat
+import sys
+
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from PyQt5.QtWidgets import QApplication
+
+from compositionhelper.pktk.modules.settings import Settings
+
+APP = QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(tmp_path))
+    returned = Settings('test-settings-')
+    assert os.path.dirname(returned.configurationFileName()) == str(tmp_path)
+    return returned
+
+
+def fileMode(fileName):
+    """Return permissions of given file"""
+    return stat.S_IMODE(os.stat(fileName).st_mode)
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="file permissions are not managed")
+def test_saveFileMode(settings):
+    fileName = settings.configurationFileName()
+
+    # new file: mode is defined from umask
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert settings.saveConfig()
+    assert fileMode(fileName) == 0o666 & ~umask
+
+    # existing file: mode is kept
+    os.chmod(fileName, 0o640)
+    assert settings.saveConfig()
+    assert fileMode(fileName) == 0o640
+    assert [name for name in os.listdir(os.path.dirname(fileName)) if name.endswith('.tmp')] == []
@@ -0,0 +1,181 @@
+# -----------------------------------------------------------------------------
+# Composition Helper
+# Copyright (C) 2020-2024 - Grum999
+# -----------------------------------------------------------------------------
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# https://spdx.org/licenses/GPL-3.0-or-later.html
+# -----------------------------------------------------------------------------
+# A Krita plugin designed to add composition helper in documents
+# -----------------------------------------------------------------------------
+
+# -----------------------------------------------------------------------------
+# Check that Tokenizer.retokenize() returns the same tokens than a full
+# tokenization with Tokenizer.tokenize()
+# -----------------------------------------------------------------------------
+
+import random
+import warnings
+
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from PyQt5.QtCore import QRegularExpression
+from PyQt5.QtGui import QGuiApplication
+
+from compositionhelper.pktk.modules.languagedef import (
+        LanguageDefJSON,
+        LanguageDefXML
+    )
+from compositionhelper.pktk.modules.tokenizer import (
+        Tokenizer,
+        TokenizerRule,
+        TokenType
+    )
+
+APP = QGuiApplication.instance() or QGuiApplication([])
+
+# text fragments used to build texts: rules delimiters and keywords, and single characters
+FRAGMENTS = {
+        'json': ['true', 'false', 'null', '"', '\\"', '{', '}', '[', ']', ':', ',', '-', '.', 'e+', '0.', '12', 'ab', ' ', '\n', '\\'],
+        'xml': ['<![CDATA[', ']]>', '<!--', '-->', '<?xml', '?>', '<!DOCTYPE', '</a>', '<a', '/>', '>', '<', '="', '"', "'",
+                '=', '&amp;', '&#12;', 'ab', ' ', '\n', '!', '-', '[', ']']
+    }
+
+
+def tokensDescription(tokens):
+    """Return a comparable description of given `tokens`"""
+    return [(token.type(), token.positionStart(), token.length(), token.row(), token.column(), token.text(), token.value())
+            for token in tokens.list()]
+
+
+def tokensTypes(tokens):
+    """Return list of tuple (type id, text) for given `tokens`, ignoring spaces"""
+    return [(token.type().value[0], token.text()) for token in tokens.list() if token.text() != '']
+
+
+def checkRetokenize(tokenizer, oldText, newText):
+    """Return a tuple (retokenized, tokenized) descriptions for `newText` modified from `oldText`"""
+    retokenized = tokensDescription(tokenizer.retokenize(tokenizer.tokenize(oldText), newText))
+    tokenizer.clearCache()
+    return (retokenized, tokensDescription(tokenizer.tokenize(newText)))
+
+
+@pytest.fixture(params=['json', 'xml'])
+def language(request):
+    if request.param == 'json':
+        return (request.param, LanguageDefJSON().tokenizer())
+    return (request.param, LanguageDefXML().tokenizer())
+
+
+def test_lookAround():
+    tokenizer = LanguageDefXML().tokenizer()
+    # lookbehind with unfixed length: attributes are in a markup
+    assert tokensTypes(tokenizer.tokenize('<a b="1" c>text d = e</a>')) == [
+            ('markup', '<a'), ('attribute', 'b'), ('set_attribute', '='), ('str', '"1"'), ('attribute', 'c'), ('markup', '>'),
+            ('value', 'text'), ('attribute', 'd'), ('set_attribute', '='), ('value', 'e'), ('markup', '</a>')
+        ]
+    # lookbehind in a long markup
+    assert tokensTypes(tokenizer.tokenize('<a' + ' ' * 500 + 'b>'))[1] == ('attribute', 'b')
+
+    tokenizer = LanguageDefJSON().tokenizer()
+    # lookahead
+    assert tokensTypes(tokenizer.tokenize('{"k" : "v"}')) == [
+            ('object_marker_start', '{'), ('object_id', '"k"'), ('object_definition', ':'), ('value_string', '"v"'), ('object_marker_end', '}')
+        ]
+
+
+@pytest.mark.parametrize('languageDef', [LanguageDefJSON, LanguageDefXML])
+def test_lookAroundEngines(languageDef):
+    # look-around checked with python regular expressions must return the same result than QRegularExpression
+    rnd = random.Random(0)
+    name = 'json' if languageDef is LanguageDefJSON else 'xml'
+    texts = [''.join(rnd.choice(FRAGMENTS[name]) for index in range(30)) for iteration in range(50)]
+
+    nbChecked = 0
+    for rule in languageDef().tokenizer().rules():
+        for regex in (rule.regExLookBehind(), rule.regExLookAhead()):
+            if regex is None or regex.pyRegEx is None:
+                continue
+            nbChecked += 1
+
+            for text in texts:
+                for position in range(len(text) + 1):
+                    if regex is rule.regExLookAhead() or regex.atOffset:
+                        expected = regex.match(text, position, QRegularExpression.NormalMatch, QRegularExpression.AnchoredMatchOption).hasMatch()
+                        returned = regex.pyRegEx.match(text, position) is not None
+                    else:
+                        expected = regex.match(text[0:position]).hasMatch()
+                        returned = regex.pyRegEx.search(text, 0, position) is not None
+                    assert returned == expected, f"{regex.pattern()!r}: {text!r} at {position}"
+    assert nbChecked > 0
+
+
+def test_lookAroundPcreSyntax():
+    # POSIX class has a different meaning for python: QRegularExpression is used
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        rule = TokenizerRule(TokenType.UNKNOWN, r'[a-z]+(?=[[:digit:]])')
+    assert rule.regExLookAhead().pyRegEx is None
+
+    tokenizer = Tokenizer([rule])
+    assert [(token.rule(), token.text()) for token in tokenizer.tokenize('ab1').list()] == [(rule, 'ab')]
+
+    for pattern in (r'(?<=a\Z)b', r'a(?=b++)', r'a(?=b{,2}c)', r'a(?=\v)'):
+        rule = TokenizerRule(TokenType.UNKNOWN, pattern)
+        regex = rule.regExLookBehind() or rule.regExLookAhead()
+        assert regex.pyRegEx is None, pattern
+
+
+@pytest.mark.parametrize('oldText, newText', [
+        ('{"key": "some value, 12', '{"key": "some value, 12"'),
+        ('"a b c', '"a b c"'),
+        ('{"key"  \n 12}', '{"key"  \n: 12}'),
+        ('[1, 2, 3]', '[1, 2, 3, 4]'),
+        ('[1, 2, 3]', '[1,\n 2, 3]'),
+        ('<![CDATA[ x ]]> y', '<![CDATA[ x ]]> y ]]>')
+    ])
+def test_retokenizeJson(oldText, newText):
+    tokenizer = LanguageDefJSON().tokenizer()
+    retokenized, tokenized = checkRetokenize(tokenizer, oldText, newText)
+    assert retokenized == tokenized
+
+
+@pytest.mark.parametrize('oldText, newText', [
+        ('<![CDATA[ x ]]> y', '<![CDATA[ x ]]> y ]]>'),
+        ('<![CDATA[ x ]]> y', '<![CDATA[ x ]]> y ]]'),
+        ('<!-- a --> b', '<!-- a --> b -->'),
+        ('<a b="1">c', '<a b="1>c'),
+        ('<a b', '<a b>')
+    ])
+def test_retokenizeXml(oldText, newText):
+    tokenizer = LanguageDefXML().tokenizer()
+    retokenized, tokenized = checkRetokenize(tokenizer, oldText, newText)
+    assert retokenized == tokenized
+    if newText == '<![CDATA[ x ]]> y ]]>':
+        assert tokensTypes(tokenizer.tokenize(newText)) == [('cdata', newText)]
+
+
+def test_retokenizeRange():
+    tokenizer = LanguageDefJSON().tokenizer()
+    tokens = tokenizer.tokenize('[1, 2, 3]')
+    retokenized = tokensDescription(tokenizer.retokenize(tokens, '[1, 22, 3]', 5, 0, 1))
+    tokenizer.clearCache()
+    assert retokenized == tokensDescription(tokenizer.tokenize('[1, 22, 3]'))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_retokenizeFuzz(language, seed):
+    name, tokenizer = language
+    fragments = FRAGMENTS[name]
+    rnd = random.Random(seed)
+
+    for iteration in range(800):
+        oldText = ''.join(rnd.choice(fragments) for index in range(rnd.randint(0, 40)))
+        position = rnd.randint(0, len(oldText))
+        charsRemoved = rnd.randint(0, min(8, len(oldText) - position))
+        newText = oldText[:position] + ''.join(rnd.choice(fragments) for index in range(rnd.randint(0, 3))) + oldText[position + charsRemoved:]
+
+        retokenized, tokenized = checkRetokenize(tokenizer, oldText, newText)
+        assert retokenized == tokenized, f"{oldText!r} => {newText!r}"